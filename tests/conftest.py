@@ -1,69 +1,755 @@
-from collections import Counter
+import time
+_IMPORT_START = time.perf_counter()
+
+from collections import defaultdict
+import heapq
+import json
 import logging
+import os
+import random
+import re
+from pathlib import Path
 import pytest
 from playwright.sync_api import sync_playwright
-from utility.settings import BASE_URL
+from utility.settings import BASE_URL, DEFAULT_HEADERS
+from utility.adaptive_limiter import AdaptiveLimiter
 from utility.api_client import APIClient
+from utility.async_runner import AsyncRunner
+from utility.cassette import Cassette
+from utility.client_config import ClientConfig, TransportStats
+from utility.conditional_store import ConditionalGetStore
+from utility.data_schedule import DataNeeds, PrefetchPool, collection_url, release_after, schedule
+from utility.fan_out import FanOutFetcher
+from utility.lazy_context import LazyRequestContext
+from utility.log_pipeline import DEFAULT_BATCH_SIZE, BufferedFileHandler, JsonLinesFormatter, LogPipeline
+from utility.mock_server import MockStoreServer, build_dataset, parse_latency
+from utility.profiler import CallProfiler, ProfiledContext, SlowestProfiles, profiled, prune_dumps, render_breakdown
 from utility.data_generator import DataGenerator
+from utility.request_recorder import RequestRecord, RequestRecorder, render_html_summary
+from utility.response_cache import ResponseCache
+from utility.shared_store import SharedResponseStore
+from utility.single_flight import SingleFlight
+from utility.snapshot_store import SnapshotStore
+
+CACHE_STATS_KEY = pytest.StashKey[dict]()
+SHARED_STORE_STATS_KEY = pytest.StashKey[dict]()
+RECORDER_KEY = pytest.StashKey[RequestRecorder]()
+TRANSPORT_STATS_KEY = pytest.StashKey[TransportStats]()
+SNAPSHOT_STATS_KEY = pytest.StashKey[dict]()
+CONDITIONAL_STATS_KEY = pytest.StashKey[dict]()
+STARTUP_KEY = pytest.StashKey[dict]()
+SINGLE_FLIGHT_STATS_KEY = pytest.StashKey[dict]()
+CASSETTE_KEY = pytest.StashKey[Cassette]()
+CASSETTE_STATS_KEY = pytest.StashKey[dict]()
+DATA_PLAN_KEY = pytest.StashKey[dict]()
+DATA_SCHEDULE_STATS_KEY = pytest.StashKey[dict]()
+ADAPTIVE_STATS_KEY = pytest.StashKey[dict]()
+PROFILER_KEY = pytest.StashKey[CallProfiler]()
+SLOWEST_PROFILES_KEY = pytest.StashKey[SlowestProfiles]()
+FINISHED_WORKERS_KEY = pytest.StashKey[list]()
+
+LOG_FILE = "test_log.log"
+JSONL_LOG_FILE = "test_log.jsonl"
+# Set by pytest-xdist in worker processes, e.g. "gw0"
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+
+# Seconds spent importing this conftest and the client stack it pulls in
+CONFTEST_IMPORT_TIME = time.perf_counter() - _IMPORT_START
+
+# --- Options ---
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--api-cache-ttl", type=float, default=0,
+        help="Cache GET responses of APIClient for this many seconds (0 disables the cache).",
+    )
+    parser.addoption(
+        "--id-concurrency", type=int, default=1,
+        help="Max in-flight requests of consistency checks and payload matrices (1 keeps them sequential).",
+    )
+    parser.addoption(
+        "--mock-server", action="store_true",
+        help="Run against a local stand-in of the Fake Store API instead of BASE_URL.",
+    )
+    parser.addoption(
+        "--mock-size", type=int, default=None,
+        help="Entries per collection served by --mock-server (defaults mirror fakestoreapi.com).",
+    )
+    parser.addoption(
+        "--mock-seed", type=int, default=0,
+        help="DataGenerator seed for the --mock-server dataset.",
+    )
+    parser.addoption(
+        "--mock-latency", action="append", default=[],
+        help="DELAY[:JITTER] or ENDPOINT=DELAY[:JITTER] in seconds, e.g. /carts/:id=0.2:0.05. Repeatable.",
+    )
+    parser.addoption(
+        "--mock-max-in-flight", type=int, default=None,
+        help="Let the --mock-server stand-in answer 429 beyond this many concurrent requests.",
+    )
+    parser.addoption(
+        "--adaptive-concurrency", action="store_true",
+        help="Tune in-flight per-id requests from latency and 429/5xx, up to --id-concurrency (or --max-connections).",
+    )
+    parser.addoption(
+        "--request-timeout", type=float, default=ClientConfig.timeout,
+        help="Seconds before a single API request times out.",
+    )
+    parser.addoption(
+        "--max-connections", type=int, default=ClientConfig.max_connections,
+        help="Max in-flight requests per async request context; also caps --id-concurrency.",
+    )
+    parser.addoption(
+        "--get-retries", type=int, default=ClientConfig.retries,
+        help="Retry idempotent GETs this many times on network errors, 429 and 5xx.",
+    )
+    parser.addoption(
+        "--retry-backoff", type=float, default=ClientConfig.backoff,
+        help="Seconds before the first GET retry; doubled for each further retry.",
+    )
+    parser.addoption(
+        "--snapshot-diff", default=None, metavar="PATH",
+        help="Keep content hashes of verified entries in PATH and re-check only changed entries by id.",
+    )
+    parser.addoption(
+        "--conditional-get", default=None, metavar="DIR",
+        help="Keep ETag/Last-Modified and bodies of GET responses in DIR and revalidate them on later runs.",
+    )
+    parser.addoption(
+        "--single-flight-window", type=float, default=None,
+        help="Identical GETs issued within this many seconds share one request (0: only while in flight).",
+    )
+    parser.addoption(
+        "--record-cassette", default=None, metavar="PATH",
+        help="Record every APIClient request and response to the cassette at PATH.",
+    )
+    parser.addoption(
+        "--replay-cassette", default=None, metavar="PATH",
+        help="Serve APIClient responses from the cassette at PATH without any network I/O.",
+    )
+    parser.addoption(
+        "--api-log-format", choices=("text", "jsonl"), default="text",
+        help=f"Write the test log as text to {LOG_FILE} or as JSON lines to {JSONL_LOG_FILE}.",
+    )
+    parser.addoption(
+        "--api-log-batch", type=int, default=DEFAULT_BATCH_SIZE,
+        help="Flush the test log to disk once per this many records, or sooner when no more are queued.",
+    )
+    parser.addoption(
+        "--data-schedule", action="store_true",
+        help="Order tests by the collections their data marker declares and prefetch each collection once per group.",
+    )
+    parser.addoption(
+        "--profile", action="store_true",
+        help="Split the time of every test between network, JSON decoding, validation and the rest.",
+    )
+    parser.addoption(
+        "--profile-slowest", type=int, default=10, metavar="N",
+        help="Number of slowest tests shown by --profile and dumped by --profile-dump.",
+    )
+    parser.addoption(
+        "--profile-dump", default=None, metavar="DIR",
+        help="Implies --profile; also run cProfile on every test and write the pstats of the N slowest of the run to DIR.",
+    )
 
 # --- Loggers ---
 
 @pytest.fixture(scope="session", autouse=True)
-def configure_logger():
+def configure_logger(pytestconfig):
     logger = logging.getLogger("test_logger")
     logger.setLevel(logging.INFO)
+    if logger.handlers:
+        yield logger
+        return
 
-    handler = logging.FileHandler("test_log.log", mode="w")
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    jsonl = pytestconfig.getoption("--api-log-format") == "jsonl"
+    batch_size = pytestconfig.getoption("--api-log-batch")
+
+    # Each xdist worker writes its own file; the controller merges them at the end of the run
+    if XDIST_WORKER:
+        handler = BufferedFileHandler(_worker_log_file(XDIST_WORKER, _log_target(pytestconfig)), batch_size)
+        text_format = f"%(asctime)s - {XDIST_WORKER} - %(levelname)s - %(message)s"
+        formatter = JsonLinesFormatter(XDIST_WORKER) if jsonl else logging.Formatter(text_format)
+    else:
+        handler = BufferedFileHandler(_log_target(pytestconfig), batch_size)
+        formatter = JsonLinesFormatter() if jsonl else logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
     handler.setFormatter(formatter)
 
-    if not logger.handlers:
-        logger.addHandler(handler)
+    # Tests only enqueue records; formatting and disk writes happen on the pipeline's thread
+    pipeline = LogPipeline(logger, handler).start()
+
+    yield logger # yield logger so other fixtures can use it
 
-    return logger # return logger so other fixtures can use it
+    pipeline.stop()
 
 def pytest_runtest_logreport(report): 
     """Hook called after each test phase (setup/call/teardown).""" 
     logger = logging.getLogger("test_logger")
 
     if report.when == "setup" : 
-        logger.info(f"[TEST START] {report.nodeid}")
+        logger.info("[TEST START] %s", report.nodeid)
 
     if report.when == "call": 
         # only log the actual test outcome 
         outcome = "PASSED" if report.passed else "FAILED" 
         # report.nodeid includes the test name + parametrize ID 
-        logger.info(f"[TEST RESULT] {report.nodeid} → {outcome}")
+        logger.info("[TEST RESULT] %s → %s", report.nodeid, outcome)
+
+def _log_target(config) -> str:
+    return JSONL_LOG_FILE if config.getoption("--api-log-format") == "jsonl" else LOG_FILE
+
+def _worker_log_file(worker: str, target: str) -> str:
+    stem, suffix = os.path.splitext(target)
+    return f"{stem}.{worker}{suffix}"
+
+_RECORD_START = re.compile(r"^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3} - ")
+
+def merge_worker_logs(worker_files: list, target: str, jsonl: bool = False):
+    """ Interleave per-worker logs chronologically; multi-line messages stay with their record. """
+
+    def records(path):
+        with open(path, encoding="utf-8") as file:
+            if jsonl:
+                yield from file # one record per line
+                return
+            record = ""
+            for line in file:
+                if _RECORD_START.match(line) and record:
+                    yield record
+                    record = ""
+                record += line
+            if record:
+                yield record
+
+    # asctime leads every text record; both it and the JSON time field sort lexicographically
+    key = (lambda record: json.loads(record)["time"]) if jsonl else (lambda record: record[:23])
+    with open(target, "w", encoding="utf-8") as merged:
+        merged.writelines(heapq.merge(*(records(path) for path in worker_files), key=key))
+
+def pytest_configure(config):
+    config.stash[RECORDER_KEY] = RequestRecorder()
+    config.stash[TRANSPORT_STATS_KEY] = TransportStats()
+    config.stash[STARTUP_KEY] = {"conftest_import": CONFTEST_IMPORT_TIME, "playwright_launch": 0.0, "faker_load": 0.0}
+    config.addinivalue_line(
+        "markers", "data(*collections, mutates=False): collections the test reads and whether it writes, see --data-schedule",
+    )
+
+    if config.getoption("--record-cassette") and config.getoption("--replay-cassette"):
+        raise pytest.UsageError("--record-cassette and --replay-cassette cannot be combined")
+    # Workers would race on one cassette file; replaying under xdist is fine
+    if config.getoption("--record-cassette") and getattr(config.option, "numprocesses", None):
+        raise pytest.UsageError("--record-cassette cannot be used with pytest-xdist (-n)")
+
+    if config.getoption("--profile") or config.getoption("--profile-dump"):
+        config.stash[PROFILER_KEY] = CallProfiler().activate()
+    if config.getoption("--profile-dump"):
+        config.stash[SLOWEST_PROFILES_KEY] = SlowestProfiles(config.getoption("--profile-slowest"))
+
+def pytest_unconfigure(config):
+    profiler = config.stash.get(PROFILER_KEY, None)
+    if profiler is not None:
+        profiler.deactivate()
+
+# --- Data schedule ---
+
+DATA_COLLECTIONS = {"products", "carts", "users"}
+
+def _data_needs(item) -> DataNeeds:
+    """ Union of the data markers of a test and its class """
+    collections, mutates = set(), False
+    for marker in item.iter_markers("data"):
+        collections.update(marker.args)
+        mutates = mutates or marker.kwargs.get("mutates", False)
+
+    unknown = collections - DATA_COLLECTIONS
+    if unknown:
+        raise pytest.UsageError(f"{item.nodeid}: unknown data collections {sorted(unknown)}")
+    return DataNeeds(frozenset(collections), mutates)
+
+def pytest_collection_modifyitems(config, items):
+    """ --data-schedule: data-free tests, then read-only, then mutating ones, grouped by shared collections """
+    if not config.getoption("--data-schedule"):
+        return
+
+    needs = [_data_needs(item) for item in items]
+    order = schedule(needs)
+    items[:] = [items[index] for index in order]
+
+    # Deterministic, so every xdist worker arrives at the same order
+    ordered_needs = [needs[index] for index in order]
+    config.stash[DATA_PLAN_KEY] = {
+        item.nodeid: (need, releases) for item, need, releases in zip(items, ordered_needs, release_after(ordered_needs))
+    }
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """ Attribute API calls (fixtures included) to the test being run. """
+    item.config.stash[RECORDER_KEY].current_test = item.nodeid
+
+    profiler = item.config.stash.get(PROFILER_KEY, None)
+    if profiler is not None:
+        profiler.current_test = item.nodeid
+
+    cassette = item.config.stash.get(CASSETTE_KEY, None)
+    if cassette is not None:
+        cassette.current_test = item.nodeid
+
+    # Tests pick random entries; replay needs the same picks (and so the same urls) as the recording
+    if item.config.getoption("--record-cassette") or item.config.getoption("--replay-cassette"):
+        random.seed(item.nodeid)
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """ --profile: wall time of each test, fixtures included; --profile-dump: its cProfile too """
+    profiler = item.config.stash.get(PROFILER_KEY, None)
+    if profiler is None:
+        yield
+        return
+
+    profiles = item.config.stash.get(SLOWEST_PROFILES_KEY, None)
+    profile = profiles.start() if profiles is not None else None
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+
+    profiler.add_duration(item.nodeid, elapsed)
+    if profile is not None:
+        profiles.stop(item.nodeid, profile, elapsed)
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(prefix, summary, postfix, session):
+    """ Slowest calls and per-endpoint latency histograms in report.html """
+    prefix.extend(render_html_summary(session.config.stash[RECORDER_KEY]))
+
+def pytest_terminal_summary(terminalreporter, config):
+    """ Report how many round-trips the response cache and the shared snapshots saved. """
+    stats = config.stash.get(CACHE_STATS_KEY, None)
+
+    if stats is not None:
+        terminalreporter.write_sep("-", "api response cache")
+        terminalreporter.write_line(
+            f"hits: {stats['hits']}, misses: {stats['misses']}, "
+            f"invalidations: {stats['invalidations']}, entries: {stats['entries']}"
+        )
+
+    shared = config.stash.get(SHARED_STORE_STATS_KEY, None)
+    if shared is not None:
+        terminalreporter.write_sep("-", "shared collection snapshots")
+        terminalreporter.write_line(
+            f"fetched: {shared['fetched']}, reused: {shared['reused']}, dropped after a write: {shared['invalidated']}"
+        )
+
+    snapshot = config.stash.get(SNAPSHOT_STATS_KEY, None)
+    if snapshot is not None:
+        terminalreporter.write_sep("-", "snapshot diff")
+        terminalreporter.write_line(
+            f"entries checked by id: {snapshot['checked']}, unchanged and skipped: {snapshot['skipped']}"
+        )
+
+    conditional = config.stash.get(CONDITIONAL_STATS_KEY, None)
+    if conditional is not None:
+        terminalreporter.write_sep("-", "conditional get")
+        terminalreporter.write_line(
+            f"304 not modified: {conditional['revalidated']}, bytes saved: {conditional['bytes_saved']}, "
+            f"bodies stored: {conditional['stored']}"
+        )
+
+    data_schedule = config.stash.get(DATA_SCHEDULE_STATS_KEY, None)
+    if data_schedule is not None:
+        terminalreporter.write_sep("-", "data schedule")
+        terminalreporter.write_line(
+            f"collections prefetched: {data_schedule['prefetched']}, served from the pool: {data_schedule['hits']}, "
+            f"released: {data_schedule['released']}, dropped after a write: {data_schedule['invalidated']}"
+        )
+
+    cassette = config.stash.get(CASSETTE_STATS_KEY, None)
+    if cassette is not None:
+        terminalreporter.write_sep("-", "cassette")
+        terminalreporter.write_line(f"recorded: {cassette['recorded']}, replayed: {cassette['replayed']}")
+
+    single_flight = config.stash.get(SINGLE_FLIGHT_STATS_KEY, None)
+    if single_flight is not None:
+        terminalreporter.write_sep("-", "single-flight")
+        terminalreporter.write_line(
+            f"GETs sent: {single_flight['issued']}, coalesced into one already issued: {single_flight['coalesced']}"
+        )
+
+    adaptive = config.stash.get(ADAPTIVE_STATS_KEY, None)
+    if adaptive is not None:
+        terminalreporter.write_sep("-", "adaptive concurrency")
+        terminalreporter.write_line(
+            f"limit: {adaptive['limit']} at the end, {adaptive['peak_limit']} at most; increases: {adaptive['increases']}, "
+            f"decreases on 429/5xx/errors: {adaptive['decreases_on_error']}, on latency: {adaptive['decreases_on_latency']}, "
+            f"requests: {adaptive['samples']}"
+        )
+
+    profiler = config.stash.get(PROFILER_KEY, None)
+    if profiler is not None:
+        count = config.getoption("--profile-slowest")
+        terminalreporter.write_sep("-", f"profile: {count} slowest tests")
+        for line in render_breakdown(profiler.slowest(count)):
+            terminalreporter.write_line(line)
+        if config.getoption("--profile-dump"):
+            terminalreporter.write_line(f"cProfile stats of the slowest tests written to {config.getoption('--profile-dump')}")
+
+    startup = config.stash[STARTUP_KEY]
+    terminalreporter.write_sep("-", "startup")
+    terminalreporter.write_line(
+        f"conftest import: {startup['conftest_import']:.2f}s, playwright launch: {startup['playwright_launch']:.2f}s, "
+        f"faker load: {startup['faker_load']:.2f}s"
+    )
+
+    transport = config.stash[TRANSPORT_STATS_KEY]
+    if transport.requests_sent:
+        terminalreporter.write_sep("-", "api transport")
+        line = (f"contexts opened: {transport.contexts_opened}, requests sent: {transport.requests_sent}, "
+                f"retries: {transport.retries}")
+        if transport.connections_accepted:
+            line += f", connections accepted by the stand-in: {transport.connections_accepted}"
+        if transport.requests_rejected:
+            line += f", refused with 429 by the stand-in: {transport.requests_rejected}"
+        terminalreporter.write_line(line)
+
+# --- pytest-xdist ---
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session):
+    """ Workers ship their metrics to the controller; the controller merges the worker logs. """
+    config = session.config
+    config.stash[STARTUP_KEY]["faker_load"] += DataGenerator.faker_load_time
+
+    # Every process dumps the slowest tests it ran itself; the controller then keeps the slowest overall
+    profiles = config.stash.get(SLOWEST_PROFILES_KEY, None)
+    if profiles is not None:
+        profiles.dump(config.getoption("--profile-dump"))
+
+    if hasattr(config, "workerinput"):
+        config.workeroutput["api_requests"] = [tuple(record) for record in config.stash[RECORDER_KEY].records]
+        config.workeroutput["cache_stats"] = config.stash.get(CACHE_STATS_KEY, None)
+        config.workeroutput["shared_store_stats"] = config.stash.get(SHARED_STORE_STATS_KEY, None)
+        config.workeroutput["snapshot_stats"] = config.stash.get(SNAPSHOT_STATS_KEY, None)
+        config.workeroutput["conditional_stats"] = config.stash.get(CONDITIONAL_STATS_KEY, None)
+        config.workeroutput["startup"] = config.stash[STARTUP_KEY]
+        config.workeroutput["single_flight_stats"] = config.stash.get(SINGLE_FLIGHT_STATS_KEY, None)
+        config.workeroutput["cassette_stats"] = config.stash.get(CASSETTE_STATS_KEY, None)
+        config.workeroutput["data_schedule_stats"] = config.stash.get(DATA_SCHEDULE_STATS_KEY, None)
+        config.workeroutput["adaptive_stats"] = config.stash.get(ADAPTIVE_STATS_KEY, None)
+        config.workeroutput["transport_stats"] = config.stash[TRANSPORT_STATS_KEY].as_dict()
+        if PROFILER_KEY in config.stash:
+            config.workeroutput["profile"] = config.stash[PROFILER_KEY].as_dict()
+        return
+
+    profiler = config.stash.get(PROFILER_KEY, None)
+    if profiler is not None and config.getoption("--profile-dump"):
+        directory = Path(config.getoption("--profile-dump"))
+        prune_dumps(directory, [test for test, _ in profiler.slowest(config.getoption("--profile-slowest"))])
+        (directory / "breakdown.json").write_text(json.dumps(profiler.as_dict(), indent=2), encoding="utf-8")
+
+    target = _log_target(config)
+    # Only the logs of this run's workers: a file left behind by an aborted run must not replace this run's log
+    workers = config.stash.get(FINISHED_WORKERS_KEY, [])
+    worker_files = [path for path in (Path(_worker_log_file(worker, target)) for worker in sorted(workers)) if path.exists()]
+    if worker_files:
+        merge_worker_logs(worker_files, target, jsonl=target == JSONL_LOG_FILE)
+        for path in worker_files:
+            path.unlink()
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """ Controller side: fold the metrics of a finished worker into the run totals. """
+    output = getattr(node, "workeroutput", {})
+    config = node.config
+    config.stash.setdefault(FINISHED_WORKERS_KEY, []).append(node.workerinput["workerid"])
+
+    config.stash[RECORDER_KEY].records.extend(RequestRecord(*record) for record in output.get("api_requests", []))
+    for key, name in (
+        (CACHE_STATS_KEY, "cache_stats"),
+        (SHARED_STORE_STATS_KEY, "shared_store_stats"),
+        (SNAPSHOT_STATS_KEY, "snapshot_stats"),
+        (CONDITIONAL_STATS_KEY, "conditional_stats"),
+        (STARTUP_KEY, "startup"),
+        (SINGLE_FLIGHT_STATS_KEY, "single_flight_stats"),
+        (CASSETTE_STATS_KEY, "cassette_stats"),
+        (DATA_SCHEDULE_STATS_KEY, "data_schedule_stats"),
+    ):
+        stats = output.get(name)
+        if stats is not None:
+            totals = config.stash.get(key, {})
+            config.stash[key] = {field: totals.get(field, 0) + value for field, value in stats.items()}
+    config.stash[TRANSPORT_STATS_KEY].merge(output.get("transport_stats", {}))
+    if PROFILER_KEY in config.stash:
+        config.stash[PROFILER_KEY].merge(output.get("profile", {}))
+
+    # Every worker adapts its own limit: counters add up, limits do not
+    adaptive = output.get("adaptive_stats")
+    if adaptive is not None:
+        totals = config.stash.get(ADAPTIVE_STATS_KEY, {})
+        config.stash[ADAPTIVE_STATS_KEY] = {
+            field: max(totals.get(field, 0), value) if field in ("limit", "peak_limit") else totals.get(field, 0) + value
+            for field, value in adaptive.items()
+        }
 
 # --- Setup ---
 
 @pytest.fixture(scope="session")
-def api_client(configure_logger):
+def client_config(pytestconfig) -> ClientConfig:
+    """ Timeouts, connection cap and GET retry policy shared by the sync and async clients. """
+
+    return ClientConfig(
+        timeout = pytestconfig.getoption("--request-timeout"),
+        max_connections = pytestconfig.getoption("--max-connections"),
+        retries = pytestconfig.getoption("--get-retries"),
+        backoff = pytestconfig.getoption("--retry-backoff"),
+    )
+
+@pytest.fixture(scope="session")
+def api_base_url(pytestconfig, configure_logger):
+    """ BASE_URL, or the url of a local stand-in server when --mock-server is given. """
+
+    if not pytestconfig.getoption("--mock-server"):
+        yield BASE_URL
+        return
+
+    size = pytestconfig.getoption("--mock-size")
+    dataset = build_dataset(size, size, size, pytestconfig.getoption("--mock-seed"))
+    latency = parse_latency(pytestconfig.getoption("--mock-latency"))
+    max_in_flight = pytestconfig.getoption("--mock-max-in-flight")
+
+    with MockStoreServer(dataset, latency, max_in_flight = max_in_flight) as server:
+        configure_logger.info("Mock server listening on %s", server.base_url)
+        yield server.base_url
+        pytestconfig.stash[TRANSPORT_STATS_KEY].connections_accepted += server.connections_accepted
+        pytestconfig.stash[TRANSPORT_STATS_KEY].requests_rejected += server.rejected
+
+def persistent_namespace(pytestconfig, api_base_url: str) -> str:
+    """ Key of the data kept between runs; the stand-in picks a free port per run, so it is keyed by its dataset """
+
+    if pytestconfig.getoption("--mock-server"):
+        return f"mock-server size={pytestconfig.getoption('--mock-size')} seed={pytestconfig.getoption('--mock-seed')}"
+    return api_base_url
+
+@pytest.fixture(scope="session")
+def cassette(pytestconfig, configure_logger):
+    """ Cassette given by --record-cassette or --replay-cassette, or None to talk to the server. """
+
+    record, replay = pytestconfig.getoption("--record-cassette"), pytestconfig.getoption("--replay-cassette")
+    if record is None and replay is None:
+        yield None
+        return
+
+    cassette = Cassette(record or replay, "record" if record else "replay")
+    # Created during the setup of the first test, after pytest_runtest_setup has run for it
+    cassette.current_test = pytestconfig.stash[RECORDER_KEY].current_test
+    pytestconfig.stash[CASSETTE_KEY] = cassette
+    configure_logger.info("%s cassette %s", "Recording to" if record else "Replaying from", cassette.path)
+    yield cassette
+
+    cassette.close()
+    pytestconfig.stash[CASSETTE_STATS_KEY] = cassette.stats()
+    configure_logger.info("Cassette stats: %s", cassette.stats())
+
+def new_single_flight(pytestconfig):
+    """ One SingleFlight per client: sync and async responses cannot stand in for each other """
+
+    window = pytestconfig.getoption("--single-flight-window")
+    return SingleFlight(window) if window is not None else None
+
+def add_single_flight_stats(pytestconfig, single_flight: SingleFlight):
+    totals = pytestconfig.stash.get(SINGLE_FLIGHT_STATS_KEY, {})
+    pytestconfig.stash[SINGLE_FLIGHT_STATS_KEY] = {
+        field: totals.get(field, 0) + value for field, value in single_flight.stats().items()
+    }
+
+def fan_out_concurrency(pytestconfig, client_config: ClientConfig) -> int:
+    """ Ceiling of in-flight per-id requests; the adaptive limiter tunes below it, so it defaults to --max-connections there """
+    concurrency = pytestconfig.getoption("--id-concurrency")
+    if pytestconfig.getoption("--adaptive-concurrency") and concurrency == 1:
+        concurrency = client_config.max_connections
+    return min(concurrency, client_config.max_connections)
+
+@pytest.fixture(scope="session")
+def api_client(configure_logger, pytestconfig, request, api_base_url, client_config, cassette):
     logger = configure_logger 
     logger.info("Starting Playwright and creating API client...")
+
+    ttl = pytestconfig.getoption("--api-cache-ttl")
+    cache = ResponseCache(ttl) if ttl > 0 else None
+
+    # Under xdist the workers share one fetch of each collection
+    shared_store = None
+    if XDIST_WORKER:
+        directory = request.getfixturevalue("tmp_path_factory").getbasetemp().parent / "api_snapshots"
+        shared_store = SharedResponseStore(directory, persistent_namespace(pytestconfig, api_base_url))
+
+    conditional = None
+    if pytestconfig.getoption("--conditional-get") is not None:
+        conditional = ConditionalGetStore(
+            pytestconfig.getoption("--conditional-get"), persistent_namespace(pytestconfig, api_base_url)
+        )
+
+    single_flight = new_single_flight(pytestconfig)
+    prefetch = PrefetchPool() if pytestconfig.getoption("--data-schedule") else None
+
+    # Only spin up the async stack when the fan-out is requested; a cassette only sees the sync client
+    concurrency = fan_out_concurrency(pytestconfig, client_config)
+    fan_out = None
+    if concurrency > 1 and cassette is None:
+        # Async Playwright launches on the first bulk call, not for every test that uses api_client
+        fan_out = FanOutFetcher(
+            request.getfixturevalue("async_runner"), lambda: request.getfixturevalue("async_api_client"), concurrency
+        )
     
-    with sync_playwright() as p:
-        context = p.request.new_context(
-            base_url = BASE_URL,
-            extra_http_headers = {
-                "Accept": "application/json",
-                "Content-Type": "application/json",
-            },
+    stats = pytestconfig.stash[TRANSPORT_STATS_KEY]
+
+    def open_context():
+        logger.info("First request: starting Playwright...")
+        playwright = sync_playwright().start()
+        context = playwright.request.new_context(
+            base_url = api_base_url,
+            extra_http_headers = DEFAULT_HEADERS,
+            timeout = client_config.timeout_ms(),
         )
-        client = APIClient(context, logger)
-        logger.info("API client created successfully.")
-        yield client
+        stats.contexts_opened += 1
+
+        def close():
+            context.dispose()
+            playwright.stop()
+        return context, close
+
+    # Tests that never send a request (pure validators, -k selections) never launch Playwright
+    context = LazyRequestContext(open_context)
+    profiler = pytestconfig.stash.get(PROFILER_KEY, None)
+    client = APIClient(
+        ProfiledContext(context, profiler) if profiler is not None else context, logger,
+        cache = cache,
+        fan_out = fan_out,
+        recorder = pytestconfig.stash[RECORDER_KEY],
+        shared_store = shared_store,
+        config = client_config,
+        stats = stats,
+        conditional = conditional,
+        single_flight = single_flight,
+        cassette = cassette,
+        prefetch = prefetch,
+    )
+    logger.info("API client created successfully.")
+    yield client
+
+    if cache is not None:
+        pytestconfig.stash[CACHE_STATS_KEY] = cache.stats()
+        logger.info("Response cache stats: %s", cache.stats())
+
+    if shared_store is not None:
+        pytestconfig.stash[SHARED_STORE_STATS_KEY] = shared_store.stats()
+        logger.info("Shared snapshot stats: %s", shared_store.stats())
+
+    if conditional is not None:
+        pytestconfig.stash[CONDITIONAL_STATS_KEY] = conditional.stats()
+        logger.info("Conditional GET stats: %s", conditional.stats())
+
+    if single_flight is not None:
+        add_single_flight_stats(pytestconfig, single_flight)
 
+    if prefetch is not None:
+        pytestconfig.stash[DATA_SCHEDULE_STATS_KEY] = prefetch.stats()
+        logger.info("Data schedule stats: %s", prefetch.stats())
+
+    pytestconfig.stash[STARTUP_KEY]["playwright_launch"] += context.launch_time
+    if context.started:
         logger.info("Disposing Playwright context and closing API client...") 
-        context.dispose() 
+        context.close() 
         logger.info("API client disposed.")
 
+@pytest.fixture(scope="session")
+def async_runner():
+    """ Event loop thread shared by every async fixture of the session. """
+
+    runner = AsyncRunner()
+    yield runner
+    runner.close()
+
+@pytest.fixture(scope="session")
+def async_api_client(async_runner, configure_logger, api_base_url, pytestconfig, client_config):
+    """ AsyncAPIClient for overlapping requests; drive it with async_runner.run() / async_runner.gather(). """
+    # Imported lazily: runs whose tests never fan out do not load async Playwright at all
+    from playwright.async_api import async_playwright
+    from utility.async_api_client import AsyncAPIClient
+
+    logger = configure_logger
+    logger.info("Starting async Playwright and creating async API client...")
+
+    start = time.perf_counter()
+    playwright = async_runner.run(async_playwright().start())
+    context = async_runner.run(
+        playwright.request.new_context(
+            base_url = api_base_url, extra_http_headers = DEFAULT_HEADERS, timeout = client_config.timeout_ms()
+        )
+    )
+    pytestconfig.stash[STARTUP_KEY]["playwright_launch"] += time.perf_counter() - start
+    stats = pytestconfig.stash[TRANSPORT_STATS_KEY]
+    stats.contexts_opened += 1
+    single_flight = new_single_flight(pytestconfig)
+
+    limiter = None
+    if pytestconfig.getoption("--adaptive-concurrency"):
+        limiter = AdaptiveLimiter(fan_out_concurrency(pytestconfig, client_config))
+
+    yield AsyncAPIClient(
+        context, logger, pytestconfig.stash[RECORDER_KEY], client_config, stats, single_flight, limiter = limiter
+    )
+
+    if single_flight is not None:
+        add_single_flight_stats(pytestconfig, single_flight)
+
+    if limiter is not None:
+        pytestconfig.stash[ADAPTIVE_STATS_KEY] = limiter.stats()
+        logger.info("Adaptive concurrency: %s, decisions: %s", limiter.stats(), list(limiter.history))
+
+    logger.info("Disposing async Playwright context...")
+    async_runner.run(context.dispose())
+    async_runner.run(playwright.stop())
+
+@pytest.fixture(scope="session")
+def collection_snapshot(pytestconfig, api_base_url, configure_logger):
+    """ SnapshotStore given by --snapshot-diff, or None to check every entry by id. """
+
+    path = pytestconfig.getoption("--snapshot-diff")
+    if path is None:
+        yield None
+        return
+
+    snapshot = SnapshotStore(path, persistent_namespace(pytestconfig, api_base_url))
+    yield snapshot
+
+    snapshot.save()
+    pytestconfig.stash[SNAPSHOT_STATS_KEY] = snapshot.stats()
+    configure_logger.info("Snapshot diff stats: %s", snapshot.stats())
+
 @pytest.fixture(autouse=True) 
 def inject_client(request, api_client): 
     """ Autouse fixture: if the test class has 'client' attribute, inject the api_client into it automatically. """ 
 
     if hasattr(request.node, "cls") and request.node.cls is not None: setattr(request.node.cls, "client", api_client)
 
+@pytest.fixture(autouse=True)
+def scheduled_data(request, api_client):
+    """ Autouse fixture: under --data-schedule, prefetch the declared collections and release those no later test needs. """
+
+    plan = request.config.stash.get(DATA_PLAN_KEY, None)
+    step = plan.get(request.node.nodeid) if plan is not None else None
+    if step is None:
+        yield
+        return
+
+    needs, releases = step
+    for name in sorted(needs.collections):
+        if collection_url(name) not in api_client.prefetch.held():
+            api_client.prefetch_collection(collection_url(name))
+    yield
+
+    for name in sorted(releases):
+        api_client.release_collection(collection_url(name))
+
 @pytest.fixture(autouse=True) 
 def inject_logger(request, configure_logger): 
     """ Autouse fixture: if the test class has 'logger' attribute, inject the logger into it automatically. """ 
@@ -79,31 +765,63 @@ def data_generator():
 
 # --- Common helpers ---
 
-def validate_id_consistency(re_json: list, single_identifier_function):
+@profiled("validation")
+def validate_id_consistency(re_json: list, single_identifier_function=None, bulk_identifier_function=None,
+                            snapshot: SnapshotStore = None, resource: str = None):
     """ 
     To make sure GET (single) has a same entry as found in GET (all).
     "id" is the shared identifier for Carts, Products, and Users.
+    bulk_identifier_function takes the list of ids and returns the entries in the same order,
+    which lets the lookups run concurrently while failures keep the order of re_json.
+    With a snapshot, only entries of resource that changed since they last passed are looked up.
     """
 
     failures = []
+    if snapshot is not None:
+        re_json = snapshot.changed(resource, re_json)
     entry_map = {entry["id"]: entry for entry in re_json} 
 
-    for id, expected_entry in entry_map.items():
-        json_single = single_identifier_function(id)
+    if bulk_identifier_function is not None:
+        singles = bulk_identifier_function(list(entry_map))
+    else:
+        singles = (single_identifier_function(id) for id in entry_map)
+
+    verified = []
+    for (id, expected_entry), json_single in zip(entry_map.items(), singles):
         if json_single != expected_entry:
             failures.append(
                 f"Mismatch for id={id}:\n"
                 f"Expected: {expected_entry}\n"
                 f"Got:      {json_single}\n"
             )
+        else:
+            verified.append(expected_entry)
+
+    if snapshot is not None:
+        snapshot.mark_verified(resource, verified)
     return failures
 
-def validate_unique_identifier(re_json: list, unique_identifier: str, secondary_identifier: str):
-    """ Count unique_identifier and use secondary_identifier to analyze if any duplicates """
+@profiled("validation")
+def build_reference_index(entries: list, field_name: str, nested_field: str = None) -> dict:
+    """
+    Reverse index built in a single pass: referenced id -> ids of the entries referencing it.
+    field_name is read from the entry itself and, with nested_field, from each of its lines,
+    e.g. build_reference_index(carts, "productId", "products").
+    """
+
+    index = defaultdict(list)
+    for entry in entries:
+        refs = {entry[field_name]} if field_name in entry else set()
+        if nested_field is not None:
+            refs.update(line[field_name] for line in entry.get(nested_field, []) if field_name in line)
+
+        for ref in refs:
+            index[ref].append(entry["id"])
+    return index
+
+@profiled("validation")
+def find_invalid_references(reference_index: dict, valid_ids: set) -> dict:
+    """ Keep only the referenced ids missing from valid_ids, with the entries that reference them """
+
+    return {ref: entry_ids for ref, entry_ids in reference_index.items() if ref not in valid_ids}
 
-    id_counts = Counter(p[unique_identifier] for p in re_json)
-    return [
-            (p[unique_identifier], p.get(secondary_identifier))
-            for p in re_json
-            if id_counts[p[unique_identifier]] > 1
-        ]
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from utility.adaptive_limiter import AdaptiveLimiter
+from utility.async_api_client import AsyncAPIClient
+
+class TestAdaptiveLimiter:
+
+    def test_limit_backs_off_on_refusals_and_grows_while_healthy(self, async_runner):
+        """ A server that refuses more than 3 concurrent requests: the limit saws around 3, never far above it. """
+
+        limiter = AdaptiveLimiter(max_limit = 16)
+        in_flight, peak = 0, 0
+
+        async def request():
+            nonlocal in_flight, peak
+            async with limiter.slot() as slot:
+                in_flight += 1
+                peak = max(peak, in_flight)
+                slot.failed = in_flight > 3
+                await asyncio.sleep(0.002)
+                in_flight -= 1
+
+        async def main():
+            await asyncio.gather(*(request() for _ in range(400)))
+
+        async_runner.run(main())
+        stats = limiter.stats()
+
+        assert stats["samples"] == 400
+        assert stats["decreases_on_error"] >= 1 and stats["increases"] >= 1
+        assert stats["peak_limit"] < 8 and peak <= stats["peak_limit"]
+        assert [reason for _, _, reason in limiter.history][:1] == ["initial"]
+
+    def test_latency_above_the_baseline_counts_as_congestion(self):
+        limiter = AdaptiveLimiter(max_limit = 8, initial = 8, smoothing = 1.0)
+
+        limiter._observe(0.01, failed = False)
+        limiter._observe(0.05, failed = False)
+
+        assert limiter.stats()["limit"] == 4
+        assert limiter.stats()["decreases_on_latency"] == 1
+
+    def test_a_500_halves_the_limit_of_the_async_client(self, async_runner):
+        """ 500 is not a retry status, but it still tells the limiter the deployment is struggling """
+
+        class Response:
+            status = 500
+            headers = {}
+
+        class Context:
+            async def get(self, url: str, **kwargs):
+                return Response()
+
+        limiter = AdaptiveLimiter(max_limit = 8, initial = 8)
+        client = AsyncAPIClient(Context(), logging.getLogger("test_adaptive_limiter"), limiter = limiter)
+
+        assert async_runner.run(client.get_all_cart()).status == 500
+        assert limiter.stats()["limit"] == 4 and limiter.stats()["decreases_on_error"] == 1
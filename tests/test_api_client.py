@@ -0,0 +1,99 @@
+import logging
+from typing import NamedTuple
+import pytest
+from playwright.sync_api import Error as PlaywrightError
+from utility.api_client import APIClient
+from utility.client_config import ClientConfig
+from utility.conditional_store import ConditionalGetStore
+from utility.response_cache import ResponseCache
+from utility.settings import CART_ENDPOINT, USER_ENDPOINT
+from utility.stored_response import StoredResponse
+
+class _Response(NamedTuple):
+    status: int
+    url: str = ""
+    headers: dict = {}
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status <= 299
+
+class _Context:
+    """ Request context that answers every call with the next status (or response) of its script, default 200 """
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = []
+        self.sent_headers = []
+
+    def _answer(self, method: str, url: str):
+        self.calls.append((method, url))
+        outcome = self.script.pop(0) if self.script else 200
+        if isinstance(outcome, Exception):
+            raise outcome
+        return _Response(outcome, url) if isinstance(outcome, int) else outcome
+
+    def get(self, url: str, **kwargs):
+        self.sent_headers.append(kwargs.get("headers"))
+        return self._answer("get", url)
+
+    def post(self, url: str, **kwargs):
+        return self._answer("post", url)
+
+class _FanOut:
+    def send_many(self, calls: list) -> list:
+        return [201 for _ in calls]
+
+class TestAPIClient:
+
+    def _client(self, context: _Context, retries: int) -> APIClient:
+        return APIClient(context, logging.getLogger("test_api_client"), config = ClientConfig(retries = retries, backoff = 0.001))
+
+    def test_gets_are_retried_on_errors_and_retry_statuses(self):
+        context = _Context(PlaywrightError("connection reset"), 503, 429, 200)
+        client = self._client(context, retries = 3)
+
+        assert client.get_all_cart().status == 200
+        assert len(context.calls) == 4 and client.stats.retries == 3 and client.stats.requests_sent == 4
+        assert [ClientConfig(backoff = 0.5).backoff_delay(attempt) for attempt in range(3)] == [0.5, 1.0, 2.0]
+
+    def test_the_last_attempt_is_returned_or_raised(self):
+        client = self._client(_Context(503, 503), retries = 1)
+        assert client.get_all_cart().status == 503
+        assert client.stats.retries == 1
+
+        with pytest.raises(PlaywrightError):
+            self._client(_Context(PlaywrightError("refused"), PlaywrightError("refused")), retries = 1).get_all_cart()
+
+    def test_writes_are_never_retried(self):
+        context = _Context(503, PlaywrightError("refused"))
+        client = self._client(context, retries = 3)
+
+        assert client.create_user({}).status == 503
+        with pytest.raises(PlaywrightError):
+            client.create_user({})
+        assert context.calls == [("post", USER_ENDPOINT)] * 2 and client.stats.retries == 0
+
+    def test_writes_sent_through_the_fan_out_invalidate_the_sync_cache(self):
+        context = _Context()
+        client = APIClient(context, logging.getLogger("test_api_client"), cache = ResponseCache(60), fan_out = _FanOut())
+
+        client.get_all_cart()
+        client.get_all_cart()
+        assert client.send_many([("post", CART_ENDPOINT, {})]) == [201]
+        client.get_all_cart()
+
+        assert context.calls == [("get", CART_ENDPOINT), ("get", CART_ENDPOINT)]
+
+    def test_a_304_without_a_stored_body_is_sent_again_without_conditions(self, tmp_path):
+        store = ConditionalGetStore(tmp_path, "mock")
+        store.resolve(CART_ENDPOINT, StoredResponse(CART_ENDPOINT, 200, {"etag": '"v1"'}, b"[]"))
+        [body_file] = tmp_path.glob("*.body")
+        body_file.unlink()
+
+        fresh = StoredResponse(CART_ENDPOINT, 200, {"etag": '"v2"'}, b'[{"id": 1}]')
+        context = _Context(StoredResponse(CART_ENDPOINT, 304, {}, b""), fresh)
+        client = APIClient(context, logging.getLogger("test_api_client"), conditional = store)
+
+        assert client.get_all_cart().json() == [{"id": 1}]
+        assert context.sent_headers == [{"If-None-Match": '"v1"'}, None]
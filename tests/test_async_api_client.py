@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import pytest
+from playwright.async_api import Error as PlaywrightError, async_playwright
+from utility.async_api_client import AsyncAPIClient
+from utility.async_runner import gather_limited
+from utility.client_config import ClientConfig
+from utility.fan_out import FanOutFetcher
+from utility.mock_server import MockStoreServer, build_dataset
+from utility.settings import CART_ENDPOINT, USER_ENDPOINT
+
+@pytest.fixture(scope="module")
+def jittery_server():
+    """ Own stand-in, whatever --mock-server says: jitter makes responses complete out of order """
+    with MockStoreServer(build_dataset(5, 8, 5, seed = 1), {"*": (0.005, 0.02)}) as server:
+        yield server
+
+class TestAsyncAPIClient:
+
+    @pytest.fixture
+    def fan_out(self, async_runner, jittery_server):
+        playwright = async_runner.run(async_playwright().start())
+        context = async_runner.run(playwright.request.new_context(base_url = jittery_server.base_url))
+        client = AsyncAPIClient(context, logging.getLogger("test_async_api_client"), config = ClientConfig(max_connections = 4))
+
+        yield FanOutFetcher(async_runner, lambda: client, concurrency = 4)
+        async_runner.run(context.dispose())
+        async_runner.run(playwright.stop())
+
+    def test_gather_limited_keeps_order_and_limit(self, async_runner):
+        running, peak = 0, 0
+
+        async def job(index: int, delay: float):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(delay)
+            running -= 1
+            return index
+
+        delays = [0.03, 0.0, 0.02, 0.01, 0.0, 0.03, 0.01, 0.02]
+        results = async_runner.gather((job(index, delay) for index, delay in enumerate(delays)), 3)
+
+        assert results == list(range(len(delays)))
+        assert peak == 3
+
+    def test_gather_limited_raises_the_first_failure(self, async_runner):
+        async def job(index: int):
+            await asyncio.sleep(0.01 * (5 - index))
+            if index in (1, 3):
+                raise ValueError(index)
+            return index
+
+        # 3 fails first in time; gather reports the failure that happened, not the one listed first
+        with pytest.raises(ValueError, match = "3"):
+            async_runner.run(gather_limited((job(index) for index in range(5)), 5))
+
+    def test_fan_out_answers_in_the_order_of_ids(self, fan_out):
+        ids = [7, 2, 999, 5, 1, 8, 3]
+
+        results = fan_out.get_many_by_id(CART_ENDPOINT, ids)
+
+        assert [status for status, _ in results] == [200, 200, 404, 200, 200, 200, 200]
+        assert [json["id"] for _, json in results if json is not None] == [7, 2, 5, 1, 8, 3]
+
+    def test_fan_out_writes_report_statuses_in_call_order(self, fan_out):
+        user = {**build_dataset(0, 0, 1, seed = 2)["users"][0], "id": 100} # not one of the stand-in's ids
+        calls = [("post", USER_ENDPOINT, user), ("post", USER_ENDPOINT, {}), ("put", f"{USER_ENDPOINT}/1", user), ("put", f"{USER_ENDPOINT}/1", {})]
+
+        assert fan_out.send_many(calls) == [201, 400, 200, 400]
+
+    def test_transport_errors_reach_the_sync_caller(self, async_runner):
+        # Nothing listens there once the server is stopped
+        with MockStoreServer(build_dataset(1, 1, 1)) as server:
+            base_url = server.base_url
+
+        playwright = async_runner.run(async_playwright().start())
+        try:
+            context = async_runner.run(playwright.request.new_context(base_url = base_url))
+            client = AsyncAPIClient(context, logging.getLogger("test_async_api_client"))
+
+            with pytest.raises(PlaywrightError):
+                FanOutFetcher(async_runner, lambda: client, concurrency = 2).get_many_by_id(CART_ENDPOINT, [1, 2, 3])
+        finally:
+            async_runner.run(playwright.stop())
@@ -1,6 +1,8 @@
 from random import choice
 import pytest
+from utility.token_pool import credentials_of
 
+@pytest.mark.data("users")
 class TestAuth:
 
     # --- Helpers --- 
@@ -10,13 +12,7 @@ class TestAuth:
         re_get_users = self.client.get_all_users()        
         assert re_get_users.status == 200
 
-        credentials = {
-            entry["username"]: entry["password"]
-            for entry in re_get_users.json()
-            if "username" in entry and "password" in entry
-        }
-
-        return credentials
+        return credentials_of(re_get_users.json())
     
     def _get_random_credential(self) -> dict:
         """ Randomly pick a username, password pair as a new dict """
@@ -0,0 +1,22 @@
+import json
+from utility.benchmark import OPERATIONS, run_operations, run_validators
+from utility.mock_server import MockStoreServer, build_dataset
+
+class TestBenchmark:
+
+    def test_every_operation_is_timed_into_a_json_report(self, async_runner):
+        # On the runner loop: asyncio.run() in main() would clash with the loop behind sync_playwright()
+        with MockStoreServer(build_dataset(5, 5, 5)) as server:
+            operations = async_runner.run(run_operations(server.base_url, list(OPERATIONS), 3, 2, seed = 0))
+        validators = run_validators(20, seed = 0, repeat = 1)
+
+        report = json.loads(json.dumps({"operations": operations, "validators": validators}))
+
+        assert list(report["operations"]) == list(OPERATIONS)
+        for name, stats in report["operations"].items():
+            assert {"requests", "errors", "rps", "p50", "p95", "p99", "max", "statuses"} <= set(stats), name
+            assert stats["requests"] == 3 and stats["errors"] == 0, name
+            assert stats["p50"] <= stats["p95"] <= stats["p99"] <= stats["max"], name
+
+        timing = report["validators"]["duplicate_ids"]
+        assert timing["entries"] == 20 and 0 < timing["best"] <= timing["mean"]
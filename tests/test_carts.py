@@ -1,17 +1,28 @@
 import pytest
-from tests.conftest import validate_id_consistency
+from tests.conftest import build_reference_index, find_invalid_references, validate_id_consistency
+from utility.columns import CartColumns
+from utility.payload_matrix import build_matrix, failure_message, render_table, run_matrix
+from utility.schema import CART_SCHEMA, CART_VALIDATOR
+from utility.settings import CART_ENDPOINT
 from random import choice
 
+@pytest.mark.data("carts")
 class TestCarts:
 
-    def test_single_cart_consistency(self):
+    REQUIRED_FIELDS = CART_SCHEMA.required
+
+    def test_single_cart_consistency(self, collection_snapshot):
         """ Ensure /carts/:id returns the same cart as found in /carts. """
 
         json_all_users = self._get_re_json_of_all_carts()
-        failures = validate_id_consistency(json_all_users, self._get_re_json_for_cart)
+        failures = validate_id_consistency(
+            json_all_users, bulk_identifier_function=self._get_re_json_for_carts,
+            snapshot=collection_snapshot, resource="carts",
+        )
         self.logger.info(f"Carts mismatches found:{"\n".join(failures)}")
         assert not failures        
     
+    @pytest.mark.data("products")
     def test_cart_product_reference_integrity(self):
         """Verify that every product referenced in a cart actually exists in /products. """
 
@@ -19,6 +30,7 @@ class TestCarts:
         self.logger.info(f"Invalid product references found: {invalid_products}")
         assert not invalid_products        
 
+    @pytest.mark.data("users")
     def test_cart_user_reference_integrity(self):
         """Verify that every cart references a valid user ID that exists in /users. """
 
@@ -29,20 +41,21 @@ class TestCarts:
     def test_cart_product_quantity_validation(self):
         ''' Ensure that every cart has at least one product with positive quantity. '''
         
-        invalid_cart_ids = []
-
-        for cart in self._get_re_json_of_all_carts():
-            cart_id = cart.get("id")
-            products = cart.get("products", [])
-            
-            # Check: non-empty AND at least one product with quantity > 0
-            if not products or not any(p.get("quantity", 0) > 0 for p in products):
-                invalid_cart_ids.append(cart_id)
+        # Check: non-empty AND at least one product with quantity > 0
+        invalid_cart_ids = CartColumns.load(self._iter_all_carts()).carts_without_quantity()
 
         # Final assertion
         self.logger.info(f"Found carts with invalid products list: {invalid_cart_ids}")
         assert not invalid_cart_ids        
 
+    def test_carts_match_schema(self):
+        """ Every field rule of a cart, all carts checked in one pass over the stream. """
+
+        violations = CART_VALIDATOR.validate_all(self._iter_all_carts())
+        self.logger.info(f"Carts violating the schema: {violations}")
+        assert not violations
+
+    @pytest.mark.data(mutates=True)
     def test_create_cart_unique_id_validation(self):
         existing_cart = self._get_a_random_cart()
         re = self.client.create_cart(existing_cart)
@@ -52,52 +65,26 @@ class TestCarts:
         assert actual == 400, f"A new cart shouldn't be created on a duplicated cart ID"
 
 
-    @pytest.mark.parametrize(
-        "missing_field, expected_status",
-        [
-            pytest.param(None, 200, id="all_fields_present"),
-            pytest.param("id", 400, id="missing_id"),
-            pytest.param("userId", 400, id="missing_userId"),
-            pytest.param("date", 400, id="missing_date"),
-            pytest.param("products", 400, id="missing_products"),
-        ]
-    )
-    def test_update_cart(self, missing_field, expected_status):
-        payload = self._get_a_random_cart()
-        cart_id = payload.get("id")
-
-        if missing_field:
-            payload.pop(missing_field, None)
-
-        re = self.client.update_cart(cart_id, payload)
-        actual_status = re.status
-
-        self.logger.info(f"Actual: {actual_status}; Expect: {expected_status}; When missing {missing_field}")
-        assert re.status == expected_status        
-
+    @pytest.mark.data(mutates=True)
+    def test_update_cart(self):
+        """ PUT succeeds for a valid cart and returns 400 for every missing, empty or wrongly typed field and pair of them. """
 
+        payload = self._get_a_random_cart()
+        variants = build_matrix(payload, self.REQUIRED_FIELDS, valid_status=200)
 
-    @pytest.mark.parametrize(
-        "missing_field, expected_status",
-        [
-            pytest.param(None, 201, id="all_fields_present"),
-            pytest.param("id", 400, id="missing_id"),
-            pytest.param("userId", 400, id="missing_userId"),
-            pytest.param("date", 400, id="missing_date"),
-            pytest.param("products", 400, id="missing_products"),
-        ]
-    )
-    def test_create_cart_missing_field_validation(self, _mirror_a_new_cart, missing_field, expected_status):
-        new_cart = _mirror_a_new_cart
+        results = run_matrix(self.client, "put", f"{CART_ENDPOINT}/{payload['id']}", variants)
+        self.logger.info(f"PUT cart payload matrix:\n{render_table(results)}")
+        assert all(result.passed for result in results), failure_message(results)
 
-        if missing_field:
-            new_cart.pop(missing_field, None)
+    @pytest.mark.data(mutates=True)
+    def test_create_cart_missing_field_validation(self, _mirror_a_new_cart):
+        """ POST creates a valid new cart and returns 400 for every missing, empty or wrongly typed field and pair of them. """
 
-        re = self.client.create_cart(new_cart)
-        actual_status = re.status
+        variants = build_matrix(_mirror_a_new_cart, self.REQUIRED_FIELDS, valid_status=201)
 
-        self.logger.info(f"Actual: {actual_status}; Expect: {expected_status}; When missing {missing_field}")
-        assert actual_status == expected_status
+        results = run_matrix(self.client, "post", CART_ENDPOINT, variants)
+        self.logger.info(f"POST cart payload matrix:\n{render_table(results)}")
+        assert all(result.passed for result in results), failure_message(results)
 
     # --- Helpers ---
     
@@ -121,48 +108,36 @@ class TestCarts:
         Validate that all IDs referenced in carts exist via bulk API calls.
         field_name: 'userId' or 'productId'
         """
-        carts_json = self._get_re_json_of_all_carts()
-
-        # Fetch all users or products once
-        support_json = (
-            self.client.get_all_users().json()
-            if field_name == "userId"
-            else self.client.get_all_products().json()
-        )
-
-        # Build set of valid IDs from support_json
-        valid_ids = {entry.get("id") for entry in support_json if "id" in entry}
-
-        # Collect unique IDs from carts
         if field_name == "userId":
-            unique_ids = {c.get("userId") for c in carts_json if "userId" in c}
-            invalid_entries = {
-                uid: [c["id"] for c in carts_json if c.get("userId") == uid]
-                for uid in unique_ids if uid not in valid_ids
-            }
+            get_support, nested_field = self.client.get_all_users, None
         elif field_name == "productId":
-            unique_ids = {
-                p.get("productId")
-                for c in carts_json
-                for p in c.get("products", [])
-                if "productId" in p
-            }
-            invalid_entries = {
-                uid: [c["id"] for c in carts_json if any(p.get("productId") == uid for p in c.get("products", []))]
-                for uid in unique_ids if uid not in valid_ids
-            }
+            get_support, nested_field = self.client.get_all_products, "products"
         else:
             raise ValueError(f"Unsupported field_name: {field_name}")
 
-        return invalid_entries
+        carts_json = self._get_re_json_of_all_carts()
+
+        # Fetch all users or products once and build set of valid IDs
+        valid_ids = {entry.get("id") for entry in get_support().json() if "id" in entry}
+
+        # One pass over the carts instead of a rescan per invalid ID
+        reference_index = build_reference_index(carts_json, field_name, nested_field)
+        return find_invalid_references(reference_index, valid_ids)
 
     def _get_re_json_of_all_carts(self) -> list:
         re = self.client.get_all_cart()
         assert re.status == 200
         return re.json()
     
-    def _get_re_json_for_cart(self, id: int) -> list:
-        re = self.client.get_cart_by_id(id)
+    def _iter_all_carts(self):
+        """ Stream of carts, decoded one entry at a time """
+        re = self.client.get_all_cart()
         assert re.status == 200
-        return re.json() 
+        return self.client.iter_json(re)
+
+    def _get_re_json_for_carts(self, ids: list) -> list:
+        results = self.client.get_carts_by_ids(ids)
+        failed = [(id, status) for id, (status, _) in zip(ids, results) if status != 200]
+        assert not failed, f"GET /carts/:id did not return 200 for (id, status): {failed}"
+        return [json for _, json in results] 
     
\ No newline at end of file
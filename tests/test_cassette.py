@@ -0,0 +1,67 @@
+import json
+import pytest
+from utility.cassette import MMAP_THRESHOLD, Cassette, CassetteMiss
+from utility.stored_response import StoredResponse
+
+class TestCassette:
+
+    def test_replay_serves_recorded_responses_in_order(self, tmp_path):
+        """ Same test, same request: recorded order, then the last response sticks. Payload key order does not matter. """
+
+        path = tmp_path / "suite.json"
+        recording = Cassette(path, "record")
+        recording.current_test = "test_a"
+        recording.record("get", "/carts", None, StoredResponse("/carts", 200, {}, b"[1]"))
+        recording.record("post", "/carts", {"id": 1, "userId": 2}, StoredResponse("/carts", 400, {}, b'"dup"'))
+        recording.record("get", "/carts", None, StoredResponse("/carts", 200, {}, b"[1, 2]"))
+        recording.close()
+
+        replay = Cassette(path, "replay")
+        replay.current_test = "test_a"
+        assert replay.play("get", "/carts", None).json() == [1]
+        assert replay.play("post", "/carts", {"userId": 2, "id": 1}).status == 400
+        assert replay.play("get", "/carts", None).json() == [1, 2]
+        assert replay.play("get", "/carts", None).json() == [1, 2]
+
+        # Another test falls back to the last response recorded for the request
+        replay.current_test = "test_b"
+        assert replay.play("get", "/carts", None).json() == [1, 2]
+        with pytest.raises(CassetteMiss):
+            replay.play("get", "/users", None)
+        replay.close()
+
+    def test_large_bodies_are_memory_mapped_and_stored_once(self, tmp_path):
+        path = tmp_path / "suite.json"
+        body = json.dumps([{"id": id, "title": "x" * 100} for id in range(MMAP_THRESHOLD // 100)]).encode()
+
+        recording = Cassette(path, "record")
+        for _ in range(3):
+            recording.record("get", "/products", None, StoredResponse("/products", 200, {}, body))
+        recording.close()
+
+        replay = Cassette(path, "replay")
+        response = replay.play("get", "/products", None)
+        assert isinstance(response.body(), memoryview)
+        assert response.json()[-1]["id"] == MMAP_THRESHOLD // 100 - 1
+        assert path.with_name("suite.json.body").stat().st_size == len(body)
+        del response
+        replay.close()
+
+    def test_index_keeps_each_test_and_header_set_once(self, tmp_path):
+        path = tmp_path / "suite.json"
+        recording = Cassette(path, "record")
+        recording.current_test = "test_a"
+        for second in range(3):
+            headers = {"date": f"Sat, 17 Oct 2026 10:00:0{second} GMT", "content-type": "application/json", "content-length": "3"}
+            recording.record("post", "/carts", {"id": second, "note": "x" * 200}, StoredResponse("/carts", 201, headers, b"[1]"))
+        recording.close()
+
+        index = json.loads(path.read_text())
+        assert index["tests"] == ["test_a"]
+        assert index["headers"] == [[["content-type", "application/json"]]]
+        assert "x" * 200 not in path.read_text() # request bodies are keyed by digest
+
+        replay = Cassette(path, "replay")
+        replay.current_test = "test_a"
+        assert replay.play("post", "/carts", {"note": "x" * 200, "id": 2}).headers == {"content-type": "application/json", "content-length": "3"}
+        replay.close()
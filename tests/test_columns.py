@@ -0,0 +1,70 @@
+import sys
+import time
+from utility.columns import CartColumns, ProductColumns, UserColumns, duplicate_ids
+from utility.mock_server import build_dataset
+from utility.settings import PRODUCT_CATEGORIES
+
+class TestColumns:
+
+    def test_batch_validators_find_every_defect(self):
+        """ Bad prices, emails, quantities and repeated ids are reported with their ids. """
+
+        products = ProductColumns.load([
+            {"id": 1, "title": "a", "price": 9.5, "category": "jewelery"},
+            {"id": 2, "title": "b", "price": "9.5", "category": "jewelery"},
+            {"id": 2, "title": "c", "price": 0, "category": "electronics"},
+            {"id": 4, "title": "d", "price": True},
+        ])
+        users = UserColumns.load([
+            {"id": 1, "username": "ann", "email": "ann@shop.example"},
+            {"id": 2, "username": "bob", "email": "bob.shop.example"},
+            {"id": 3, "username": "cid"},
+        ])
+        carts = CartColumns.load([
+            {"id": 1, "userId": 1, "products": [{"productId": 1, "quantity": 0}, {"productId": 2, "quantity": 3}]},
+            {"id": 2, "userId": 1, "products": []},
+            {"id": 3, "userId": 2, "products": [{"productId": 1, "quantity": 0}, {"productId": 2, "quantity": "3"}]},
+        ])
+
+        assert products.invalid_prices() == [(2, "9.5"), (2, 0.0), (4, True)]
+        assert duplicate_ids(products.ids, products.titles) == [(2, "b"), (2, "c")]
+        assert products.missing_categories(PRODUCT_CATEGORIES) == ["men's clothing", "women's clothing"]
+        assert users.invalid_emails() == [(2, "bob.shop.example"), (3, "")]
+        assert carts.carts_without_quantity() == [2, 3]
+        assert list(carts.line_carts) == [0, 0, 2, 2]
+
+    def test_ids_of_the_wrong_type_are_reported_not_raised(self):
+        products = ProductColumns.load([
+            {"id": None, "title": "a", "price": -1},
+            {"id": "2", "title": "b", "price": 1},
+            {"id": 2.5, "title": "c", "price": 1},
+            {"id": None, "title": "d", "price": 1},
+        ])
+        carts = CartColumns.load([{"id": "1", "userId": None, "products": [{"productId": "x", "quantity": 1}]}])
+
+        assert products.invalid_prices() == [(None, -1)]
+        assert duplicate_ids(products.ids, products.titles) == [(None, "a"), (None, "d")]
+        assert UserColumns.load([{"id": "1", "email": "a@b.c"}]).invalid_emails() == []
+        assert carts.carts_without_quantity() == []
+
+    def test_columns_are_smaller_than_the_decoded_list(self):
+        """ 10^5 users: same duplicates as found on the dicts, in a fraction of the memory. """
+
+        count = 100_000
+        users = build_dataset(0, 0, count, seed = 3)["users"]
+        users.append({**users[10], "username": "copy"})
+
+        start = time.perf_counter()
+        columns = UserColumns.load(users)
+        duplicated = duplicate_ids(columns.ids, columns.usernames)
+        elapsed = time.perf_counter() - start
+
+        dict_bytes = sum(sys.getsizeof(user) for user in users)
+        column_bytes = sys.getsizeof(columns.ids) + sys.getsizeof(columns.usernames) + sys.getsizeof(columns.emails)
+        self.logger.info(
+            f"Columnar load + duplicate check of {count} users: {elapsed:.3f}s, "
+            f"{column_bytes / 2**20:.1f} MiB of columns vs {dict_bytes / 2**20:.1f} MiB of dicts"
+        )
+        from_dicts = duplicate_ids([user["id"] for user in users], [user.get("username") for user in users])
+        assert duplicated == from_dicts == [(11, users[10]["username"]), (11, "copy")]
+        assert column_bytes < dict_bytes / 4
@@ -0,0 +1,53 @@
+from utility.conditional_store import ConditionalGetStore
+from utility.stored_response import StoredResponse
+
+class TestConditionalGetStore:
+
+    def test_not_modified_is_served_from_the_stored_body(self, tmp_path):
+        """ A later run (new store on the same directory) sends the validators and replays the body on 304. """
+
+        body = b'[{"id": 1, "title": "product 1"}]'
+        first = ConditionalGetStore(tmp_path, "https://fakestoreapi.com")
+        first.resolve("/products", StoredResponse("/products", 200, {"etag": '"v1"', "last-modified": "Mon, 05 Oct 2026 10:00:00 GMT"}, body))
+
+        second = ConditionalGetStore(tmp_path, "https://fakestoreapi.com")
+        assert second.request_headers("/products") == {
+            "If-None-Match": '"v1"', "If-Modified-Since": "Mon, 05 Oct 2026 10:00:00 GMT"
+        }
+
+        replayed = second.resolve("/products", StoredResponse("/products", 304, {"etag": '"v1"'}, b""))
+        assert replayed.status == 200 and replayed.json() == [{"id": 1, "title": "product 1"}]
+        assert second.stats() == {"revalidated": 1, "bytes_saved": len(body), "stored": 0}
+
+    def test_responses_without_validators_are_not_stored(self, tmp_path):
+        store = ConditionalGetStore(tmp_path, "https://fakestoreapi.com")
+        store.resolve("/carts", StoredResponse("/carts", 200, {}, b"[]"))
+        store.resolve("/users/99", StoredResponse("/users/99", 404, {"etag": '"x"'}, b"null"))
+
+        assert store.request_headers("/carts") == {}
+        assert store.request_headers("/users/99") == {}
+        assert ConditionalGetStore(tmp_path, "http://other").request_headers("/carts") == {}
+
+    def test_conditions_are_read_without_the_body(self, tmp_path):
+        store = ConditionalGetStore(tmp_path, "https://fakestoreapi.com")
+        store.resolve("/carts", StoredResponse("/carts", 200, {"etag": '"v1"'}, b"[]"))
+        [body_file] = tmp_path.glob("*.body")
+        body_file.unlink()
+
+        later = ConditionalGetStore(tmp_path, "https://fakestoreapi.com")
+        assert later.request_headers("/carts") == {"If-None-Match": '"v1"'}
+
+    def test_a_304_without_its_stored_body_is_fetched_again_unconditionally(self, tmp_path):
+        store = ConditionalGetStore(tmp_path, "https://fakestoreapi.com")
+        store.resolve("/carts", StoredResponse("/carts", 200, {"etag": '"v1"'}, b"[]"))
+        [body_file] = tmp_path.glob("*.body")
+        body_file.unlink()
+
+        later = ConditionalGetStore(tmp_path, "https://fakestoreapi.com")
+        assert later.resolve("/carts", StoredResponse("/carts", 304, {}, b"")) is None
+        assert later.request_headers("/carts") == {}
+        assert not list(tmp_path.glob("*.meta.json"))
+
+        # What APIClient sends next carries no conditions; its answer is stored again
+        assert later.resolve("/carts", StoredResponse("/carts", 200, {"etag": '"v2"'}, b"[1]")).json() == [1]
+        assert ConditionalGetStore(tmp_path, "https://fakestoreapi.com").request_headers("/carts") == {"If-None-Match": '"v2"'}
@@ -0,0 +1,22 @@
+import time
+from utility.data_generator import DataGenerator
+
+class TestDataGenerator:
+
+    def test_generate_users_has_unique_ids_and_usernames(self, data_generator):
+        count = 100_000
+
+        start = time.perf_counter()
+        users = data_generator.generate_users(count, seed = 7)
+        elapsed = time.perf_counter() - start
+
+        self.logger.info(f"Generated {count} users in {elapsed:.2f}s")
+        assert len({user["id"] for user in users}) == count
+        assert len({user["username"] for user in users}) == count
+        assert all(len(user["password"]) == 8 and "@" in user["email"] for user in users)
+
+    def test_generate_users_is_reproducible_from_seed(self):
+        first, second = DataGenerator(), DataGenerator()
+
+        assert first.generate_users(50, seed = 1) == second.generate_users(50, seed = 1)
+        assert first.generate_users(50, seed = 1) != first.generate_users(50, seed = 2)
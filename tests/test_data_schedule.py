@@ -0,0 +1,35 @@
+from utility.data_schedule import DataNeeds, PrefetchPool, release_after, schedule
+from utility.stored_response import StoredResponse
+
+def _needs(*collections, mutates=False) -> DataNeeds:
+    return DataNeeds(frozenset(collections), mutates)
+
+class TestDataSchedule:
+
+    def test_reads_run_before_writes_and_groups_chain_by_shared_collections(self):
+        needs = [
+            _needs("products"),                 # 0
+            _needs("carts", mutates=True),      # 1
+            _needs("carts", "users"),           # 2
+            _needs(),                           # 3
+            _needs("users"),                    # 4
+            _needs("products"),                 # 5
+            _needs("carts", "products"),        # 6
+        ]
+
+        order = schedule(needs)
+        assert order == [3, 0, 5, 6, 2, 4, 1]
+
+        releases = release_after([needs[index] for index in order])
+        assert releases == [set(), set(), set(), {"products"}, set(), {"users"}, {"carts"}]
+
+    def test_pool_serves_until_released_or_written(self):
+        pool = PrefetchPool()
+        pool.pin("/carts", StoredResponse("/carts", 200, {}, b"[]"))
+        pool.pin("/users", StoredResponse("/users", 500, {}, b""))
+
+        assert pool.get("/carts").status == 200
+        assert pool.get("/users") is None
+        pool.invalidate("/carts/7")
+        assert pool.get("/carts") is None and pool.release("/carts") is None
+        assert pool.stats() == {"prefetched": 1, "hits": 1, "released": 0, "invalidated": 1}
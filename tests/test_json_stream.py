@@ -0,0 +1,29 @@
+import json
+import pytest
+from utility.json_stream import iter_json_array
+
+class TestJsonStream:
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            pytest.param("[]", id="empty"),
+            pytest.param(" [ ] ", id="empty_with_whitespace"),
+            pytest.param('[{"id": 1, "products": [{"productId": 2}]}, 3, "a,]", null]', id="nested_and_scalars"),
+            pytest.param('\n[\n  {"id": 1},\n  {"id": 2}\n]\n', id="pretty_printed"),
+        ]
+    )
+    def test_stream_matches_json_loads(self, text):
+        assert list(iter_json_array(text)) == json.loads(text)
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            pytest.param('{"id": 1}', id="not_an_array"),
+            pytest.param('[{"id": 1} {"id": 2}]', id="missing_separator"),
+            pytest.param('[{"id": 1},', id="truncated"),
+        ]
+    )
+    def test_stream_rejects_malformed_body(self, text):
+        with pytest.raises(ValueError):
+            list(iter_json_array(text))
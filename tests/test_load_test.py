@@ -0,0 +1,59 @@
+import random
+import time
+import pytest
+from utility.benchmark import OperationInputs
+from utility.load_test import DEFAULT_MIX, arrival_times, parse_mix, run_load
+
+class _Response:
+    status = 200
+
+class _Client:
+    """ Answers at once, except that its first request blocks the event loop for `stall` seconds """
+
+    def __init__(self, stall: float):
+        self.stall = stall
+        self.calls = 0
+
+    async def get_all_products(self):
+        self.calls += 1
+        if self.calls == 1:
+            time.sleep(self.stall)
+        return _Response()
+
+class TestLoadTest:
+
+    def test_parse_mix_accepts_every_operation_of_the_default_mix(self):
+        spec = ",".join(f"{name}={weight}" for name, weight in DEFAULT_MIX.items())
+
+        assert parse_mix(spec) == DEFAULT_MIX
+        assert parse_mix("delete_cart,get_all_products=2.5") == {"delete_cart": 1.0, "get_all_products": 2.5}
+        assert {"delete_products", "delete_cart", "delete_user"} <= set(DEFAULT_MIX)
+        with pytest.raises(ValueError, match = "Unknown operation: drop_table"):
+            parse_mix("get_all_products=1,drop_table=1")
+
+    def test_uniform_arrivals_are_evenly_spaced(self):
+        offsets = list(arrival_times(10, 3, "uniform", random.Random(0)))
+
+        assert len(offsets) == 30
+        assert offsets == pytest.approx([index / 10 for index in range(30)])
+
+    def test_poisson_arrivals_average_the_target_rate(self):
+        offsets = list(arrival_times(1000, 10, "poisson", random.Random(0)))
+        gaps = [later - earlier for earlier, later in zip(offsets, offsets[1:])]
+
+        assert len(offsets) == pytest.approx(10_000, rel = 0.05)
+        assert sum(gaps) / len(gaps) == pytest.approx(1 / 1000, rel = 0.05)
+        assert max(gaps) > 5 / 1000 # exponential gaps, not a fixed interval
+        assert offsets == list(arrival_times(1000, 10, "poisson", random.Random(0)))
+
+    def test_latency_is_measured_from_the_scheduled_start(self, async_runner):
+        client = _Client(stall = 0.2)
+        inputs = OperationInputs([], [], [], seed = 0)
+
+        stats = async_runner.run(run_load(client, inputs, {"get_all_products": 1}, rps = 100, duration = 0.3))["get_all_products"]
+
+        # The 19 requests scheduled during the stall go out late; a closed loop would skip them and report ~0 ms
+        assert stats["requests"] == client.calls == 30
+        assert stats["p50"] >= 0.03
+        assert stats["max"] >= 0.2
+        assert sum(stats["histogram"]) == 30 and stats["dropped"] == 0
@@ -0,0 +1,67 @@
+import json
+import logging
+import queue
+import pytest
+from utility.log_pipeline import BufferedFileHandler, JsonLinesFormatter, LogPipeline, _BatchingQueueListener
+
+class TestLogPipeline:
+
+    def test_records_are_batched_and_formatted_off_the_caller(self, tmp_path):
+        """ Arguments are formatted by the listener, not by the logging call. """
+
+        class Payload:
+            formatted = 0
+
+            def __str__(self):
+                Payload.formatted += 1
+                return "payload"
+
+        logger = logging.getLogger("test_log_pipeline")
+        logger.propagate = False
+        handler = BufferedFileHandler(tmp_path / "test.log", batch_size = 50)
+        handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        pipeline = LogPipeline(logger, handler).start()
+
+        logger.debug("below the level: %s", Payload()) # never formatted
+        for index in range(200):
+            logger.warning("record %s of %s", index, Payload())
+        pipeline.stop()
+
+        lines = (tmp_path / "test.log").read_text().splitlines()
+        assert lines[0] == "WARNING record 0 of payload" and len(lines) == 200
+        assert Payload.formatted == 200
+        assert pipeline.stats()["written"] == 200
+        assert pipeline.stats()["flushes"] >= 1
+        assert not logger.handlers
+
+    def test_handler_flushes_once_per_batch(self, tmp_path):
+        handler = BufferedFileHandler(tmp_path / "test.log", batch_size = 50)
+        for index in range(120):
+            handler.emit(logging.LogRecord("test", logging.INFO, __file__, 1, "record %s", (index,), None))
+
+        assert handler.flushes == 2
+        handler.close() # writes out the last 20
+        assert handler.flushes == 3 and len((tmp_path / "test.log").read_text().splitlines()) == 120
+
+    def test_listener_flushes_when_the_queue_runs_empty(self, tmp_path):
+        records = queue.SimpleQueue()
+        for index in range(10):
+            records.put(logging.LogRecord("test", logging.INFO, __file__, 1, "record %s", (index,), None))
+        handler = BufferedFileHandler(tmp_path / "test.log", batch_size = 50)
+        listener = _BatchingQueueListener(records, handler)
+
+        for _ in range(10):
+            listener.handle(listener.dequeue(False))
+        assert handler.flushes == 0
+
+        with pytest.raises(queue.Empty):
+            listener.dequeue(False)
+        assert handler.flushes == 1 and handler.written == 10
+        handler.close()
+
+    def test_json_lines_carry_worker_and_message(self):
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "GET %s → %s", ("/carts", 200), None)
+        entry = json.loads(JsonLinesFormatter("gw1").format(record))
+
+        assert list(entry) == ["time", "level", "worker", "message"]
+        assert entry["message"] == "GET /carts → 200" and entry["worker"] == "gw1"
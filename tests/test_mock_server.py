@@ -0,0 +1,87 @@
+import json
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+import pytest
+from utility.mock_server import MockStoreServer, build_dataset, parse_latency
+from utility.settings import AUTH_ENDPOINT, CART_ENDPOINT, PRODUCT_ENDPOINT, USER_ENDPOINT
+
+@pytest.fixture(scope="module")
+def store():
+    """ Routes only: handle() is called directly, no server is started """
+    return MockStoreServer(build_dataset(3, 3, 3, seed = 4))
+
+def _request(server: MockStoreServer, method: str, path: str, headers: dict = None) -> tuple:
+    """ (status, headers, body) of one request over HTTP """
+    connection = HTTPConnection(urlsplit(server.base_url).netloc, timeout = 5)
+    try:
+        connection.request(method, path, headers = headers or {})
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+class TestMockStoreServer:
+
+    def test_unknown_ids_are_404_and_non_numeric_ids_400(self, store):
+        assert store.handle("GET", f"{CART_ENDPOINT}/1", None)[0] == 200
+        assert store.handle("GET", f"{CART_ENDPOINT}/99", None)[0] == 404
+        assert store.handle("DELETE", f"{USER_ENDPOINT}/99", None)[0] == 404
+        assert store.handle("GET", f"{CART_ENDPOINT}/abc", None)[0] == 400
+        assert store.handle("PUT", f"{PRODUCT_ENDPOINT}/-1", {})[0] == 400
+        assert store.handle("GET", "/orders", None)[0] == 404
+
+    @pytest.mark.parametrize("change", [
+        {"username": None}, # missing
+        {"username": ""},
+        {"email": 42},
+        {"id": "7"},
+        {"id": True}, # bools are not numbers
+    ], ids = ["missing", "empty", "wrong type", "string id", "bool id"])
+    def test_invalid_user_fields_are_400(self, store, change):
+        user = {**build_dataset(0, 0, 1, seed = 5)["users"][0], "id": 100, **change}
+        user = {field: value for field, value in user.items() if value is not None}
+
+        assert store.handle("POST", USER_ENDPOINT, user)[0] == 400
+        assert store.handle("PUT", f"{USER_ENDPOINT}/1", user)[0] == 400
+
+    def test_writes_answer_201_and_200_but_duplicate_ids_400(self, store):
+        user = {**store.dataset["users"][0]}
+
+        assert store.handle("POST", USER_ENDPOINT, {**user, "id": 100}) == (201, {**user, "id": 100})
+        assert store.handle("POST", USER_ENDPOINT, user)[0] == 400
+        assert store.handle("PUT", f"{USER_ENDPOINT}/1", user)[0] == 200
+        assert store.handle("POST", CART_ENDPOINT, None)[0] == 400
+
+    def test_login_is_201_with_a_token_or_401(self, store):
+        user = store.dataset["users"][0]
+
+        status, body = store.handle("POST", AUTH_ENDPOINT, {"username": user["username"], "password": user["password"]})
+        assert status == 201 and len(body["token"]) == 64
+        assert store.handle("POST", AUTH_ENDPOINT, {"username": user["username"], "password": "wrong"})[0] == 401
+        assert store.handle("POST", AUTH_ENDPOINT, {"username": user["username"]})[0] == 400
+        assert store.handle("GET", AUTH_ENDPOINT, None)[0] == 404
+
+    def test_a_matching_if_none_match_is_304(self):
+        with MockStoreServer(build_dataset(3, 3, 3)) as server:
+            status, headers, body = _request(server, "GET", PRODUCT_ENDPOINT)
+            assert status == 200 and len(json.loads(body)) == 3
+
+            assert _request(server, "GET", PRODUCT_ENDPOINT, {"If-None-Match": headers["ETag"]})[:3:2] == (304, b"")
+            assert _request(server, "GET", PRODUCT_ENDPOINT, {"If-None-Match": '"stale"'})[0] == 200
+
+    def test_requests_beyond_max_in_flight_are_429(self):
+        with MockStoreServer(build_dataset(3, 3, 3), max_in_flight = 1) as server:
+            assert server.admit() # a request still being served
+            try:
+                assert _request(server, "GET", CART_ENDPOINT)[0] == 429
+            finally:
+                server.leave()
+
+            assert _request(server, "GET", CART_ENDPOINT)[0] == 200
+            assert server.rejected == 1
+
+    def test_latency_specs(self):
+        assert parse_latency(["0.05:0.01", "/carts/:id=0.2:0.05", "/users=0.1"]) == {
+            "*": (0.05, 0.01), "/carts/:id": (0.2, 0.05), "/users": (0.1, 0.0),
+        }
+        assert parse_latency(None) == {}
@@ -0,0 +1,32 @@
+from utility.payload_matrix import MatrixResult, build_matrix, failure_message, render_table
+
+class TestPayloadMatrix:
+
+    def test_matrix_covers_single_defects_and_pairs(self):
+        """ 3 defects per field, pairs only across distinct fields; the base payload is never modified. """
+
+        base = {"id": 7, "userId": 2, "date": "2020-03-01T00:00:00.000Z", "products": [{"productId": 1, "quantity": 1}]}
+        variants = build_matrix(base, ("id", "userId", "date", "products"), valid_status=201)
+        by_name = {variant.name: variant for variant in variants}
+
+        assert len(variants) == 1 + 4 * 3 + 6 * 3 * 3
+        assert by_name["valid"].payload == base and by_name["valid"].expected_status == 201
+        assert "id" not in by_name["missing:id"].payload
+        assert by_name["empty:products"].payload["products"] == []
+        assert by_name["empty:userId"].payload["userId"] is None
+        assert by_name["wrong_type:id"].payload["id"] == "1"
+        assert by_name["missing:date + wrong_type:products"].payload.keys() == {"id", "userId", "products"}
+        assert all(variant.expected_status == 400 for variant in variants[1:])
+        assert base["products"] == [{"productId": 1, "quantity": 1}]
+
+    def test_table_marks_failed_variants(self):
+        table = render_table([MatrixResult("valid", 200, 200), MatrixResult("missing:id", 400, 200)])
+
+        assert table.splitlines()[2].endswith("200")
+        assert table.splitlines()[3].endswith("<-- FAIL")
+
+    def test_failure_message_names_every_failed_variant(self):
+        results = [MatrixResult("valid", 200, 200), MatrixResult("missing:id", 400, 200), MatrixResult("empty:date", 400, 500)]
+
+        assert failure_message(results).splitlines()[:3] == ["2 of 3 variants failed:", "  missing:id", "  empty:date"]
+        assert failure_message(results[:1]) == ""
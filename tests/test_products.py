@@ -1,7 +1,10 @@
-from collections import Counter
-from tests.conftest import validate_id_consistency, validate_unique_identifier
+import pytest
+from tests.conftest import validate_id_consistency
+from utility.columns import ProductColumns, duplicate_ids
+from utility.schema import PRODUCT_VALIDATOR
 from utility.settings import PRODUCT_CATEGORIES
 
+@pytest.mark.data("products")
 class TestProducts:
 
     def test_get_all_categories(self):
@@ -14,41 +17,44 @@ class TestProducts:
     def test_product_price_validity(self):
         """ Check type and value -> positive float or integer """
 
-        invalid_prod = []
-        for product in self._get_re_json_of_all_products():
-            prod_id = product.get("id")
-            price = product.get("price")
-
-            if not isinstance(price, (float, int)) or float(price) <= 0:
-                invalid_prod.append(prod_id, price)
-
+        invalid_prod = self._columns_of_all_products().invalid_prices()
         self.logger.info(f"Invalid product prices found: {invalid_prod}")
         assert not invalid_prod
 
     def test_unique_product_id(self):
         """ Get all products that their ID are not unique """        
 
-        json = self._get_re_json_of_all_products()
-        duplicated_prod = validate_unique_identifier(json, "id", "title")
+        products = self._columns_of_all_products()
+        duplicated_prod = duplicate_ids(products.ids, products.titles)
         self.logger.info(f"Duplicate product IDs found: {duplicated_prod}")
         assert not duplicated_prod
 
-    def test_single_product_consistency(self):
+    def test_single_product_consistency(self, collection_snapshot):
         """ Ensure /products/:id returns the same as found in /products. """
         
         json_all_products = self._get_re_json_of_all_products()
-        failures = validate_id_consistency(json_all_products, self._get_re_json_for_product)
+        failures = validate_id_consistency(
+            json_all_products, bulk_identifier_function=self._get_re_json_for_products,
+            snapshot=collection_snapshot, resource="products",
+        )
         self.logger.info(f"Product mismatches found: {"\n".join(failures)}")
         assert not failures
 
     def test_category_coverage(self):
         """ Ensure every category has at least one product """
         
-        counts = Counter(prod.get("category") for prod in self._get_re_json_of_all_products())
-        failures = [cat for cat, count in counts.items() if count == 0]
-        self.logger.info(f"Empty categories found: {failures}")
+        products = self._columns_of_all_products()
+        failures = products.missing_categories(PRODUCT_CATEGORIES)
+        self.logger.info(f"Products per category: {dict(products.category_counts())}; empty categories: {failures}")
         assert not failures
 
+    def test_products_match_schema(self):
+        """ Every field rule of a product, all products checked in one pass over the stream. """
+
+        violations = PRODUCT_VALIDATOR.validate_all(self._iter_all_products())
+        self.logger.info(f"Products violating the schema: {violations}")
+        assert not violations
+
     # --- Helpers ---
 
     def _get_re_json_of_all_products(self) -> list:
@@ -56,8 +62,18 @@ class TestProducts:
         assert re.status == 200
         return re.json()
     
-    def _get_re_json_for_product(self, id: int) -> list:
-        re = self.client.get_products_by_id(id)
+    def _iter_all_products(self):
+        """ Stream of products, decoded one entry at a time """
+        re = self.client.get_all_products()
         assert re.status == 200
-        return re.json()
+        return self.client.iter_json(re)
+
+    def _columns_of_all_products(self) -> ProductColumns:
+        return ProductColumns.load(self._iter_all_products())
+
+    def _get_re_json_for_products(self, ids: list) -> list:
+        results = self.client.get_products_by_ids(ids)
+        failed = [(id, status) for id, (status, _) in zip(ids, results) if status != 200]
+        assert not failed, f"GET /products/:id did not return 200 for (id, status): {failed}"
+        return [json for _, json in results]
     
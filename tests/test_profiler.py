@@ -0,0 +1,76 @@
+import cProfile
+import marshal
+from utility.profiler import CallProfiler, ProfiledContext, SlowestProfiles, profiled, prune_dumps
+
+class _Clock:
+    """ Seconds that pass only when a fake advances them """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class _Response:
+    def __init__(self, clock: _Clock):
+        self.clock = clock
+
+    def json(self):
+        self.clock.now += 2
+        return []
+
+class _Context:
+    def __init__(self, clock: _Clock):
+        self.clock = clock
+
+    def get(self, url: str, **kwargs):
+        self.clock.now += 3
+        return _Response(self.clock)
+
+class TestProfiler:
+
+    def test_nested_timers_charge_each_category_only_its_own_time(self):
+        clock = _Clock()
+        profiler = CallProfiler(clock).activate()
+        profiler.current_test = "t"
+        context = ProfiledContext(_Context(clock), profiler)
+
+        @profiled("validation")
+        def validate():
+            clock.now += 1
+            context.get("/carts").json()
+            clock.now += 4
+
+        try:
+            validate()
+        finally:
+            profiler.deactivate()
+        profiler.add_duration("t", 12)
+
+        assert profiler.slowest(1) == [("t", {"network": 3, "json": 2, "validation": 5, "total": 12, "other": 2})]
+
+    def test_profiled_functions_run_untimed_when_profiling_is_off(self):
+        profiler = CallProfiler().activate()
+        profiler.deactivate()
+        profiled("network")(lambda: None)()
+
+        assert not profiler.tests
+
+    def test_only_the_slowest_profiles_are_dumped(self, tmp_path):
+        profiles = SlowestProfiles(2)
+        for test, seconds in (("tests/a.py::test_a", 0.3), ("tests/b.py::test_b[1]", 0.1), ("tests/c.py::test_c", 0.2)):
+            # Never enabled: a run under --profile-dump already has a profiler on this thread
+            profiles.stop(test, cProfile.Profile(), seconds)
+
+        paths = profiles.dump(tmp_path)
+
+        assert [path.name for path in paths] == ["tests_a.py__test_a.prof", "tests_c.py__test_c.prof"]
+        assert marshal.loads(paths[0].read_bytes()) == {} # pstats format, empty as the profile never ran
+
+    def test_pruning_keeps_only_the_slowest_of_the_run(self, tmp_path):
+        for name in ("tests_a.py__test_a.prof", "tests_b.py__test_b.prof", "breakdown.json"):
+            (tmp_path / name).write_bytes(b"")
+
+        prune_dumps(tmp_path, ["tests/a.py::test_a"])
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["breakdown.json", "tests_a.py__test_a.prof"]
@@ -0,0 +1,76 @@
+import random
+from tests.conftest import build_reference_index, find_invalid_references
+
+class TestReferenceIndex:
+
+    def test_index_on_top_level_and_nested_fields(self):
+        """ Each cart is listed once per referenced id, in cart order. """
+
+        carts = [
+            {"id": 1, "userId": 1, "products": [{"productId": 1, "quantity": 1}, {"productId": 1, "quantity": 2}]},
+            {"id": 2, "userId": 9, "products": [{"productId": 3, "quantity": 1}]},
+            {"id": 3, "userId": 9, "products": []},
+        ]
+
+        assert build_reference_index(carts, "userId") == {1: [1], 9: [2, 3]}
+        assert build_reference_index(carts, "productId", "products") == {1: [1], 3: [2]}
+        assert find_invalid_references(build_reference_index(carts, "userId"), {1}) == {9: [2, 3]}
+
+    def test_index_reads_every_cart_line_a_bounded_number_of_times(self):
+        """ Linear, counted rather than timed: each entry and line is read a few times, each referenced id looked up once. """
+
+        cart_count, product_count = 2_000, 500
+        reads = [0]
+        carts = [_CountingDict(reads, cart, products = [_CountingDict(reads, line) for line in cart["products"]])
+                 for cart in self._synthetic_carts(cart_count, product_count)]
+        line_count = sum(len(cart["products"]) for cart in carts)
+        valid_ids = _CountingSet(range(1, product_count - 50 + 1))
+
+        reads[0] = 0
+        invalid = find_invalid_references(build_reference_index(carts, "productId", "products"), valid_ids)
+
+        assert set(invalid) <= set(range(product_count - 50 + 1, product_count + 1))
+        assert reads[0] <= 4 * (cart_count + line_count), "Building the reference index should be linear in the number of cart lines"
+        assert valid_ids.lookups == len(build_reference_index(carts, "productId", "products"))
+
+    # --- Helpers ---
+
+    def _synthetic_carts(self, cart_count: int, product_count: int) -> list:
+        rng = random.Random(42)
+        return [
+            {
+                "id": cart_id,
+                "userId": rng.randint(1, 1_000),
+                "products": [
+                    {"productId": rng.randint(1, product_count), "quantity": rng.randint(1, 5)}
+                    for _ in range(rng.randint(1, 5))
+                ],
+            }
+            for cart_id in range(1, cart_count + 1)
+        ]
+
+class _CountingDict(dict):
+    """ Entry that counts every read of a field into a shared counter """
+
+    def __init__(self, reads: list, entry: dict, **fields):
+        super().__init__(entry, **fields)
+        self.reads = reads
+
+    def __getitem__(self, key):
+        self.reads[0] += 1
+        return super().__getitem__(key)
+
+    def __contains__(self, key) -> bool:
+        self.reads[0] += 1
+        return super().__contains__(key)
+
+    def get(self, key, default = None):
+        self.reads[0] += 1
+        return super().get(key, default)
+
+class _CountingSet(set):
+    lookups = 0
+
+    def __contains__(self, item) -> bool:
+        self.lookups += 1
+        return super().__contains__(item)
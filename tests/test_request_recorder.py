@@ -0,0 +1,58 @@
+from typing import NamedTuple
+from utility.request_recorder import RequestRecorder, render_html_summary
+
+class _Response(NamedTuple):
+    status: int
+    headers: dict
+
+    def body(self):
+        raise AssertionError("the recorder must not pull the body")
+
+def _recorder() -> RequestRecorder:
+    """ Two tests: 4 product lookups between 5 and 300 ms, then a chunked collection and a failed login """
+    recorder = RequestRecorder()
+    recorder.current_test = "tests/test_products.py::test_a"
+    for elapsed in (0.005, 0.02, 0.04, 0.3):
+        recorder.record("GET", "/products/3", _Response(200, {"content-length": "100"}), elapsed)
+
+    recorder.current_test = "tests/test_users.py::test_b"
+    recorder.record("GET", "/users", _Response(200, {}), 0.5)
+    recorder.record("POST", "/auth/login", _Response(401, {"content-length": "40"}), 0.012)
+    return recorder
+
+class TestRequestRecorder:
+
+    def test_chunked_responses_are_recorded_without_a_size(self):
+        records = _recorder().records
+
+        assert [record.size for record in records] == [100, 100, 100, 100, None, 40]
+        assert [record.endpoint for record in records][-3:] == ["/products/:id", "/users", "/auth/login"]
+
+    def test_calls_are_aggregated_per_endpoint_and_per_test(self):
+        recorder = _recorder()
+
+        endpoints = recorder.by_endpoint()
+        assert list(endpoints) == [("GET", "/products/:id"), ("GET", "/users"), ("POST", "/auth/login")]
+        products = endpoints[("GET", "/products/:id")]
+        assert products["requests"] == 4 and products["bytes"] == 400 and products["statuses"] == {200: 4}
+        # Buckets of at most 10, 25, 50, 100, 250, 500, 1000, 2500 ms and more
+        assert products["histogram"] == [1, 1, 1, 0, 0, 1, 0, 0, 0]
+        assert endpoints[("GET", "/users")]["bytes"] == 0
+
+        tests = recorder.by_test()
+        assert tests["tests/test_products.py::test_a"]["requests"] == 4
+        assert tests["tests/test_users.py::test_b"]["elapsed"] == 0.512
+        assert list(tests["tests/test_users.py::test_b"]["endpoints"]) == ["GET /users", "POST /auth/login"]
+
+    def test_html_summary_lists_the_slowest_calls_first(self):
+        slowest, _, endpoints, _, per_test = render_html_summary(_recorder(), slowest = 2)[1:]
+
+        rows = slowest.split("<tr>")[2:]
+        assert len(rows) == 2
+        assert "<td>/users</td><td>200</td><td>500.0</td><td>-</td>" in rows[0]
+        assert "<td>/products/:id</td><td>200</td><td>300.0</td><td>100</td>" in rows[1]
+        assert "<th>≤10 ms</th>" in endpoints and "<td>401×1</td>" in endpoints
+        assert per_test.index("test_b") < per_test.index("test_a")
+
+    def test_nothing_is_rendered_without_records(self):
+        assert render_html_summary(RequestRecorder()) == []
@@ -0,0 +1,34 @@
+import time
+from typing import NamedTuple
+from utility.response_cache import ResponseCache
+
+class _Response(NamedTuple):
+    body: str
+    ok: bool = True
+
+class TestResponseCache:
+
+    def test_entries_expire_after_the_ttl(self):
+        cache = ResponseCache(ttl = 0.05)
+        cache.put("/carts", _Response("carts"))
+
+        assert cache.get("/carts").body == "carts"
+        time.sleep(0.06)
+        assert cache.get("/carts") is None
+        assert cache.stats() == {"hits": 1, "misses": 1, "invalidations": 0, "entries": 0}
+
+    def test_only_ok_responses_are_cached(self):
+        cache = ResponseCache(ttl = 60)
+        cache.put("/carts/999", _Response("not found", ok = False))
+
+        assert cache.get("/carts/999") is None
+
+    def test_a_write_drops_the_collection_and_its_entries(self):
+        cache = ResponseCache(ttl = 60)
+        for url in ("/carts", "/carts/5", "/carts/6?x=1", "/users", "/users/5"):
+            cache.put(url, _Response(url))
+
+        cache.invalidate("/carts/5")
+
+        assert [url for url in ("/carts", "/carts/5", "/carts/6?x=1", "/users", "/users/5") if cache.get(url)] == ["/users", "/users/5"]
+        assert cache.stats()["invalidations"] == 3
@@ -0,0 +1,53 @@
+import math
+import pytest
+from utility.schema import CART_VALIDATOR, NUMBER, PRODUCT_VALIDATOR, USER_VALIDATOR, Field, Schema, compile_schema
+
+class TestSchema:
+
+    def test_one_pass_reports_every_violation_with_its_id(self):
+        products = [
+            {"id": 1, "title": "Bag", "price": 9.5, "description": "", "category": "jewelery", "image": "1.jpg"},
+            {"id": 2, "title": "", "price": math.nan, "description": "", "category": "toys", "image": "2.jpg"},
+            {"id": 1, "title": "Cap", "price": True, "category": "jewelery", "image": "3.jpg"},
+        ]
+
+        assert PRODUCT_VALIDATOR.validate_all(iter(products)) == [
+            (2, ["title: empty", "price: not positive: nan", "category: unexpected: 'toys'"]),
+            (1, ["id: duplicate: 1", "price: expected int or float, got bool", "description: missing"]),
+        ]
+
+    def test_nested_lines_and_patterns(self):
+        cart = {"id": 3, "userId": 1, "date": "2020-03-01", "products": [{"productId": 4, "quantity": 0}, [], {"quantity": "1"}]}
+        user = {"id": 5, "username": "kate", "email": "kate.example.com", "password": "x"}
+
+        assert CART_VALIDATOR.validate(cart) == [
+            "products[1]: expected an object",
+            "products[2].productId: missing",
+            "products[2].quantity: expected int or float, got str",
+            "products: no element with a positive quantity",
+        ]
+        assert USER_VALIDATOR.validate(user) == ["email: malformed: 'kate.example.com'"]
+        assert CART_VALIDATOR.schema.required == ("id", "userId", "date", "products")
+
+    def test_unique_list_elements_are_rejected(self):
+        line = Schema("line", (Field("productId", int, unique = True),))
+
+        with pytest.raises(ValueError):
+            compile_schema(Schema("cart", (Field("products", list, items = line),)))
+
+    def test_field_names_are_not_read_as_code(self):
+        line = Schema("line", (Field("qty {n}", NUMBER),))
+        odd = Schema("odd", (
+            Field("it's", str),
+            Field('say "{hi}"', int, positive = True),
+            Field("back\\slash", str, non_empty = True),
+            Field("{lines}", list, items = line, some_positive = "qty {n}"),
+        ))
+
+        assert compile_schema(odd).validate({'say "{hi}"': -1, "back\\slash": "", "{lines}": [{}]}) == [
+            "it's: missing",
+            "say \"{hi}\": not positive: -1",
+            "back\\slash: empty",
+            "{lines}[0].qty {n}: missing",
+            "{lines}: no element with a positive qty {n}",
+        ]
@@ -0,0 +1,26 @@
+from utility.shared_store import SharedResponseStore
+from utility.stored_response import StoredResponse
+
+def _response(body: str, status: int = 200) -> StoredResponse:
+    return StoredResponse("", status, {"content-type": "application/json"}, body.encode())
+
+class TestSharedStore:
+
+    def test_snapshots_are_kept_per_server(self, tmp_path):
+        first, other = SharedResponseStore(tmp_path, "http://a"), SharedResponseStore(tmp_path, "http://b")
+
+        assert first.get_or_fetch("/carts", lambda: _response("[1]")).json() == [1]
+        assert first.get_or_fetch("/carts", lambda: _response("[2]")).json() == [1]
+        assert other.get_or_fetch("/carts", lambda: _response("[3]")).json() == [3]
+
+    def test_a_write_drops_every_snapshot_of_its_resource(self, tmp_path):
+        writer, reader = SharedResponseStore(tmp_path, "http://a"), SharedResponseStore(tmp_path, "http://a")
+        for url in ("/carts", "/carts?limit=1", "/users"):
+            writer.get_or_fetch(url, lambda: _response("[1]"))
+
+        writer.invalidate("/carts/5")
+
+        assert reader.get_or_fetch("/carts", lambda: _response("[2]")).json() == [2]
+        assert reader.get_or_fetch("/carts?limit=1", lambda: _response("[2]")).json() == [2]
+        assert reader.get_or_fetch("/users", lambda: _response("[2]")).json() == [1]
+        assert writer.stats()["invalidated"] == 2
@@ -0,0 +1,51 @@
+import asyncio
+import time
+from typing import NamedTuple
+from utility.single_flight import SingleFlight
+
+class _Response(NamedTuple):
+    body: str
+    ok: bool = True
+
+class TestSingleFlight:
+
+    def test_concurrent_gets_share_the_request_in_flight(self, async_runner):
+        """ Ten concurrent identical GETs cost one request, even with no window after it. """
+
+        single_flight = SingleFlight(window = 0)
+        calls = []
+
+        async def fetch():
+            calls.append("/carts")
+            await asyncio.sleep(0.05)
+            return _Response(f"response {len(calls)}")
+
+        async def main():
+            return await asyncio.gather(*(single_flight.do_async("/carts", fetch) for _ in range(10)))
+
+        # Not asyncio.run(): once sync Playwright has started, the main thread already runs a loop
+        assert async_runner.run(main()) == [_Response("response 1")] * 10
+        assert single_flight.stats() == {"issued": 1, "coalesced": 9}
+        assert not single_flight._recent # nothing is kept once the request is done
+
+    def test_window_ends_on_expiry_or_write(self):
+        single_flight = SingleFlight(window = 60)
+        responses = iter(_Response(body) for body in ("first", "second", "third"))
+
+        assert single_flight.do("/carts", lambda: next(responses)).body == "first"
+        assert single_flight.do("/carts", lambda: next(responses)).body == "first"
+        assert single_flight.do("/users", lambda: next(responses)).body == "second"
+
+        single_flight.forget("/carts/5")
+        assert single_flight.do("/carts", lambda: next(responses)).body == "third"
+        assert single_flight.stats() == {"issued": 3, "coalesced": 1}
+
+    def test_failed_and_expired_responses_are_not_kept(self):
+        single_flight = SingleFlight(window = 0.05)
+
+        single_flight.do("/carts/1", lambda: _Response("not found", ok = False))
+        assert single_flight.do("/carts/1", lambda: _Response("found")).body == "found"
+
+        time.sleep(0.06)
+        single_flight.do("/carts/2", lambda: _Response("found"))
+        assert list(single_flight._recent) == ["/carts/2"] # /carts/1 expired and was evicted
@@ -0,0 +1,40 @@
+from tests.conftest import validate_id_consistency
+from utility.snapshot_store import SnapshotStore
+
+class TestSnapshotStore:
+
+    def test_only_changed_entries_are_looked_up(self, tmp_path):
+        """ A second run looks up new and edited entries only; failures are looked up again. """
+
+        path = tmp_path / "snapshot.json"
+        products = [{"id": id, "title": f"product {id}", "price": id * 1.5} for id in range(1, 6)]
+        broken = {3}
+        looked_up = []
+
+        def lookup(ids):
+            looked_up.append(ids)
+            return [None if id in broken else products[id - 1] for id in ids]
+
+        first = SnapshotStore(path, "mock")
+        assert len(validate_id_consistency(products, bulk_identifier_function=lookup, snapshot=first, resource="products")) == 1
+        first.save()
+
+        products[0] = {**products[0], "price": 99.0}
+        products.append({"id": 6, "title": "product 6", "price": 9.0})
+        broken.clear()
+
+        second = SnapshotStore(path, "mock")
+        assert not validate_id_consistency(products, bulk_identifier_function=lookup, snapshot=second, resource="products")
+        assert looked_up[-1] == [1, 3, 6]
+        assert second.stats() == {"checked": 3, "skipped": 3}
+
+    def test_snapshots_are_kept_per_namespace(self, tmp_path):
+        path = tmp_path / "snapshot.json"
+        carts = [{"id": 1, "userId": 1, "products": []}]
+
+        store = SnapshotStore(path, "https://fakestoreapi.com")
+        store.mark_verified("carts", carts)
+        store.save()
+
+        assert SnapshotStore(path, "https://fakestoreapi.com").changed("carts", carts) == []
+        assert SnapshotStore(path, "http://127.0.0.1:8000").changed("carts", carts) == carts
@@ -0,0 +1,73 @@
+import asyncio
+import base64
+import json
+import time
+import pytest
+from utility.token_pool import TokenPool, TokenPoolError, credentials_of, token_lifetime
+
+class _LoginResponse:
+    def __init__(self, status: int, token: str = None):
+        self.status = status
+        self._token = token
+
+    async def json(self):
+        return {"token": self._token}
+
+class _AuthClient:
+    """ auth_a_user only: counts logins and issues a new token for each """
+
+    def __init__(self, refused: set = ()):
+        self.refused = refused
+        self.logins = 0
+
+    async def auth_a_user(self, payload: dict):
+        self.logins += 1
+        await asyncio.sleep(0.01)
+        if payload["username"] in self.refused:
+            return _LoginResponse(401)
+        return _LoginResponse(201, f"{payload['username']}-{self.logins}")
+
+class TestTokenPool:
+
+    def test_tokens_are_handed_out_round_robin_without_new_logins(self, async_runner):
+        client = _AuthClient(refused = {"mor_2314"})
+        credentials = credentials_of([
+            {"username": "john", "password": "a"}, {"username": "mor_2314", "password": "b"},
+            {"username": "kevin", "password": "c"}, {"id": 4},
+        ])
+
+        async def main():
+            pool = await TokenPool(client).fill(credentials, size = 3)
+            return [await pool.token() for _ in range(4)], pool.stats()
+
+        tokens, stats = async_runner.run(main())
+        assert [token.split("-")[0] for token in tokens] == ["john", "kevin", "john", "kevin"]
+        assert client.logins == 3
+        assert stats == {"users": 2, "logins": 3, "failed_logins": 1, "refreshes": 0, "handed_out": 4}
+
+    def test_expiring_tokens_are_refreshed_in_the_background(self, async_runner):
+        """ Concurrent callers of an expired token share one login; the refresher replaces tokens before expiry. """
+
+        client = _AuthClient()
+
+        async def main():
+            pool = await TokenPool(client, ttl = 0.2).fill({"john": "a"}, size = 1)
+            await asyncio.sleep(0.25)
+            expired = await asyncio.gather(*(pool.token() for _ in range(5)))
+
+            pool.start()
+            await asyncio.sleep(0.5)
+            await pool.close()
+            return expired, pool.stats()
+
+        expired, stats = async_runner.run(main())
+        assert set(expired) == {"john-2"}
+        assert stats["refreshes"] >= 2 and stats["failed_logins"] == 0
+
+    def test_empty_pool_and_jwt_expiry(self, async_runner):
+        with pytest.raises(TokenPoolError):
+            async_runner.run(TokenPool(_AuthClient(refused = {"john"})).fill({"john": "a"}, size = 1))
+
+        claims = base64.urlsafe_b64encode(json.dumps({"exp": time.time() + 60}).encode()).decode().rstrip("=")
+        assert 59 < token_lifetime(f"header.{claims}.signature", 300) <= 60
+        assert token_lifetime("not-a-jwt", 300) == 300
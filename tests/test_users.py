@@ -1,23 +1,33 @@
 import re
-from tests.conftest import validate_id_consistency, validate_unique_identifier
+from tests.conftest import validate_id_consistency
+from utility.columns import UserColumns, duplicate_ids
+from utility.payload_matrix import build_matrix, failure_message, render_table, run_matrix
+from utility.schema import USER_SCHEMA, USER_VALIDATOR
+from utility.settings import USER_ENDPOINT
 import pytest
 from random import choice
 
+@pytest.mark.data("users")
 class TestUsers:
+
+    REQUIRED_FIELDS = USER_SCHEMA.required
     
     def test_unique_user_id(self):
         """ Get all usernames that their ID are not unique """
 
-        json = self._get_re_json_of_all_users()
-        duplicated_uid = validate_unique_identifier(json, "id", "username")
+        users = self._columns_of_all_users()
+        duplicated_uid = duplicate_ids(users.ids, users.usernames)
         self.logger.info(f"Duplicate user IDs found: {duplicated_uid}")
         assert not duplicated_uid
     
-    def test_single_user_consistency(self):
+    def test_single_user_consistency(self, collection_snapshot):
         """ Ensure /users/:id returns the same user as found in /users. """
 
         json_all_users = self._get_re_json_of_all_users()
-        failures = validate_id_consistency(json_all_users, self._get_re_json_for_user)
+        failures = validate_id_consistency(
+            json_all_users, bulk_identifier_function=self._get_re_json_for_users,
+            snapshot=collection_snapshot, resource="users",
+        )
         self.logger.info(f"User mismatches found: {"\n".join(failures)}")
         assert not failures
 
@@ -27,46 +37,29 @@ class TestUsers:
         followed by one or more non-@ chars, a dot '.', and one or more non-@ chars.
         '''
         
-        json_data = self._get_re_json_of_all_users()
-        
         email_pattern = re.compile(r"^[^@]+@[^@]+\.[^@]+$")
-        invalid_pairs = []
-
-        for user in json_data:
-            user_id = user.get("id")
-            email = user.get("email", "")
-
-            if not email_pattern.match(email):
-                invalid_pairs.append((user_id, email))
-
+        invalid_pairs = self._columns_of_all_users().invalid_emails(email_pattern)
         self.logger.info(f"Invalid email formats found: {invalid_pairs}")
         assert not invalid_pairs
 
-    # --- Parameterized TCs---
+    def test_users_match_schema(self):
+        """ Every field rule of a user, all users checked in one pass over the stream. """
 
-    @pytest.mark.parametrize(
-        "missing_field, expected_status",
-        [
-            pytest.param(None, 201, id="all_fields_present"),
-            pytest.param("id", 400, id="missing_id"),
-            pytest.param("username", 400, id="missing_username"),
-            pytest.param("email", 400, id="missing_email"),
-            pytest.param("password", 400, id="missing_password"),
-        ]
-    )
-    def test_post_user(self, data_generator, missing_field, expected_status):
-        # Generate a valid payload
-        payload = data_generator.generate_user()
+        violations = USER_VALIDATOR.validate_all(self._iter_all_users())
+        self.logger.info(f"Users violating the schema: {violations}")
+        assert not violations
 
-        # Drop the field if testing a missing case
-        if missing_field:
-            payload.pop(missing_field, None)
+    # --- Parameterized TCs---
 
-        re = self.client.create_user(payload)
-        actual_status = re.status        
+    @pytest.mark.data(mutates=True)
+    def test_post_user(self, data_generator):
+        """ POST creates a valid user and returns 400 for every missing, empty or wrongly typed field and pair of them. """
 
-        self.logger.info(f"Actual: {actual_status}; Expect: {expected_status}; When missing {missing_field}")
-        assert actual_status == expected_status
+        variants = build_matrix(data_generator.generate_user(), self.REQUIRED_FIELDS, valid_status=201)
+
+        results = run_matrix(self.client, "post", USER_ENDPOINT, variants)
+        self.logger.info(f"POST user payload matrix:\n{render_table(results)}")
+        assert all(result.passed for result in results), failure_message(results)
 
 
         
@@ -84,28 +77,16 @@ class TestUsers:
 
         return uid, payload.copy()  # return a fresh copy for each test
     
-    @pytest.mark.parametrize(
-        "missing_field, expected_status",
-        [
-            pytest.param(None, 200, id="all_fields_present"),
-            pytest.param("id", 400, id="missing_id"),
-            pytest.param("username", 400, id="missing_username"),
-            pytest.param("email", 400, id="missing_email"),
-            pytest.param("password", 400, id="missing_password"),
-        ]
-    )
-    def test_update_user(self, _valid_uid_and_payload, missing_field, expected_status):
-        uid, payload = _valid_uid_and_payload
-
-        # Drop the field if testing a missing case
-        if missing_field:
-            payload.pop(missing_field, None)
+    @pytest.mark.data(mutates=True)
+    def test_update_user(self, _valid_uid_and_payload):
+        """ PUT succeeds for a valid user and returns 400 for every missing, empty or wrongly typed field and pair of them. """
 
-        re = self.client.update_user(uid, payload)
-        actual_status = re.status
+        uid, payload = _valid_uid_and_payload
+        variants = build_matrix(payload, self.REQUIRED_FIELDS, valid_status=200)
 
-        self.logger.info(f"Actual: {actual_status}; Expect: {expected_status}; When missing {missing_field}")
-        assert actual_status == expected_status
+        results = run_matrix(self.client, "put", f"{USER_ENDPOINT}/{uid}", variants)
+        self.logger.info(f"PUT user payload matrix:\n{render_table(results)}")
+        assert all(result.passed for result in results), failure_message(results)
 
 
 
@@ -116,6 +97,7 @@ class TestUsers:
             pytest.param("", 404, id="empty_uid"),
         ]
     )
+    @pytest.mark.data(mutates=True)
     def test_update_user_invalid_uid(self, data_generator, uid, expected_status):
         payload = data_generator.generate_user()
         re = self.client.update_user(uid, payload)
@@ -131,10 +113,20 @@ class TestUsers:
         assert re.status == 200
         return re.json()
     
-    def _get_re_json_for_user(self, id: int) -> list:
-        re = self.client.get_user_by_id(id)
+    def _iter_all_users(self):
+        """ Stream of users, decoded one entry at a time """
+        re = self.client.get_all_users()
         assert re.status == 200
-        return re.json()    
+        return self.client.iter_json(re)
+
+    def _columns_of_all_users(self) -> UserColumns:
+        return UserColumns.load(self._iter_all_users())
+
+    def _get_re_json_for_users(self, ids: list) -> list:
+        results = self.client.get_users_by_ids(ids)
+        failed = [(id, status) for id, (status, _) in zip(ids, results) if status != 200]
+        assert not failed, f"GET /users/:id did not return 200 for (id, status): {failed}"
+        return [json for _, json in results]    
 
 
 
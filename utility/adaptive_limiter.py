@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import deque
+
+# The latency baseline creeps up this much per sample, so a deployment that got slower for good is relearned
+BASELINE_DRIFT = 0.001
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on in-flight requests. Each completed request that was neither refused nor slow adds 1/limit,
+    so the limit grows by one per round of `limit` requests. An error (429, 5xx, transport) or a smoothed latency
+    beyond `tolerance` times the best one seen multiplies it by `backoff`, at most once per round.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, initial: int = None, backoff: float = 0.5,
+                 tolerance: float = 2.0, smoothing: float = 0.2):
+        self.max_limit = max(min_limit, max_limit)
+        self.min_limit = min_limit
+        self.limit = float(min(self.max_limit, initial or 4))
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+
+        self.smoothed = None # EWMA of request latency, seconds
+        self.baseline = None # lowest smoothed latency, slowly drifting up
+        self.samples = 0
+        self.increases = 0
+        self.decreases_on_error = 0
+        self.decreases_on_latency = 0
+        self.peak_limit = int(self.limit)
+        self.history = deque([(0, int(self.limit), "initial")], maxlen = 1000) # (samples, limit, reason)
+
+        self._in_flight = 0
+        self._cooldown = 0 # completions to wait before the next decrease
+        self._changed = asyncio.Condition()
+
+    # --- Slots ---
+
+    def slot(self) -> "_Slot":
+        """ async with limiter.slot() as slot: ...; set slot.failed for a refused request, exceptions count as failed """
+        return _Slot(self)
+
+    async def acquire(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+
+    async def release(self, latency: float, failed: bool):
+        self._observe(latency, failed)
+        async with self._changed:
+            self._in_flight -= 1
+            self._changed.notify_all()
+
+    # --- Decisions ---
+
+    def _observe(self, latency: float, failed: bool):
+        self.samples += 1
+        if self._cooldown > 0:
+            self._cooldown -= 1
+
+        if failed:
+            self._decrease("error")
+            return
+
+        self.smoothed = latency if self.smoothed is None else self.smoothed + self.smoothing * (latency - self.smoothed)
+        self.baseline = self.smoothed if self.baseline is None else min(self.smoothed, self.baseline * (1 + BASELINE_DRIFT))
+
+        if self.smoothed > self.baseline * self.tolerance:
+            self._decrease("latency")
+        elif self.limit < self.max_limit:
+            before = int(self.limit)
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if int(self.limit) > before:
+                self.increases += 1
+                self.peak_limit = max(self.peak_limit, int(self.limit))
+                self.history.append((self.samples, int(self.limit), "increase"))
+
+    def _decrease(self, reason: str):
+        # Requests already in flight when the limit dropped report the same congestion; count it once
+        if self._cooldown > 0 or self.limit <= self.min_limit:
+            return
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self._cooldown = self._in_flight - 1 # the request reporting this is still counted in
+        if reason == "error":
+            self.decreases_on_error += 1
+        else:
+            self.decreases_on_latency += 1
+        self.history.append((self.samples, int(self.limit), reason))
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit), "peak_limit": self.peak_limit, "samples": self.samples, "increases": self.increases,
+            "decreases_on_error": self.decreases_on_error, "decreases_on_latency": self.decreases_on_latency,
+        }
+
+class _Slot:
+    """ One in-flight request; its latency is measured from the moment the limiter let it through """
+
+    def __init__(self, limiter: AdaptiveLimiter):
+        self.failed = False
+        self._limiter = limiter
+        self._start = 0.0
+
+    async def __aenter__(self) -> "_Slot":
+        await self._limiter.acquire()
+        self._start = time.perf_counter()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        # A cancelled request says nothing about the server
+        failed = self.failed or (exc_type is not None and not issubclass(exc_type, asyncio.CancelledError))
+        await self._limiter.release(time.perf_counter() - self._start, failed)
@@ -1,82 +1,272 @@
-from playwright.sync_api import APIRequestContext
+import time
+from playwright.sync_api import APIRequestContext, Error as PlaywrightError
+from utility.cassette import Cassette
+from utility.client_config import ClientConfig, TransportStats
+from utility.conditional_store import ConditionalGetStore
+from utility.data_schedule import PrefetchPool
+from utility.fan_out import FanOutFetcher
+from utility.json_stream import iter_json_array
+from utility.request_recorder import RequestRecorder
+from utility.endpoints import is_collection
+from utility.response_cache import ResponseCache
+from utility.shared_store import SharedResponseStore
+from utility.single_flight import SingleFlight
 from utility.settings import *
 
 class APIClient:
         
-    def __init__(self, request_context: APIRequestContext, logger):
+    def __init__(self, request_context: APIRequestContext, logger, cache: ResponseCache = None,
+                 fan_out: FanOutFetcher = None, recorder: RequestRecorder = None,
+                 shared_store: SharedResponseStore = None, config: ClientConfig = None,
+                 stats: TransportStats = None, conditional: ConditionalGetStore = None,
+                 single_flight: SingleFlight = None, cassette: Cassette = None, prefetch: PrefetchPool = None):
         self._context = request_context
         self.logger = logger
+        self.config = config or ClientConfig()
+        self.stats = stats or TransportStats()
+        self.cache = cache # opt-in, see --api-cache-ttl
+        self.fan_out = fan_out # opt-in, see --id-concurrency
+        self.recorder = recorder
+        self.shared_store = shared_store # set under pytest-xdist
+        self.conditional = conditional # opt-in, see --conditional-get
+        self.single_flight = single_flight # opt-in, see --single-flight-window
+        self.cassette = cassette # opt-in, see --record-cassette / --replay-cassette
+        self.prefetch = prefetch # opt-in, see --data-schedule
 
     # --- Products ---
 
     def get_all_products(self):
         self.logger.info("GET All Products")
-        return self._context.get(PRODUCT_ENDPOINT)
+        return self._get(PRODUCT_ENDPOINT)
     
     def get_products_by_id(self, prod_id: int):
-        self.logger.info(f"GET product id: {prod_id}")
-        return self._context.get(f"{PRODUCT_ENDPOINT}/{prod_id}")
+        self.logger.info("GET product id: %s", prod_id)
+        return self._get(f"{PRODUCT_ENDPOINT}/{prod_id}")
+
+    def get_products_by_ids(self, prod_ids: list):
+        return self.get_many_by_id(PRODUCT_ENDPOINT, prod_ids)
     
     def create_products(self, payload: dict):
-        self.logger.info(f"POST product with keys: {list(payload.keys())}")
-        return self._context.post(PRODUCT_ENDPOINT, data = payload)
+        self.logger.info("POST product with keys: %s", list(payload))
+        return self._post(PRODUCT_ENDPOINT, payload)
     
     def update_products(self, prod_id: int, payload: dict):
-        self.logger.info(f"PUT product {prod_id} with keys: {list(payload.keys())}")
-        return self._context.put(f"{PRODUCT_ENDPOINT}/{prod_id}", data = payload)
+        self.logger.info("PUT product %s with keys: %s", prod_id, list(payload))
+        return self._put(f"{PRODUCT_ENDPOINT}/{prod_id}", payload)
     
     def delete_products(self, prod_id: int):
-        self.logger.info(f"DELETE product id: {prod_id}")
-        return self._context.delete(f"{PRODUCT_ENDPOINT}/{prod_id}")
+        self.logger.info("DELETE product id: %s", prod_id)
+        return self._delete(f"{PRODUCT_ENDPOINT}/{prod_id}")
 
     # --- Carts ---
 
     def get_all_cart(self):
         self.logger.info("GET All Carts")
-        return self._context.get(CART_ENDPOINT)
+        return self._get(CART_ENDPOINT)
     
     def get_cart_by_id(self, cart_id: int):
-        self.logger.info(f"GET cart id: {cart_id}")
-        return self._context.get(f"{CART_ENDPOINT}/{cart_id}")
+        self.logger.info("GET cart id: %s", cart_id)
+        return self._get(f"{CART_ENDPOINT}/{cart_id}")
+
+    def get_carts_by_ids(self, cart_ids: list):
+        return self.get_many_by_id(CART_ENDPOINT, cart_ids)
     
     def create_cart(self, payload: dict):
-        self.logger.info(f"POST cart with keys: {list(payload.keys())}")
-        return self._context.post(CART_ENDPOINT, data = payload)
+        self.logger.info("POST cart with keys: %s", list(payload))
+        return self._post(CART_ENDPOINT, payload)
     
     def update_cart(self, cart_id: int, payload: dict):
-        self.logger.info(f"PUT cart {cart_id} with keys: {list(payload.keys())}")
-        return self._context.put(f"{CART_ENDPOINT}/{cart_id}", data = payload)
+        self.logger.info("PUT cart %s with keys: %s", cart_id, list(payload))
+        return self._put(f"{CART_ENDPOINT}/{cart_id}", payload)
     
     def delete_cart(self, cart_id: int):
-        self.logger.info(f"DELETE cart id: {cart_id}")
-        return self._context.delete(f"{CART_ENDPOINT}/{cart_id}")
+        self.logger.info("DELETE cart id: %s", cart_id)
+        return self._delete(f"{CART_ENDPOINT}/{cart_id}")
 
     # --- Users ---
 
     def get_all_users(self):
         self.logger.info("GET All Users")
-        return self._context.get(USER_ENDPOINT)
+        return self._get(USER_ENDPOINT)
     
     def get_user_by_id(self, uid: int):
-        self.logger.info(f"GET user id: {uid}")
-        return self._context.get(f"{USER_ENDPOINT}/{uid}")
+        self.logger.info("GET user id: %s", uid)
+        return self._get(f"{USER_ENDPOINT}/{uid}")
+
+    def get_users_by_ids(self, uids: list):
+        return self.get_many_by_id(USER_ENDPOINT, uids)
     
     def create_user(self, payload: dict):
-        self.logger.info(f"POST user with keys: {list(payload.keys())}")
-        return self._context.post(USER_ENDPOINT, data = payload)
+        self.logger.info("POST user with keys: %s", list(payload))
+        return self._post(USER_ENDPOINT, payload)
     
     def update_user(self, uid: int, payload: dict):
-        self.logger.info(f"PUT user {uid} with keys: {list(payload.keys())}")
-        return self._context.put(f"{USER_ENDPOINT}/{uid}", data = payload)
+        self.logger.info("PUT user %s with keys: %s", uid, list(payload))
+        return self._put(f"{USER_ENDPOINT}/{uid}", payload)
     
     def delete_user(self, uid: int):
-        self.logger.info(f"DELETE user id: {uid}")
-        return self._context.delete(f"{USER_ENDPOINT}/{uid}")
+        self.logger.info("DELETE user id: %s", uid)
+        return self._delete(f"{USER_ENDPOINT}/{uid}")
 
     # --- Auth ---
 
     def auth_a_user(self, payload: dict):
-        self.logger.info(f"POST user with fields: {list(payload.values())}")
-        return self._context.post(AUTH_ENDPOINT, data = payload)
+        self.logger.info("POST login for user: %s", payload.get("username"))
+        return self._post(AUTH_ENDPOINT, payload)
+
+    # --- Bulk ---
+
+    def get_many_by_id(self, endpoint: str, ids: list) -> list:
+        """
+        GET endpoint/:id for every id and return (status, json) pairs in the order of ids.
+        Runs in parallel when a fan-out fetcher is configured, one by one otherwise.
+        """
+        if self.fan_out is not None:
+            return self.fan_out.get_many_by_id(endpoint, ids)
+
+        self.logger.info("GET %s entries of %s sequentially", len(ids), endpoint)
+        return [self._status_and_json(self._get(f"{endpoint}/{id}")) for id in ids]
+
+    def send_many(self, calls: list) -> list:
+        """
+        Send (method, url, payload) calls, method being "post" or "put", and return their statuses in order.
+        Runs in parallel when a fan-out fetcher is configured, one by one otherwise.
+        """
+        if self.fan_out is not None:
+            statuses = self.fan_out.send_many(calls)
+            # The async client does not share the cache, single-flight or prefetch pool of this one
+            for url in {url for _, url, _ in calls}:
+                self._invalidate(url)
+            return statuses
+
+        self.logger.info("Sending %s requests sequentially", len(calls))
+        return [getattr(self, f"_{method}")(url, payload).status for method, url, payload in calls]
+
+    # --- Prefetch ---
+
+    def prefetch_collection(self, url: str):
+        """ GET a collection now and serve it from the prefetch pool until it is released """
+        self.logger.info("Prefetch %s", url)
+        self.prefetch.pin(url, self._get(url))
+
+    def release_collection(self, url: str):
+        """ Let go of a prefetched collection; without a cache or single-flight nothing else holds it """
+        response = self.prefetch.release(url)
+        if response is not None and self.cache is None and self.single_flight is None:
+            response.dispose() # frees the body held by the Playwright driver
+
+    # --- Streaming ---
+
+    @staticmethod
+    def iter_json(response):
+        """ Entries of a collection response one at a time; unlike response.json() the list is never built. """
+        return iter_json_array(response.text())
+
+    # --- Transport ---
+
+    def _get(self, url: str):
+        if self.prefetch is not None:
+            prefetched = self.prefetch.get(url)
+            if prefetched is not None:
+                return prefetched
+
+        if self.cache is not None:
+            cached = self.cache.get(url)
+            if cached is not None:
+                self.logger.info("Cache hit: %s", url)
+                return cached
+
+        if self.single_flight is not None:
+            response = self.single_flight.do(url, lambda: self._fetch_shared(url))
+        else:
+            response = self._fetch_shared(url)
+
+        if self.cache is not None:
+            self.cache.put(url, response)
+        return response
+
+    def _fetch_shared(self, url: str):
+        if self.shared_store is not None and is_collection(url):
+            return self.shared_store.get_or_fetch(url, lambda: self._fetch(url))
+        return self._fetch(url)
+
+    def _fetch(self, url: str):
+        """ GET over the wire, revalidating the stored copy when conditional GETs are enabled """
+        if self.conditional is None:
+            return self._send("get", url)
+
+        response = self.conditional.resolve(url, self._send("get", url, headers = self.conditional.request_headers(url)))
+        if response is None: # 304 without a stored body to serve
+            response = self.conditional.resolve(url, self._send("get", url))
+        return response
+
+    def _post(self, url: str, payload: dict):
+        response = self._send("post", url, data = payload)
+        self._invalidate(url)
+        return response
+
+    def _put(self, url: str, payload: dict):
+        response = self._send("put", url, data = payload)
+        self._invalidate(url)
+        return response
+
+    def _delete(self, url: str):
+        response = self._send("delete", url)
+        self._invalidate(url)
+        return response
+
+    def _send(self, method: str, url: str, **kwargs):
+        """ Every request goes through here, so a cassette sees every request and response. """
+        if self.cassette is None:
+            return self._transmit(method, url, **kwargs)
+
+        if self.cassette.replaying:
+            return self.cassette.play(method, url, kwargs.get("data"))
+
+        response = self._transmit(method, url, **kwargs)
+        self.cassette.record(method, url, kwargs.get("data"), response)
+        return response
+
+    def _transmit(self, method: str, url: str, **kwargs):
+        """ Timed round-trip; idempotent GETs are retried with backoff. """
+        attempts = 1 + (self.config.retries if method == "get" else 0)
+
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            self.stats.requests_sent += 1
+            start = time.perf_counter()
+            try:
+                response = getattr(self._context, method)(url, timeout = self.config.timeout_ms(), **kwargs)
+            except PlaywrightError as error:
+                if last_attempt:
+                    raise
+                self._wait_before_retry(attempt, url, error)
+                continue
+
+            if self.recorder is not None:
+                self.recorder.record(method.upper(), url, response, time.perf_counter() - start)
+
+            if response.status not in self.config.retry_statuses or last_attempt:
+                return response
+            self._wait_before_retry(attempt, url, response.status)
+
+    def _wait_before_retry(self, attempt: int, url: str, reason):
+        delay = self.config.backoff_delay(attempt)
+        self.stats.retries += 1
+        self.logger.info("Retrying GET %s in %.2fs after: %s", url, delay, reason)
+        time.sleep(delay)
 
+    @staticmethod
+    def _status_and_json(response) -> tuple:
+        return response.status, response.json() if response.ok else None
 
+    def _invalidate(self, url: str):
+        """ Writes make any cached GET of the same resource stale. """
+        if self.cache is not None:
+            self.cache.invalidate(url)
+        if self.single_flight is not None:
+            self.single_flight.forget(url)
+        if self.prefetch is not None:
+            self.prefetch.invalidate(url)
+        if self.shared_store is not None:
+            self.shared_store.invalidate(url)
@@ -0,0 +1,197 @@
+import asyncio
+import contextlib
+import time
+from playwright.async_api import APIRequestContext, Error as PlaywrightError
+from utility.adaptive_limiter import AdaptiveLimiter
+from utility.client_config import ClientConfig, TransportStats
+from utility.async_runner import gather_limited
+from utility.request_recorder import RequestRecorder
+from utility.single_flight import SingleFlight
+from utility.token_pool import TokenPool
+from utility.settings import *
+
+class AsyncAPIClient:
+    """ Mirror of APIClient on playwright.async_api, so many requests can be in flight at once. """
+
+    def __init__(self, request_context: APIRequestContext, logger, recorder: RequestRecorder = None,
+                 config: ClientConfig = None, stats: TransportStats = None, single_flight: SingleFlight = None,
+                 token_pool: TokenPool = None, limiter: AdaptiveLimiter = None):
+        self._context = request_context
+        self.logger = logger
+        self.recorder = recorder
+        self.config = config or ClientConfig()
+        self.stats = stats or TransportStats()
+        self.single_flight = single_flight
+        self.token_pool = token_pool # TokenPool whose bearer tokens are sent with every request but logins
+        self.limiter = limiter # opt-in, see --adaptive-concurrency
+        self._connections = asyncio.Semaphore(self.config.max_connections)
+
+    # --- Products ---
+
+    async def get_all_products(self):
+        self.logger.info("GET All Products")
+        return await self._get(PRODUCT_ENDPOINT)
+
+    async def get_products_by_id(self, prod_id: int):
+        self.logger.info("GET product id: %s", prod_id)
+        return await self._get(f"{PRODUCT_ENDPOINT}/{prod_id}")
+
+    async def get_products_by_ids(self, prod_ids: list, concurrency: int):
+        return await self.get_many_by_id(PRODUCT_ENDPOINT, prod_ids, concurrency)
+
+    async def create_products(self, payload: dict):
+        self.logger.info("POST product with keys: %s", list(payload))
+        return await self._post(PRODUCT_ENDPOINT, payload)
+
+    async def update_products(self, prod_id: int, payload: dict):
+        self.logger.info("PUT product %s with keys: %s", prod_id, list(payload))
+        return await self._put(f"{PRODUCT_ENDPOINT}/{prod_id}", payload)
+
+    async def delete_products(self, prod_id: int):
+        self.logger.info("DELETE product id: %s", prod_id)
+        return await self._delete(f"{PRODUCT_ENDPOINT}/{prod_id}")
+
+    # --- Carts ---
+
+    async def get_all_cart(self):
+        self.logger.info("GET All Carts")
+        return await self._get(CART_ENDPOINT)
+
+    async def get_cart_by_id(self, cart_id: int):
+        self.logger.info("GET cart id: %s", cart_id)
+        return await self._get(f"{CART_ENDPOINT}/{cart_id}")
+
+    async def get_carts_by_ids(self, cart_ids: list, concurrency: int):
+        return await self.get_many_by_id(CART_ENDPOINT, cart_ids, concurrency)
+
+    async def create_cart(self, payload: dict):
+        self.logger.info("POST cart with keys: %s", list(payload))
+        return await self._post(CART_ENDPOINT, payload)
+
+    async def update_cart(self, cart_id: int, payload: dict):
+        self.logger.info("PUT cart %s with keys: %s", cart_id, list(payload))
+        return await self._put(f"{CART_ENDPOINT}/{cart_id}", payload)
+
+    async def delete_cart(self, cart_id: int):
+        self.logger.info("DELETE cart id: %s", cart_id)
+        return await self._delete(f"{CART_ENDPOINT}/{cart_id}")
+
+    # --- Users ---
+
+    async def get_all_users(self):
+        self.logger.info("GET All Users")
+        return await self._get(USER_ENDPOINT)
+
+    async def get_user_by_id(self, uid: int):
+        self.logger.info("GET user id: %s", uid)
+        return await self._get(f"{USER_ENDPOINT}/{uid}")
+
+    async def get_users_by_ids(self, uids: list, concurrency: int):
+        return await self.get_many_by_id(USER_ENDPOINT, uids, concurrency)
+
+    async def create_user(self, payload: dict):
+        self.logger.info("POST user with keys: %s", list(payload))
+        return await self._post(USER_ENDPOINT, payload)
+
+    async def update_user(self, uid: int, payload: dict):
+        self.logger.info("PUT user %s with keys: %s", uid, list(payload))
+        return await self._put(f"{USER_ENDPOINT}/{uid}", payload)
+
+    async def delete_user(self, uid: int):
+        self.logger.info("DELETE user id: %s", uid)
+        return await self._delete(f"{USER_ENDPOINT}/{uid}")
+
+    # --- Auth ---
+
+    async def auth_a_user(self, payload: dict):
+        self.logger.info("POST login for user: %s", payload.get("username"))
+        return await self._post(AUTH_ENDPOINT, payload)
+
+    # --- Bulk ---
+
+    async def get_many_by_id(self, endpoint: str, ids: list, concurrency: int) -> list:
+        """ GET endpoint/:id for every id with at most `concurrency` in flight; (status, json) pairs in the order of ids. """
+        self.logger.info("GET %s entries of %s with concurrency %s", len(ids), endpoint, concurrency)
+        return await gather_limited(
+            (self._status_and_json(f"{endpoint}/{id}") for id in ids), concurrency
+        )
+
+    async def send_many(self, calls: list, concurrency: int) -> list:
+        """ (method, url, payload) POST/PUT calls with at most `concurrency` in flight; statuses in call order. """
+        self.logger.info("Sending %s requests with concurrency %s", len(calls), concurrency)
+        return await gather_limited(
+            (self._status_of(method, url, payload) for method, url, payload in calls), concurrency
+        )
+
+    # --- Transport ---
+
+    async def _get(self, url: str):
+        if self.single_flight is not None:
+            return await self.single_flight.do_async(url, lambda: self._send("get", url))
+        return await self._send("get", url)
+
+    async def _post(self, url: str, payload: dict):
+        return await self._write("post", url, data = payload)
+
+    async def _put(self, url: str, payload: dict):
+        return await self._write("put", url, data = payload)
+
+    async def _delete(self, url: str):
+        return await self._write("delete", url)
+
+    async def _write(self, method: str, url: str, **kwargs):
+        response = await self._send(method, url, **kwargs)
+        if self.single_flight is not None:
+            self.single_flight.forget(url)
+        return response
+
+    async def _send(self, method: str, url: str, **kwargs):
+        """ Same retry policy as APIClient._send; at most config.max_connections requests are in flight. """
+        attempts = 1 + (self.config.retries if method == "get" else 0)
+        if self.token_pool is not None and url != AUTH_ENDPOINT:
+            kwargs["headers"] = await self.token_pool.headers()
+
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            self.stats.requests_sent += 1
+            try:
+                async with self._slot() as slot, self._connections:
+                    start = time.perf_counter()
+                    response = await getattr(self._context, method)(url, timeout = self.config.timeout_ms(), **kwargs)
+                    elapsed = time.perf_counter() - start
+                    # Any 5xx means the deployment is struggling, even the ones not worth retrying
+                    slot.failed = response.status == 429 or response.status >= 500
+            except PlaywrightError as error:
+                if last_attempt:
+                    raise
+                await self._wait_before_retry(attempt, url, error)
+                continue
+
+            if self.recorder is not None:
+                self.recorder.record(method.upper(), url, response, elapsed)
+
+            if response.status not in self.config.retry_statuses or last_attempt:
+                return response
+            await self._wait_before_retry(attempt, url, response.status)
+
+    def _slot(self):
+        """ A place under the adaptive limit, or a stand-in that records nothing """
+        if self.limiter is not None:
+            return self.limiter.slot()
+        return contextlib.nullcontext(_UnlimitedSlot())
+
+    async def _wait_before_retry(self, attempt: int, url: str, reason):
+        delay = self.config.backoff_delay(attempt)
+        self.stats.retries += 1
+        self.logger.info("Retrying GET %s in %.2fs after: %s", url, delay, reason)
+        await asyncio.sleep(delay)
+
+    async def _status_of(self, method: str, url: str, payload: dict) -> int:
+        return (await getattr(self, f"_{method}")(url, payload)).status
+
+    async def _status_and_json(self, url: str) -> tuple:
+        response = await self._get(url)
+        return response.status, await response.json() if response.ok else None
+
+class _UnlimitedSlot:
+    failed = False
@@ -0,0 +1,36 @@
+import asyncio
+import threading
+
+class AsyncRunner:
+    """
+    Owns an event loop on a daemon thread so sync tests can drive async Playwright.
+    Keeping it off the main thread avoids clashing with the loop behind sync_playwright().
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-runner", daemon=True)
+        self._thread.start()
+
+    def run(self, coro):
+        """ Run a coroutine on the runner loop and block until it returns. """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def gather(self, coros, limit: int):
+        """ Sync shortcut for gather_limited(). """
+        return self.run(gather_limited(coros, limit))
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+async def gather_limited(coros, limit: int) -> list:
+    """ Await coroutines with at most `limit` running at once; results keep the input order. """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(bounded(coro) for coro in coros))
@@ -0,0 +1,241 @@
+"""
+Throughput and latency benchmark for the API client operations and the conftest validators.
+
+    python -m utility.benchmark --mock-server --concurrency 32 --requests 500 --output bench.json
+    python -m utility.benchmark --base-url https://staging.example --operations get_all_products,get_cart_by_id
+
+Results are written as JSON so runs of different commits can be compared side by side.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from playwright.async_api import async_playwright
+from utility.async_api_client import AsyncAPIClient
+from utility.async_runner import gather_limited
+from utility.client_config import ClientConfig
+from utility.columns import CartColumns, ProductColumns, UserColumns, duplicate_ids
+from utility.data_generator import DataGenerator
+from utility.metrics import summarize
+from utility.mock_server import MockStoreServer, build_dataset, parse_latency
+from utility.schema import CART_VALIDATOR, PRODUCT_VALIDATOR, USER_VALIDATOR
+from utility.settings import BASE_URL, DEFAULT_HEADERS, PRODUCT_CATEGORIES
+
+# --- Operations ---
+
+class OperationInputs:
+    """ Ids known to exist on the target plus a seeded payload generator """
+
+    def __init__(self, products: list, carts: list, users: list, seed: int):
+        self.generator = DataGenerator(seed)
+        self.random = self.generator.random
+        self.products = products
+        self.carts = carts
+        self.users = users
+        self._next_product_id = max((product["id"] for product in products), default = 0) + 1
+        self._next_cart_id = max((cart["id"] for cart in carts), default = 0) + 1
+
+    def product_id(self) -> int:
+        return self.random.choice(self.products)["id"]
+
+    def cart_id(self) -> int:
+        return self.random.choice(self.carts)["id"]
+
+    def user_id(self) -> int:
+        return self.random.choice(self.users)["id"]
+
+    def new_product(self) -> dict:
+        self._next_product_id += 1
+        return self.generator.generate_product(self._next_product_id)
+
+    def new_cart(self) -> dict:
+        self._next_cart_id += 1
+        return {**self.random.choice(self.carts), "id": self._next_cart_id}
+
+    def credentials(self) -> dict:
+        user = self.random.choice(self.users)
+        return {"username": user["username"], "password": user["password"]}
+
+OPERATIONS = {
+    "get_all_products": lambda client, inputs: client.get_all_products(),
+    "get_products_by_id": lambda client, inputs: client.get_products_by_id(inputs.product_id()),
+    "create_products": lambda client, inputs: client.create_products(inputs.new_product()),
+    "update_products": lambda client, inputs: client.update_products(inputs.product_id(), inputs.new_product()),
+    "delete_products": lambda client, inputs: client.delete_products(inputs.product_id()),
+    "get_all_cart": lambda client, inputs: client.get_all_cart(),
+    "get_cart_by_id": lambda client, inputs: client.get_cart_by_id(inputs.cart_id()),
+    "create_cart": lambda client, inputs: client.create_cart(inputs.new_cart()),
+    "update_cart": lambda client, inputs: client.update_cart(inputs.cart_id(), inputs.new_cart()),
+    "delete_cart": lambda client, inputs: client.delete_cart(inputs.cart_id()),
+    "get_all_users": lambda client, inputs: client.get_all_users(),
+    "get_user_by_id": lambda client, inputs: client.get_user_by_id(inputs.user_id()),
+    "create_user": lambda client, inputs: client.create_user(inputs.generator.generate_user()),
+    "update_user": lambda client, inputs: client.update_user(inputs.user_id(), inputs.generator.generate_user()),
+    "delete_user": lambda client, inputs: client.delete_user(inputs.user_id()),
+    "auth_a_user": lambda client, inputs: client.auth_a_user(inputs.credentials()),
+}
+
+async def load_inputs(client: AsyncAPIClient, seed: int) -> OperationInputs:
+    """ Warm-up that doubles as the source of valid ids """
+    collections = [await (await call()).json() for call in (client.get_all_products, client.get_all_cart, client.get_all_users)]
+    return OperationInputs(*collections, seed)
+
+async def _timed(call) -> tuple:
+    """ (latency, status); transport failures count as status 0 """
+    start = time.perf_counter()
+    try:
+        response = await call
+        status = response.status
+    except Exception:
+        status = 0
+    return time.perf_counter() - start, status
+
+async def run_operation(client: AsyncAPIClient, inputs: OperationInputs, name: str, requests: int, concurrency: int) -> dict:
+    operation = OPERATIONS[name]
+    start = time.perf_counter()
+    results = await gather_limited((_timed(operation(client, inputs)) for _ in range(requests)), concurrency)
+    elapsed = time.perf_counter() - start
+
+    statuses = [status for _, status in results]
+    errors = sum(1 for status in statuses if status == 0 or status >= 500)
+    return summarize([latency for latency, _ in results], elapsed, statuses, errors)
+
+async def run_operations(base_url: str, names: list, requests: int, concurrency: int, seed: int) -> dict:
+    logger = logging.getLogger("benchmark")
+
+    async with async_playwright() as playwright:
+        context = await playwright.request.new_context(base_url = base_url, extra_http_headers = DEFAULT_HEADERS)
+        # The client-side connection cap must not throttle below the requested concurrency
+        client = AsyncAPIClient(context, logger, config = ClientConfig(max_connections = concurrency))
+
+        inputs = await load_inputs(client, seed)
+        results = {name: await run_operation(client, inputs, name, requests, concurrency) for name in names}
+        await context.dispose()
+    return results
+
+# --- Validators ---
+
+def run_validators(size: int, seed: int, repeat: int) -> dict:
+    """ Best-of-`repeat` wall time of the conftest validators on a synthetic dataset """
+    # Imported lazily: the conftest pulls in pytest, which the I/O benchmark does not need
+    from tests.conftest import build_reference_index, find_invalid_references, validate_id_consistency
+
+    dataset = build_dataset(size, size, size, seed)
+    products, carts, users = dataset["products"], dataset["carts"], dataset["users"]
+    by_id = {product["id"]: product for product in products}
+
+    def user_duplicates():
+        columns = UserColumns.load(users)
+        return duplicate_ids(columns.ids, columns.usernames)
+
+    # The field checks of each test module as they run today: every test loads and scans the collection itself
+    def product_test_checks():
+        categories = {entry["category"] for entry in products}
+        prices = ProductColumns.load(products).invalid_prices()
+        columns = ProductColumns.load(products)
+        duplicates = duplicate_ids(columns.ids, columns.titles)
+        return categories, prices, duplicates, ProductColumns.load(products).missing_categories(PRODUCT_CATEGORIES)
+
+    def user_test_checks():
+        return user_duplicates(), UserColumns.load(users).invalid_emails()
+
+    validators = {
+        "duplicate_ids": lambda: duplicate_ids([user["id"] for user in users], [user.get("username") for user in users]),
+        "validate_id_consistency": lambda: validate_id_consistency(
+            products, bulk_identifier_function = lambda ids: [by_id[id] for id in ids]
+        ),
+        "build_reference_index": lambda: build_reference_index(carts, "productId", "products"),
+        "find_invalid_references": lambda: find_invalid_references(build_reference_index(carts, "productId", "products"), set(by_id)),
+        # Columnar loaders include the load, as the tests pay for it on every collection
+        "UserColumns.duplicate_ids": user_duplicates,
+        "ProductColumns.invalid_prices": lambda: ProductColumns.load(products).invalid_prices(),
+        "CartColumns.carts_without_quantity": lambda: CartColumns.load(carts).carts_without_quantity(),
+        # Per-test checks of a module versus its compiled schema, which checks every field in one pass
+        "test_products checks": product_test_checks,
+        "PRODUCT_VALIDATOR.validate_all": lambda: PRODUCT_VALIDATOR.validate_all(products),
+        "test_users checks": user_test_checks,
+        "USER_VALIDATOR.validate_all": lambda: USER_VALIDATOR.validate_all(users),
+        "test_carts checks": lambda: CartColumns.load(carts).carts_without_quantity(),
+        "CART_VALIDATOR.validate_all": lambda: CART_VALIDATOR.validate_all(carts),
+    }
+
+    results = {}
+    for name, validator in validators.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            validator()
+            timings.append(time.perf_counter() - start)
+        results[name] = {"entries": size, "best": min(timings), "mean": sum(timings) / len(timings)}
+    return results
+
+# --- CLI ---
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description = "Benchmark APIClient operations and conftest validators")
+    parser.add_argument("--base-url", default = BASE_URL)
+    parser.add_argument("--mock-server", action = "store_true", help = "Benchmark against a local stand-in instead")
+    parser.add_argument("--mock-size", type = int)
+    parser.add_argument("--mock-latency", action = "append")
+    parser.add_argument("--operations", default = ",".join(OPERATIONS), help = "Comma separated subset of operations")
+    parser.add_argument("--requests", type = int, default = 100, help = "Requests per operation")
+    parser.add_argument("--concurrency", type = int, default = 8)
+    parser.add_argument("--validator-size", type = int, default = 10_000, help = "Entries per synthetic collection, 0 skips")
+    parser.add_argument("--repeat", type = int, default = 3)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--output", default = "benchmark.json")
+    args = parser.parse_args(argv)
+
+    names = [name for name in args.operations.split(",") if name]
+    unknown = set(names) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"Unknown operations: {sorted(unknown)}")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "base_url": "mock" if args.mock_server else args.base_url,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+    }
+
+    if names:
+        if args.mock_server:
+            dataset = build_dataset(args.mock_size, args.mock_size, args.mock_size, args.seed)
+            with MockStoreServer(dataset, parse_latency(args.mock_latency)) as server:
+                report["operations"] = asyncio.run(
+                    run_operations(server.base_url, names, args.requests, args.concurrency, args.seed)
+                )
+        else:
+            report["operations"] = asyncio.run(
+                run_operations(args.base_url, names, args.requests, args.concurrency, args.seed)
+            )
+
+    if args.validator_size:
+        report["validators"] = run_validators(args.validator_size, args.seed, args.repeat)
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent = 2)
+
+    for name, stats in report.get("operations", {}).items():
+        print(f"{name:<20} {stats['rps']:>9.1f} req/s  p50 {stats['p50'] * 1000:7.1f} ms  "
+              f"p95 {stats['p95'] * 1000:7.1f} ms  p99 {stats['p99'] * 1000:7.1f} ms  errors {stats['errors']}")
+    for name, stats in report.get("validators", {}).items():
+        print(f"{name:<28} {stats['entries']} entries  best {stats['best'] * 1000:8.1f} ms")
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import mmap
+import os
+from collections import defaultdict
+from pathlib import Path
+from utility.stored_response import StoredResponse
+
+# Replayed bodies at least this large stay views into the memory-mapped body file instead of copies
+MMAP_THRESHOLD = 64 * 1024
+
+# Response headers the clients read; date, server and the like would make every header set unique.
+# content-length is rebuilt from the stored body on replay.
+KEPT_HEADERS = ("content-type", "etag", "last-modified")
+
+INDEX_VERSION = 2
+
+class CassetteMiss(LookupError):
+    """ Replay was asked for a request that was never recorded """
+
+class Cassette:
+    """
+    Request/response pairs of APIClient on disk: a JSON index at `path` and the bodies, each stored once,
+    in `path`.body. Interactions are keyed by test, method, url and a digest of the normalized request body.
+    The index stores every test name and header set once; an interaction is a row of
+    [test, route, request digest, status, status text, header set, body offset, body length].
+    """
+
+    def __init__(self, path: Path, mode: str):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.current_test = None
+        self.recorded = 0
+        self.replayed = 0
+
+        self._interactions = [] # recording: index rows in request order
+        self._bodies = {} # recording: body digest -> (offset, length)
+        self._tests = {} # recording: test -> position in the index
+        self._header_sets = {} # recording: kept headers as sorted items -> position in the index
+        self._body_file = None
+
+        self._by_test = defaultdict(list) # replay: (test, key) -> interactions
+        self._by_route = defaultdict(list) # replay: (test, route) -> interactions, whatever their body
+        self._by_key = {} # replay: key -> last interaction recorded for it in any test
+        self._positions = defaultdict(int)
+        self._mmap = None
+
+        if mode == "record":
+            self.path.parent.mkdir(parents = True, exist_ok = True)
+            self._body_file = open(self._body_path(), "wb")
+        else:
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # --- Record ---
+
+    def record(self, method: str, url: str, payload, response):
+        headers = tuple(sorted((name, value) for name, value in response.headers.items() if name.lower() in KEPT_HEADERS))
+        self._interactions.append([
+            self._tests.setdefault(self.current_test, len(self._tests)),
+            request_route(method, url),
+            request_digest(payload),
+            response.status,
+            response.status_text,
+            self._header_sets.setdefault(headers, len(self._header_sets)),
+            *self._write_body(response.body()),
+        ])
+        self.recorded += 1
+
+    def _write_body(self, body: bytes) -> list:
+        digest = hashlib.blake2b(body, digest_size = 16).digest()
+        if digest not in self._bodies:
+            self._bodies[digest] = (self._body_file.tell(), len(body))
+            self._body_file.write(body)
+        return list(self._bodies[digest])
+
+    # --- Replay ---
+
+    def play(self, method: str, url: str, payload) -> StoredResponse:
+        """
+        Recorded responses of a request repeat in recorded order within a test, then stick to the last one.
+        Without an exact match, in order:
+        - the responses the test got for the same method and url, since generated payloads differ between runs;
+        - the last response recorded for the request in any test, e.g. for a session fixture that ran under another one.
+        """
+        key = request_key(method, url, payload)
+        route = request_route(method, url)
+
+        if (self.current_test, key) in self._by_test:
+            interaction = self._next(self._by_test, (self.current_test, key))
+        elif (self.current_test, route) in self._by_route:
+            interaction = self._next(self._by_route, (self.current_test, route))
+        elif key in self._by_key:
+            interaction = self._by_key[key]
+        else:
+            raise CassetteMiss(f"{key} was not recorded in {self.path}")
+
+        self.replayed += 1
+        offset, length = interaction["body"]
+        body = memoryview(self._mmap)[offset:offset + length] if self._mmap is not None else b""
+        if length < MMAP_THRESHOLD:
+            body = bytes(body)
+        headers = {**interaction["headers"], "content-length": str(length)}
+        return StoredResponse(url, interaction["status"], headers, body, interaction["status_text"])
+
+    def _next(self, index: dict, lookup: tuple) -> dict:
+        interactions = index[lookup]
+        position = self._positions[(id(index), lookup)]
+        self._positions[(id(index), lookup)] = position + 1
+        return interactions[min(position, len(interactions) - 1)]
+
+    def _load(self):
+        index = json.loads(self.path.read_text())
+        if index.get("version") != INDEX_VERSION:
+            raise ValueError(f"{self.path} has index version {index.get('version')}, expected {INDEX_VERSION}: record it again")
+
+        tests, header_sets = index["tests"], [dict(items) for items in index["headers"]]
+        for test, route, digest, status, status_text, headers, offset, length in index["interactions"]:
+            interaction = {
+                "status": status, "status_text": status_text, "headers": header_sets[headers], "body": (offset, length),
+            }
+            key = f"{route} {digest}" if digest else route
+            self._by_test[(tests[test], key)].append(interaction)
+            self._by_route[(tests[test], route)].append(interaction)
+            self._by_key[key] = interaction
+
+        # An empty file cannot be mapped; every body is empty then
+        with open(self._body_path(), "rb") as file:
+            if os.fstat(file.fileno()).st_size:
+                self._mmap = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    # --- Lifecycle ---
+
+    def close(self):
+        """ Recording: write the index next to the bodies. Replay: unmap the bodies. """
+        if self._body_file is not None:
+            self._body_file.close()
+            self._body_file = None
+            temp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            index = {
+                "version": INDEX_VERSION,
+                "tests": list(self._tests),
+                "headers": [list(items) for items in self._header_sets],
+                "interactions": self._interactions,
+            }
+            temp.write_text(json.dumps(index, separators = (",", ":")))
+            os.replace(temp, self.path)
+
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass # a replayed response still holds a view; the mapping goes away with it
+
+    def stats(self) -> dict:
+        return {"recorded": self.recorded, "replayed": self.replayed}
+
+    def _body_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".body")
+
+def request_route(method: str, url: str) -> str:
+    return f"{method.upper()} {url}"
+
+def request_digest(payload) -> str:
+    """ Digest of the body with sorted keys, so key order never splits two identical requests; '' without a body """
+    if payload is None:
+        return ""
+    body = json.dumps(payload, sort_keys = True, separators = (",", ":"), default = str)
+    return hashlib.blake2b(body.encode(), digest_size = 8).hexdigest()
+
+def request_key(method: str, url: str, payload) -> str:
+    """ 'POST /carts 3f1c...': route and request digest """
+    return f"{request_route(method, url)} {request_digest(payload)}".rstrip()
@@ -0,0 +1,35 @@
+from dataclasses import dataclass, fields
+
+@dataclass
+class ClientConfig:
+    """ Transport settings shared by APIClient and AsyncAPIClient. """
+
+    timeout: float = 30.0 # seconds per request
+    max_connections: int = 8 # in-flight requests per async context
+    retries: int = 0 # extra attempts for idempotent GETs
+    backoff: float = 0.5 # seconds before the first retry, doubled on each further one
+    retry_statuses: tuple = (429, 502, 503, 504)
+
+    def timeout_ms(self) -> float:
+        """ Playwright takes timeouts in milliseconds """
+        return self.timeout * 1000
+
+    def backoff_delay(self, attempt: int) -> float:
+        return self.backoff * (2 ** attempt)
+
+@dataclass
+class TransportStats:
+    """ Counters that show how much connection setup a run paid for. """
+
+    contexts_opened: int = 0 # each APIRequestContext keeps its own keep-alive pool
+    requests_sent: int = 0
+    retries: int = 0
+    connections_accepted: int = 0 # only known when the stand-in server is used
+    requests_rejected: int = 0 # 429s of the stand-in's --mock-max-in-flight
+
+    def as_dict(self) -> dict:
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+    def merge(self, other: dict):
+        for name, value in other.items():
+            setattr(self, name, getattr(self, name) + value)
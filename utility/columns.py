@@ -0,0 +1,140 @@
+import math
+import operator
+import re
+from array import array
+from collections import Counter, defaultdict
+from itertools import compress
+from sys import intern
+
+EMAIL_PATTERN = re.compile(r"^[^@]+@[^@]+\.[^@]+$")
+
+# Bound comparison run by map() in C; NaN compares False, so it fails as a bad value should
+_is_positive = (0.0).__lt__
+
+class ProductColumns:
+    """
+    /products as columns: prices in a typed array, categories interned.
+    Built from a stream of entries, so the decoded list of dicts never exists as a whole.
+    Ids stay a plain list: a null or string id from the API is a defect to report, not a crash.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.prices = array("d") # NaN where the price is not a number
+        self.categories = []
+        self.titles = []
+        self.raw_prices = {} # row -> original value of every price that is not a number
+
+    @classmethod
+    def load(cls, entries):
+        columns = cls()
+        # Bound once: the loop body is all the per-entry work there is
+        add_id, add_price = columns.ids.append, columns.prices.append
+        add_category, add_title = columns.categories.append, columns.titles.append
+
+        for row, entry in enumerate(entries):
+            add_id(entry.get("id"))
+            add_price(_number(entry.get("price"), row, columns.raw_prices))
+            add_category(_interned(entry.get("category")))
+            add_title(entry.get("title"))
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def invalid_prices(self) -> list:
+        """ (id, price) of every price that is not a positive number; NaN fails every comparison """
+        rows = compress(range(len(self.prices)), map(operator.not_, map(_is_positive, self.prices)))
+        return [(self.ids[row], self.raw_prices.get(row, self.prices[row])) for row in rows]
+
+    def category_counts(self) -> Counter:
+        return Counter(self.categories)
+
+    def missing_categories(self, expected: set) -> list:
+        return sorted(set(expected) - set(self.categories))
+
+class UserColumns:
+    """ /users as columns, emails interned. """
+
+    def __init__(self):
+        self.ids = []
+        self.usernames = []
+        self.emails = []
+
+    @classmethod
+    def load(cls, entries):
+        columns = cls()
+        for entry in entries:
+            columns.ids.append(entry.get("id"))
+            columns.usernames.append(entry.get("username"))
+            columns.emails.append(_interned(entry.get("email", "")))
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def invalid_emails(self, pattern: re.Pattern = EMAIL_PATTERN) -> list:
+        """ (id, email) of every email the pattern does not match; non-strings never match """
+        return [
+            (id, email) for id, email in zip(self.ids, self.emails)
+            if not (isinstance(email, str) and pattern.match(email))
+        ]
+
+class CartColumns:
+    """
+    /carts as columns, with the quantity of every products line flattened into an array.
+    line_carts holds the row of the cart each line belongs to.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.line_carts = array("q")
+        self.line_quantities = array("d") # NaN where the quantity is not a number
+
+    @classmethod
+    def load(cls, entries):
+        columns = cls()
+        add_id, add_cart, add_quantity = columns.ids.append, columns.line_carts.append, columns.line_quantities.append
+
+        for row, entry in enumerate(entries):
+            add_id(entry.get("id"))
+            for line in entry.get("products", []):
+                add_cart(row)
+                quantity = line.get("quantity", 0)
+                # Inlined _number: carts hold several lines each, which makes this the hottest loop
+                add_quantity(quantity if type(quantity) is int or type(quantity) is float else math.nan)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def carts_without_quantity(self) -> list:
+        """ Ids of carts that are empty or have no line with a positive quantity """
+        with_positive_line = set(compress(self.line_carts, map(_is_positive, self.line_quantities)))
+        return [id for row, id in enumerate(self.ids) if row not in with_positive_line]
+
+def duplicate_ids(ids, secondaries: list) -> list:
+    """
+    (id, secondary) for every row whose id occurs more than once, grouped by id in first-seen order.
+    Counting the id column first keeps the common no-duplicates case to a single pass.
+    """
+    repeated = {id for id, count in Counter(ids).items() if count > 1}
+    if not repeated:
+        return []
+
+    groups = defaultdict(list)
+    for id, secondary in zip(ids, secondaries):
+        if id in repeated:
+            groups[id].append(secondary)
+    return [(id, secondary) for id, group in groups.items() for secondary in group]
+
+def _number(value, row: int = None, raw: dict = None) -> float:
+    """ Numbers as-is; anything else (strings, None, bools) becomes NaN, optionally keeping the original value """
+    if type(value) is float or type(value) is int:
+        return value
+    if raw is not None:
+        raw[row] = value
+    return math.nan
+
+def _interned(value):
+    return intern(value) if isinstance(value, str) else value
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from utility.stored_response import StoredResponse
+
+class ConditionalGetStore:
+    """
+    ETag / Last-Modified validators and bodies of GET responses, persisted between runs.
+    APIClient sends them back as If-None-Match / If-Modified-Since and serves a 304 from the stored body.
+    """
+
+    def __init__(self, directory: Path, namespace: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents = True, exist_ok = True)
+        self.namespace = namespace
+        self.revalidated = 0
+        self.bytes_saved = 0
+        self.stored = 0
+        self._meta = {} # url -> validators, status and headers, or None when nothing is stored
+
+    def request_headers(self, url: str) -> dict:
+        """ Conditional headers for url; empty when nothing usable is stored """
+        entry = self._validators(url)
+        if entry is None:
+            return {}
+
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def resolve(self, url: str, response):
+        """
+        Stored body for a 304, otherwise the response itself (remembered when it carries a validator).
+        None for a 304 whose body went missing: the validators are dropped, send the GET again without them.
+        """
+        if response.status == 304:
+            entry = self._validators(url)
+            if entry is None:
+                return response # the server answered a condition we did not send
+            body = self._body(url)
+            if body is None:
+                self._forget(url)
+                return None
+
+            self.revalidated += 1
+            self.bytes_saved += len(body)
+            return StoredResponse(url, entry["status"], entry["headers"], body)
+
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if response.ok and (etag or last_modified):
+            stored = StoredResponse.from_response(response, url)
+            self._store(url, stored, etag, last_modified)
+            return stored
+        return response
+
+    def stats(self) -> dict:
+        return {"revalidated": self.revalidated, "bytes_saved": self.bytes_saved, "stored": self.stored}
+
+    # --- Files ---
+    # Validators live in a small .meta.json next to the raw .body, so sending the conditions of a GET
+    # never reads the body; only a 304 does. Validators read once are kept for the session.
+
+    def _path(self, url: str, suffix: str) -> Path:
+        key = f"{self.namespace} {url}"
+        return self.directory / (hashlib.sha256(key.encode()).hexdigest()[:32] + suffix)
+
+    def _validators(self, url: str):
+        if url not in self._meta:
+            try:
+                self._meta[url] = json.loads(self._path(url, ".meta.json").read_text())
+            except (FileNotFoundError, ValueError):
+                self._meta[url] = None
+        return self._meta[url]
+
+    def _body(self, url: str):
+        try:
+            return self._path(url, ".body").read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _store(self, url: str, response: StoredResponse, etag: str, last_modified: str):
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "status": response.status,
+            "headers": response.headers,
+        }
+        # Body first, validators last, each written then renamed: xdist workers revalidating the same url
+        # never read half a file, nor validators without their body
+        self._replace(self._path(url, ".body"), bytes(response.body()))
+        self._replace(self._path(url, ".meta.json"), json.dumps(entry).encode())
+        self._meta[url] = entry
+        self.stored += 1
+
+    def _forget(self, url: str):
+        """ Validators whose body is gone (deleted, or a worker died between the two writes) """
+        self._path(url, ".meta.json").unlink(missing_ok = True)
+        self._meta[url] = None
+
+    @staticmethod
+    def _replace(path: Path, data: bytes):
+        temp = path.with_suffix(f".{os.getpid()}.tmp")
+        temp.write_bytes(data)
+        os.replace(temp, path)
@@ -1,15 +1,48 @@
-from faker import Faker
+import base64
 import random
+import time
+from datetime import datetime
+from utility.settings import PRODUCT_CATEGORIES
+
+# Distinct names / domains Faker draws once per batch; everything else is list sampling
+NAME_POOL_SIZE = 500
+DOMAIN_POOL_SIZE = 20
+# Fixed bounds keep cart dates reproducible; "this decade" would move with the clock
+CART_DATES = (datetime(2020, 1, 1), datetime(2029, 12, 31))
 
 class DataGenerator:
 
-    def __init__(self):
-        self.faker = Faker()
+    # Seconds this process spent importing Faker and loading its providers
+    faker_load_time = 0.0
+
+    def __init__(self, seed: int = None):
+        """ A seed makes every generated value reproducible """
+        self.seed = seed
+        self.random = random.Random(seed)
+        self._faker = None
+
+    @property
+    def faker(self):
+        """ Faker loads on first use, so runs that never generate data never pay for it """
+        if self._faker is None:
+            self._faker = self._new_faker(self.seed)
+        return self._faker
+
+    @classmethod
+    def _new_faker(cls, seed: int = None):
+        start = time.perf_counter()
+        from faker import Faker
+
+        faker = Faker()
+        if seed is not None:
+            faker.seed_instance(seed)
+        cls.faker_load_time += time.perf_counter() - start
+        return faker
     
     # --- Users ---
     
     def get_id(self) -> int:
-        return random.randint(1000, 1999)
+        return self.random.randint(1000, 1999)
     
     def generate_user(self) -> dict:
         username = self.get_username()
@@ -25,8 +58,70 @@ class DataGenerator:
         return "".join(map(str, self.faker.passport_owner()))
     
     def get_email(self, username: str):
-        email = username + self.faker.free_email_domain()
+        email = username + "@" + self.faker.free_email_domain()
         return email
     
     def get_password(self):
         return self.faker.password(length = 8)
+
+    def generate_users(self, n: int, seed: int = None, first_id: int = 1000) -> list:
+        """
+        n users in one go, reproducible from seed. Ids are consecutive from first_id and every username
+        carries its id, so neither can collide. Faker only fills small name pools, which keeps
+        10^5-10^6 users in the range of seconds.
+        """
+        rng = random.Random(seed) if seed is not None else self.random
+        firsts, lasts, domains = self._user_pools(rng.getrandbits(32))
+
+        first_names = rng.choices(firsts, k = n)
+        last_names = rng.choices(lasts, k = n)
+        email_domains = rng.choices(domains, k = n)
+        # 6 random bytes -> 8 url-safe characters per password
+        passwords = base64.urlsafe_b64encode(rng.randbytes(6 * n)).decode()
+
+        users = []
+        for offset, (first, last, domain) in enumerate(zip(first_names, last_names, email_domains)):
+            uid = first_id + offset
+            username = f"{first}{last}{uid}"
+            users.append({
+                "id" : uid,
+                "username" : username,
+                "email": f"{username}@{domain}",
+                "password": passwords[offset * 8:offset * 8 + 8],
+            })
+        return users
+
+    def _user_pools(self, seed: int) -> tuple:
+        pool_faker = self._new_faker(seed)
+
+        firsts = sorted({pool_faker.first_name() for _ in range(NAME_POOL_SIZE)})
+        lasts = sorted({pool_faker.last_name() for _ in range(NAME_POOL_SIZE)})
+        domains = sorted({pool_faker.free_email_domain() for _ in range(DOMAIN_POOL_SIZE)})
+        return firsts, lasts, domains
+
+    # --- Products ---
+
+    def generate_product(self, prod_id: int, category: str = None) -> dict:
+        return {
+            "id": prod_id,
+            "title": self.faker.catch_phrase(),
+            "price": round(self.random.uniform(1, 1000), 2),
+            "description": self.faker.sentence(),
+            "category": category or self.random.choice(sorted(PRODUCT_CATEGORIES)),
+            "image": f"https://fakestoreapi.com/img/{prod_id}.jpg",
+            "rating": {"rate": round(self.random.uniform(1, 5), 1), "count": self.random.randint(0, 500)},
+        }
+
+    # --- Carts ---
+
+    def generate_cart(self, cart_id: int, user_ids: list, product_ids: list) -> dict:
+        """ Cart referencing existing users and products, 1-4 lines with positive quantities """
+        lines = self.random.sample(product_ids, k = min(len(product_ids), self.random.randint(1, 4)))
+
+        return {
+            "id": cart_id,
+            "userId": self.random.choice(user_ids),
+            "date": self.faker.date_time_between(*CART_DATES).isoformat(timespec = "milliseconds") + "Z",
+            "products": [{"productId": pid, "quantity": self.random.randint(1, 10)} for pid in lines],
+            "__v": 0,
+        }
@@ -0,0 +1,93 @@
+"""
+Ordering of tests by the collections they declare, and the pool that holds those collections while
+the tests that need them run.
+
+Tests declare their data with a marker, e.g. @pytest.mark.data("carts", "users") or
+@pytest.mark.data(mutates=True). schedule() runs tests that need no data first, then read-only tests,
+then mutating ones; within each phase tests that need the same collections run back to back.
+"""
+from typing import NamedTuple
+from utility.endpoints import resource_of
+
+class DataNeeds(NamedTuple):
+    collections: frozenset # resource names, e.g. {"carts", "users"}
+    mutates: bool
+
+    @property
+    def phase(self) -> int:
+        """ 0: no data, 1: read-only, 2: writes """
+        if self.mutates:
+            return 2
+        return 1 if self.collections else 0
+
+def schedule(needs: list) -> list:
+    """
+    Indices of needs in run order. Within a phase, tests with the same collections form a group; groups are
+    chained so each shares as many collections as possible with the one before it. Ties and the tests
+    of a group keep their collection order.
+    """
+    order = []
+    previous = frozenset()
+    for phase in (0, 1, 2):
+        groups = {}
+        for index, need in enumerate(needs):
+            if need.phase == phase:
+                groups.setdefault(need.collections, []).append(index)
+
+        while groups:
+            collections = max(groups, key = lambda candidate: len(candidate & previous))
+            order.extend(groups.pop(collections))
+            previous = collections
+    return order
+
+def release_after(ordered_needs: list) -> list:
+    """ Per position: the collections no later test needs, to release once that test is done """
+    releases = [set() for _ in ordered_needs]
+    seen = set()
+    for position in range(len(ordered_needs) - 1, -1, -1):
+        collections = ordered_needs[position].collections
+        releases[position] = set(collections - seen)
+        seen |= collections
+    return releases
+
+def collection_url(name: str) -> str:
+    return f"/{name}"
+
+class PrefetchPool:
+    """ Collection responses held from the first to the last test that declared them """
+
+    def __init__(self):
+        self.prefetched = 0
+        self.hits = 0
+        self.released = 0
+        self.invalidated = 0
+        self._responses = {} # collection url -> response
+
+    def get(self, url: str):
+        response = self._responses.get(url)
+        if response is not None:
+            self.hits += 1
+        return response
+
+    def pin(self, url: str, response):
+        if response.ok:
+            self._responses[url] = response
+            self.prefetched += 1
+
+    def release(self, url: str):
+        """ Drop the response of url and return it, or None when it was not held """
+        response = self._responses.pop(url, None)
+        if response is not None:
+            self.released += 1
+        return response
+
+    def invalidate(self, url: str):
+        """ A write makes the held collection of its resource stale; the next test needing it fetches it again """
+        if self._responses.pop(resource_of(url), None) is not None:
+            self.invalidated += 1
+
+    def held(self) -> set:
+        return set(self._responses)
+
+    def stats(self) -> dict:
+        return {"prefetched": self.prefetched, "hits": self.hits, "released": self.released, "invalidated": self.invalidated}
@@ -0,0 +1,17 @@
+from urllib.parse import urlsplit
+from utility.settings import AUTH_ENDPOINT
+
+def resource_of(url: str) -> str:
+    """ First path segment of a relative url: '/carts/5?limit=1' -> '/carts' """
+    return "/" + url.split("?", 1)[0].lstrip("/").split("/", 1)[0]
+
+def endpoint_template(url: str) -> str:
+    """ '/carts/5' -> '/carts/:id', so latency and metrics group by endpoint rather than url """
+    parts = urlsplit(url).path.split("/")
+    if len(parts) > 2 and parts[1] != AUTH_ENDPOINT.split("/")[1]:
+        return f"/{parts[1]}/:id"
+    return "/".join(parts)
+
+def is_collection(url: str) -> bool:
+    """ True for '/carts', False for '/carts/5' """
+    return endpoint_template(url) == resource_of(url)
@@ -0,0 +1,34 @@
+from typing import TYPE_CHECKING
+from utility.async_runner import AsyncRunner
+from utility.profiler import profiled
+
+if TYPE_CHECKING: # the client module loads playwright.async_api, which only the first bulk call needs
+    from utility.async_api_client import AsyncAPIClient
+
+class FanOutFetcher:
+    """
+    Lets the sync APIClient hand bulk per-id lookups to an AsyncAPIClient running on an AsyncRunner.
+    The client comes from open_client() on the first bulk call, so tests that never make one never launch async Playwright.
+    """
+
+    def __init__(self, runner: AsyncRunner, open_client, concurrency: int):
+        self.concurrency = concurrency
+        self._runner = runner
+        self._open_client = open_client # () -> AsyncAPIClient
+        self._client = None
+
+    # The JSON of the responses is decoded on the loop thread, so it counts as network time here
+    @profiled("network")
+    def get_many_by_id(self, endpoint: str, ids: list) -> list:
+        """ (status, json) pairs in the order of ids. """
+        return self._runner.run(self._started_client().get_many_by_id(endpoint, ids, self.concurrency))
+
+    @profiled("network")
+    def send_many(self, calls: list) -> list:
+        """ Statuses of (method, url, payload) POST/PUT calls, in call order. """
+        return self._runner.run(self._started_client().send_many(calls, self.concurrency))
+
+    def _started_client(self) -> "AsyncAPIClient":
+        if self._client is None:
+            self._client = self._open_client()
+        return self._client
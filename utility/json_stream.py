@@ -0,0 +1,34 @@
+import json
+import re
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+def iter_json_array(text: str):
+    """
+    Yield the items of a top-level JSON array one at a time.
+    Only the current item is turned into Python objects, so peak memory stays at the raw body
+    instead of the body plus the whole decoded list.
+    """
+    index = _skip(text, 0)
+    if text[index:index + 1] != "[":
+        raise ValueError(f"Expected a JSON array at position {index}")
+
+    index = _skip(text, index + 1)
+    if text[index:index + 1] == "]":
+        return
+
+    while True:
+        item, index = _decoder.raw_decode(text, index)
+        yield item
+
+        index = _skip(text, index)
+        separator = text[index:index + 1]
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' at position {index}")
+        index = _skip(text, index + 1)
+
+def _skip(text: str, index: int) -> int:
+    return _WHITESPACE.match(text, index).end()
@@ -0,0 +1,34 @@
+import time
+
+class LazyRequestContext:
+    """
+    Stand-in for a Playwright APIRequestContext that opens the real one on first use,
+    so a run whose tests never send a request never launches Playwright.
+    """
+
+    def __init__(self, open_context):
+        self._open_context = open_context # () -> (context, close)
+        self._context = None
+        self._close = None
+        self.launch_time = 0.0
+
+    @property
+    def started(self) -> bool:
+        return self._context is not None
+
+    def __getattr__(self, name: str):
+        # Only reached for attributes of the real context, e.g. get / post / dispose
+        return getattr(self._started_context(), name)
+
+    def close(self):
+        """ Dispose the context and stop Playwright, if they were ever started """
+        if self._close is not None:
+            self._close()
+            self._context = self._close = None
+
+    def _started_context(self):
+        if self._context is None:
+            start = time.perf_counter()
+            self._context, self._close = self._open_context()
+            self.launch_time = time.perf_counter() - start
+        return self._context
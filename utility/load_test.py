@@ -0,0 +1,174 @@
+"""
+Open-loop load generator for mixed read/write traffic.
+
+Requests are issued on a fixed schedule (uniform or Poisson arrivals at --rps) whether or not earlier
+ones have returned, and latency is measured from the scheduled start. A slow server therefore shows
+up as growing latency instead of a silently lower request rate (no coordinated omission).
+
+    python -m utility.load_test --mock-server --rps 200 --duration 30 --mix get_all_products=5,create_cart=1
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from playwright.async_api import async_playwright
+from utility.async_api_client import AsyncAPIClient
+from utility.benchmark import OPERATIONS, OperationInputs, git_commit, load_inputs
+from utility.client_config import ClientConfig
+from utility.metrics import bucket_labels, histogram, summarize
+from utility.mock_server import MockStoreServer, build_dataset, parse_latency
+from utility.settings import BASE_URL, DEFAULT_HEADERS
+from utility.token_pool import DEFAULT_TOKEN_TTL, TokenPool, credentials_of
+
+# Mostly reads, with every write endpoint exercised
+DEFAULT_MIX = {
+    "get_all_products": 4, "get_products_by_id": 10, "get_all_cart": 2, "get_cart_by_id": 10,
+    "get_all_users": 2, "get_user_by_id": 10, "auth_a_user": 3,
+    "create_products": 1, "update_products": 1, "delete_products": 1,
+    "create_cart": 2, "update_cart": 2, "delete_cart": 1, "create_user": 2, "update_user": 2, "delete_user": 1,
+}
+
+def parse_mix(spec: str) -> dict:
+    """ 'get_all_products=5,create_cart=1' -> {'get_all_products': 5.0, 'create_cart': 1.0} """
+    mix = {}
+    for part in filter(None, spec.split(",")):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def arrival_times(rps: float, duration: float, arrivals: str, rng):
+    """ Scheduled offsets (seconds from the start) of every request, fixed before any of them returns """
+    count, offset = 0, 0.0
+    while offset < duration:
+        yield offset
+        count += 1
+        # index / rps rather than a running sum, which drifts and adds or drops the last request
+        offset = offset + rng.expovariate(rps) if arrivals == "poisson" else count / rps
+
+async def run_load(client: AsyncAPIClient, inputs: OperationInputs, mix: dict, rps: float, duration: float,
+                   arrivals: str = "uniform", max_in_flight: int = 1000) -> dict:
+    """ Per-operation latency summary, histogram and error rate of one open-loop run """
+    names, weights = list(mix), list(mix.values())
+    rng = inputs.random
+    samples = defaultdict(list) # name -> [(latency, status)]
+    dropped = defaultdict(int)
+    in_flight = set()
+
+    async def issue(name: str, scheduled: float):
+        try:
+            status = (await OPERATIONS[name](client, inputs)).status
+        except Exception:
+            status = 0
+        samples[name].append((time.perf_counter() - scheduled, status))
+
+    start = time.perf_counter()
+    for offset in arrival_times(rps, duration, arrivals, rng):
+        scheduled = start + offset
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        name = rng.choices(names, weights)[0]
+        # Beyond the cap the client itself would become the bottleneck; count it instead of queueing
+        if len(in_flight) >= max_in_flight:
+            dropped[name] += 1
+        else:
+            task = asyncio.create_task(issue(name, scheduled))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+    await asyncio.gather(*in_flight)
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for name in names:
+        latencies = [latency for latency, _ in samples[name]]
+        statuses = [status for _, status in samples[name]]
+        errors = sum(1 for status in statuses if status == 0 or status >= 500) + dropped[name]
+        stats = summarize(latencies, elapsed, statuses, errors)
+        stats["dropped"] = dropped[name]
+        stats["error_rate"] = errors / (len(statuses) + dropped[name]) if statuses or dropped[name] else 0.0
+        stats["histogram"] = histogram(latencies)
+        results[name] = stats
+    return results
+
+async def _run(base_url: str, args, mix: dict) -> dict:
+    async with async_playwright() as playwright:
+        context = await playwright.request.new_context(base_url = base_url, extra_http_headers = DEFAULT_HEADERS)
+        config = ClientConfig(max_connections = args.max_in_flight)
+        client = AsyncAPIClient(context, logging.getLogger("load_test"), config = config)
+        inputs = await load_inputs(client, args.seed)
+
+        # Authenticated traffic: every request carries a pooled token instead of logging in
+        pool = None
+        if args.auth_pool:
+            pool = await TokenPool(client, args.token_ttl).fill(credentials_of(inputs.users), args.auth_pool)
+            client.token_pool = pool.start()
+
+        results = await run_load(client, inputs, mix, args.rps, args.duration, args.arrivals, args.max_in_flight)
+        if pool is not None:
+            await pool.close()
+        await context.dispose()
+    return results, pool.stats() if pool is not None else None
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description = "Open-loop load test of the API client operations")
+    parser.add_argument("--base-url", default = BASE_URL)
+    parser.add_argument("--mock-server", action = "store_true", help = "Load the local stand-in instead")
+    parser.add_argument("--mock-size", type = int)
+    parser.add_argument("--mock-latency", action = "append")
+    parser.add_argument("--rps", type = float, default = 50, help = "Target requests per second")
+    parser.add_argument("--duration", type = float, default = 10, help = "Seconds of traffic")
+    parser.add_argument("--arrivals", choices = ("uniform", "poisson"), default = "uniform")
+    parser.add_argument("--mix", default = "", help = "OPERATION=WEIGHT,... (defaults to a read-heavy mix)")
+    parser.add_argument("--max-in-flight", type = int, default = 1000)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--auth-pool", type = int, default = 0, help = "Log in this many users once and send their tokens round-robin")
+    parser.add_argument("--token-ttl", type = float, default = DEFAULT_TOKEN_TTL, help = "Token lifetime when the token has no exp claim")
+    parser.add_argument("--output", default = "benchmark-load.json")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix) or DEFAULT_MIX
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.mock_server:
+        dataset = build_dataset(args.mock_size, args.mock_size, args.mock_size, args.seed)
+        with MockStoreServer(dataset, parse_latency(args.mock_latency)) as server:
+            results, auth_pool = asyncio.run(_run(server.base_url, args, mix))
+    else:
+        results, auth_pool = asyncio.run(_run(args.base_url, args, mix))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "base_url": "mock" if args.mock_server else args.base_url,
+            "target_rps": args.rps,
+            "duration": args.duration,
+            "arrivals": args.arrivals,
+            "mix": mix,
+            "histogram_buckets": bucket_labels(),
+            "auth_pool": auth_pool,
+        },
+        "operations": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent = 2)
+
+    for name, stats in results.items():
+        print(f"{name:<20} {stats['rps']:>8.1f} req/s  p50 {stats['p50'] * 1000:7.1f} ms  "
+              f"p99 {stats['p99'] * 1000:7.1f} ms  errors {stats['error_rate']:6.2%}  dropped {stats['dropped']}")
+    if auth_pool is not None:
+        print(f"auth pool: {auth_pool['users']} users, {auth_pool['handed_out']} tokens handed out, "
+              f"{auth_pool['logins']} logins ({auth_pool['refreshes']} refreshes)")
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
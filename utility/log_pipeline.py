@@ -0,0 +1,103 @@
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+# Records a BufferedFileHandler keeps in the file buffer before it flushes them to disk
+DEFAULT_BATCH_SIZE = 64
+
+class BufferedFileHandler(logging.FileHandler):
+    """ FileHandler that flushes once per batch_size records instead of after every record """
+
+    def __init__(self, filename: str, batch_size: int = DEFAULT_BATCH_SIZE, mode: str = "w"):
+        super().__init__(filename, mode = mode, encoding = "utf-8")
+        self.batch_size = max(1, batch_size)
+        self.written = 0
+        self.flushes = 0
+        self._pending = 0
+
+    def emit(self, record: logging.LogRecord):
+        self.written += 1
+        super().emit(record)
+
+    def flush(self):
+        # StreamHandler.emit calls this after every record
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush_batch()
+
+    def flush_batch(self):
+        """ Write out whatever the buffer holds """
+        self.acquire()
+        try:
+            if self._pending and self.stream is not None:
+                self.stream.flush()
+                self.flushes += 1
+            self._pending = 0
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+class JsonLinesFormatter(logging.Formatter):
+    """ One JSON object per record; `time` sorts lexicographically like asctime of the text format """
+
+    def __init__(self, worker: str = None):
+        super().__init__()
+        self.worker = worker
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"time": self.formatTime(record), "level": record.levelname}
+        if self.worker:
+            entry["worker"] = self.worker
+        entry["message"] = record.getMessage()
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii = False)
+
+class _DeferredQueueHandler(QueueHandler):
+    """ Enqueues records as they are: msg % args is left to the listener thread """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class _BatchingQueueListener(QueueListener):
+    """ Drains the queue without blocking and flushes the batch as soon as the queue runs empty """
+
+    def dequeue(self, block: bool):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                if isinstance(handler, BufferedFileHandler):
+                    handler.flush_batch()
+            return self.queue.get(block)
+
+class LogPipeline:
+    """
+    Routes a logger through a queue to handler on a background thread: a logging call only enqueues
+    the record, formatting and file writes happen on the listener thread.
+    """
+
+    def __init__(self, logger: logging.Logger, handler: logging.Handler):
+        self.logger = logger
+        self.handler = handler
+        self._queue = queue.SimpleQueue()
+        self._queue_handler = _DeferredQueueHandler(self._queue)
+        self._listener = _BatchingQueueListener(self._queue, handler)
+
+    def start(self) -> "LogPipeline":
+        self._listener.start()
+        self.logger.addHandler(self._queue_handler)
+        return self
+
+    def stop(self):
+        """ Detach from the logger, write out every queued record and close the file """
+        self.logger.removeHandler(self._queue_handler)
+        self._listener.stop()
+        self.handler.close()
+
+    def stats(self) -> dict:
+        return {"written": getattr(self.handler, "written", 0), "flushes": getattr(self.handler, "flushes", 0)}
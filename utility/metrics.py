@@ -0,0 +1,40 @@
+from collections import Counter
+
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, float("inf"))
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """ Nearest-rank percentile of an already sorted list, e.g. percentile(latencies, 0.95) """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+def summarize(latencies: list, elapsed: float, statuses: list = None, errors: int = 0) -> dict:
+    """ Throughput and latency distribution (seconds) of one batch of requests """
+    ordered = sorted(latencies)
+    count = len(ordered)
+
+    return {
+        "requests": count,
+        "errors": errors,
+        "elapsed": elapsed,
+        "rps": count / elapsed if elapsed > 0 else 0.0,
+        "mean": sum(ordered) / count if count else 0.0,
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1] if ordered else 0.0,
+        "statuses": dict(Counter(statuses or [])),
+    }
+
+def histogram(latencies, buckets: tuple = LATENCY_BUCKETS_MS) -> list:
+    """ Count of latencies (seconds) per bucket of upper bounds in milliseconds """
+    counts = [0] * len(buckets)
+    for latency in latencies:
+        milliseconds = latency * 1000
+        counts[next(i for i, bound in enumerate(buckets) if milliseconds <= bound)] += 1
+    return counts
+
+def bucket_labels(buckets: tuple = LATENCY_BUCKETS_MS) -> list:
+    return [f"≤{bound:g} ms" if bound != float("inf") else "more" for bound in buckets]
@@ -0,0 +1,310 @@
+"""
+Offline stand-in for the Fake Store API.
+
+Serves /products, /carts, /users and /auth/login from a seeded DataGenerator dataset with the
+status codes the suite expects, and can delay every endpoint to model network latency.
+
+    python -m utility.mock_server --port 8000 --size 10000 --latency 0.05:0.01 --latency /carts/:id=0.2
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from utility.data_generator import DataGenerator
+from utility.endpoints import endpoint_template
+from utility.settings import *
+
+# Same collection sizes as fakestoreapi.com
+DEFAULT_SIZES = {"products": 20, "carts": 7, "users": 10}
+
+# Fields that POST and PUT bodies must carry, with their accepted types (missing, empty or wrongly typed -> 400)
+REQUIRED_FIELDS = {
+    "products": {"title": str, "price": (int, float), "description": str, "category": str, "image": str},
+    "carts": {"id": int, "userId": int, "date": str, "products": list},
+    "users": {"id": int, "username": str, "email": str, "password": str},
+}
+LOGIN_FIELDS = {"username": str, "password": str}
+
+# --- Dataset ---
+
+def build_dataset(products: int = None, carts: int = None, users: int = None, seed: int = 0) -> dict:
+    """ Reproducible collections keyed by resource name; ids start at 1 like the real API """
+    products = DEFAULT_SIZES["products"] if products is None else products
+    carts = DEFAULT_SIZES["carts"] if carts is None else carts
+    users = DEFAULT_SIZES["users"] if users is None else users
+
+    generator = DataGenerator(seed)
+    categories = sorted(PRODUCT_CATEGORIES)
+
+    # Round-robin categories so every category is covered
+    product_list = [
+        generator.generate_product(pid, categories[(pid - 1) % len(categories)]) for pid in range(1, products + 1)
+    ]
+    user_list = [{**user, "__v": 0} for user in generator.generate_users(users, first_id = 1)]
+
+    user_ids = [user["id"] for user in user_list]
+    product_ids = [product["id"] for product in product_list]
+    cart_list = [generator.generate_cart(cid, user_ids, product_ids) for cid in range(1, carts + 1)]
+
+    return {"products": product_list, "carts": cart_list, "users": user_list}
+
+# --- Latency ---
+
+def parse_latency(specs: list) -> dict:
+    """
+    "0.05" or "0.05:0.01" sets the default delay (and jitter) in seconds,
+    "/carts/:id=0.2:0.05" overrides a single endpoint template.
+    """
+    latency = {}
+    for spec in specs or []:
+        endpoint, _, value = spec.rpartition("=")
+        delay, _, jitter = value.partition(":")
+        latency[endpoint or "*"] = (float(delay), float(jitter or 0))
+    return latency
+
+# --- Server ---
+
+class MockStoreServer:
+    """ Threaded HTTP server on localhost; use as a context manager or call start() / stop() """
+
+    def __init__(self, dataset: dict = None, latency: dict = None, host: str = "127.0.0.1", port: int = 0,
+                 max_in_flight: int = None):
+        self.dataset = dataset if dataset is not None else build_dataset()
+        self.latency = latency or {}
+        # Like a rate-limited deployment: requests beyond this many in flight get a 429
+        self.max_in_flight = max_in_flight
+        self.rejected = 0
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self._index = {name: {entry["id"]: entry for entry in entries} for name, entries in self.dataset.items()}
+        # Collection bodies never change, serialize them once
+        self._bodies = {name: json.dumps(entries).encode() for name, entries in self.dataset.items()}
+        self._credentials = {user["username"]: user["password"] for user in self.dataset["users"]}
+        self._random = random.Random()
+
+        self._httpd = _CountingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.store = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def connections_accepted(self) -> int:
+        """ TCP connections opened by clients so far; compare with requests sent to see keep-alive reuse """
+        return self._httpd.connections_accepted
+
+    def serve_forever(self):
+        """ Blocking variant of start(), for the CLI """
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-store", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def admit(self) -> bool:
+        """ Count a request in, or refuse it when max_in_flight requests are being served already """
+        with self._in_flight_lock:
+            if self.max_in_flight is not None and self._in_flight >= self.max_in_flight:
+                self.rejected += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def leave(self):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+
+    def delay(self, path: str):
+        """ Sleep for the configured latency +- jitter of the endpoint """
+        template = endpoint_template(path)
+        delay, jitter = self.latency.get(template, self.latency.get("*", (0, 0)))
+        if delay or jitter:
+            time.sleep(max(0.0, delay + self._random.uniform(-jitter, jitter)))
+
+    # --- Routes ---
+
+    def handle(self, method: str, path: str, payload) -> tuple:
+        """ Returns (status, body) where body is bytes or a JSON-serializable object """
+        parts = urlsplit(path).path.split("/")[1:]
+
+        if "/" + "/".join(parts) == AUTH_ENDPOINT:
+            return self._login(payload) if method == "POST" else (404, {"error": "Not found"})
+
+        name = parts[0]
+        if name not in self._index or len(parts) > 2:
+            return 404, {"error": "Not found"}
+
+        if len(parts) == 1:
+            if method == "GET":
+                return 200, self._bodies[name]
+            if method == "POST":
+                return self._create(name, payload)
+            return 404, {"error": "Not found"}
+
+        raw_id = parts[1]
+        if raw_id == "":
+            return 404, {"error": "Not found"}
+        if not raw_id.isdigit():
+            return 400, {"error": f"Invalid id: {raw_id}"}
+
+        entry = self._index[name].get(int(raw_id))
+        if entry is None:
+            return 404, {"error": f"No entry with id {raw_id}"}
+        if method == "GET":
+            return 200, entry
+        if method == "PUT":
+            return self._update(name, entry, payload)
+        if method == "DELETE":
+            return 200, entry
+        return 404, {"error": "Not found"}
+
+    def _create(self, name: str, payload) -> tuple:
+        invalid = _invalid_fields(name, payload)
+        if invalid:
+            return 400, {"error": f"Missing or invalid fields: {invalid}"}
+
+        if "id" in REQUIRED_FIELDS[name] and payload["id"] in self._index[name]:
+            return 400, {"error": f"Duplicate id: {payload['id']}"}
+
+        # Like the real API, nothing is persisted
+        return 201, payload
+
+    def _update(self, name: str, entry: dict, payload) -> tuple:
+        invalid = _invalid_fields(name, payload)
+        if invalid:
+            return 400, {"error": f"Missing or invalid fields: {invalid}"}
+        return 200, {**entry, **payload}
+
+    def _login(self, payload) -> tuple:
+        if _invalid_fields_of(LOGIN_FIELDS, payload):
+            return 400, {"error": "username and password are not provided in JSON format"}
+
+        if self._credentials.get(payload["username"]) != payload["password"]:
+            return 401, {"error": "username or password is incorrect"}
+
+        token = hashlib.sha256(f"{payload['username']}:{payload['password']}".encode()).hexdigest()
+        return 201, {"token": token}
+
+def _invalid_fields(name: str, payload) -> list:
+    return _invalid_fields_of(REQUIRED_FIELDS[name], payload)
+
+def _invalid_fields_of(fields: dict, payload) -> list:
+    """ Fields that are missing, empty or of another type; bools are not numbers here """
+    if not isinstance(payload, dict):
+        return list(fields)
+    return [
+        field for field, types in fields.items()
+        if payload.get(field) in (None, "", [], {})
+        or isinstance(payload[field], bool)
+        or not isinstance(payload[field], types)
+    ]
+
+class _CountingHTTPServer(ThreadingHTTPServer):
+    connections_accepted = 0
+
+    def process_request(self, request, client_address):
+        self.connections_accepted += 1
+        super().process_request(request, client_address)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive, like the real deployment
+    disable_nagle_algorithm = True # headers and body go out in separate writes
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str):
+        store = self.server.store
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        if not store.admit():
+            status, body = 429, {"error": "Too many requests"}
+        else:
+            try:
+                store.delay(self.path)
+                try:
+                    payload = json.loads(raw) if raw else None
+                except ValueError:
+                    status, body = 400, {"error": "Malformed JSON body"}
+                else:
+                    status, body = store.handle(method, self.path, payload)
+            finally:
+                store.leave()
+
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        if method == "GET" and status == 200:
+            etag = f'"{hashlib.blake2b(data, digest_size = 16).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+        else:
+            etag = None
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass # keep the console quiet under load
+
+# --- CLI ---
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description = "Local stand-in for the Fake Store API")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8000)
+    parser.add_argument("--size", type = int, help = "Entries per collection (defaults mirror fakestoreapi.com)")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--latency", action = "append", help = "DELAY[:JITTER] or ENDPOINT=DELAY[:JITTER], in seconds")
+    parser.add_argument("--max-in-flight", type = int, help = "Answer 429 beyond this many concurrent requests")
+    args = parser.parse_args(argv)
+
+    dataset = build_dataset(args.size, args.size, args.size, args.seed)
+    server = MockStoreServer(dataset, parse_latency(args.latency), args.host, args.port, args.max_in_flight)
+    print(f"Serving Fake Store API stand-in on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from itertools import combinations
+from typing import NamedTuple
+
+class PayloadVariant(NamedTuple):
+    name: str
+    payload: dict
+    expected_status: int
+
+class MatrixResult(NamedTuple):
+    name: str
+    expected_status: int
+    actual_status: int
+
+    @property
+    def passed(self) -> bool:
+        return self.expected_status == self.actual_status
+
+# Stand-in values of another type, by type of the valid value
+_WRONG_TYPES = {str: 12345, int: "1", float: "9.99", list: {"not": "a list"}, dict: ["not", "a", "dict"]}
+_EMPTY_VALUES = {str: "", list: [], dict: {}}
+_MISSING = object()
+
+def build_matrix(base: dict, fields: tuple, valid_status: int, invalid_status: int = 400, combine: int = 2) -> list:
+    """
+    Variants of a valid base payload: the base itself, then for every field in fields a missing, an empty
+    (None for numbers) and a wrongly typed value, then every combination of up to `combine` of those
+    defects on distinct fields. Only the base is expected to get valid_status.
+    """
+    defects = [defect for field in fields for defect in _field_defects(field, base.get(field))]
+
+    variants = [PayloadVariant("valid", dict(base), valid_status)]
+    for size in range(1, combine + 1):
+        for combination in combinations(defects, size):
+            if len({field for field, _, _ in combination}) < size:
+                continue # two defects of one field: only the last would be sent
+
+            payload = dict(base)
+            for field, _, value in combination:
+                if value is _MISSING:
+                    payload.pop(field, None)
+                else:
+                    payload[field] = value
+            name = " + ".join(f"{kind}:{field}" for field, kind, _ in combination)
+            variants.append(PayloadVariant(name, payload, invalid_status))
+    return variants
+
+def _field_defects(field: str, value) -> list:
+    """ (field, kind, replacement) triples; _MISSING drops the field """
+    kind = type(value)
+    return [
+        (field, "missing", _MISSING),
+        (field, "empty", _EMPTY_VALUES.get(kind)),
+        (field, "wrong_type", _WRONG_TYPES.get(kind, "not-a-value")),
+    ]
+
+def run_matrix(client, method: str, url: str, variants: list) -> list:
+    """ Send every variant through client.send_many (concurrent when the client fans out) """
+    statuses = client.send_many([(method, url, variant.payload) for variant in variants])
+    return [MatrixResult(variant.name, variant.expected_status, status) for variant, status in zip(variants, statuses)]
+
+def failure_message(results: list) -> str:
+    """ Every failed variant by name, then their table; empty when all passed """
+    failed = [result for result in results if not result.passed]
+    if not failed:
+        return ""
+    names = "\n".join(f"  {result.name}" for result in failed)
+    return f"{len(failed)} of {len(results)} variants failed:\n{names}\n\n{render_table(failed)}"
+
+def render_table(results: list) -> str:
+    """ Expected versus actual status of every variant, failures marked """
+    width = max(len("variant"), *(len(result.name) for result in results))
+    lines = [f"{'variant':<{width}}  expected  actual", f"{'-' * width}  --------  ------"]
+    lines += [
+        f"{result.name:<{width}}  {result.expected_status:>8}  {result.actual_status:>6}{'' if result.passed else '  <-- FAIL'}"
+        for result in results
+    ]
+    return "\n".join(lines)
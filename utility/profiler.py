@@ -0,0 +1,168 @@
+"""
+Opt-in attribution of test time to network, JSON decoding and validation (see --profile).
+
+Timers nest: time spent in an inner timer is taken out of the outer one, so a validator that looks
+entries up by id is charged only for its own comparisons. Whatever no timer covers is reported as "other".
+"""
+import cProfile
+import functools
+import heapq
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+CATEGORIES = ("network", "json", "validation")
+REQUEST_METHODS = {"get", "post", "put", "delete", "patch", "head", "fetch"}
+
+_active = None # CallProfiler of the run, while profiling is on
+
+def profiled(category: str):
+    """ Decorator charging the calls of a function to category; a global lookup when profiling is off """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = _active
+            if profiler is None:
+                return function(*args, **kwargs)
+            with profiler.timer(category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class CallProfiler:
+    """ Exclusive seconds per category for every test, from timers run on the main thread """
+
+    def __init__(self, clock = time.perf_counter):
+        self.clock = clock
+        self.current_test = None # set by the pytest_runtest_setup hook
+        self.tests = defaultdict(lambda: dict.fromkeys((*CATEGORIES, "total"), 0.0))
+        self._stack = [] # [start, seconds spent in nested timers] per open timer
+
+    def activate(self) -> "CallProfiler":
+        global _active
+        _active = self
+        return self
+
+    def deactivate(self):
+        global _active
+        if _active is self:
+            _active = None
+
+    @contextmanager
+    def timer(self, category: str):
+        frame = [self.clock(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = self.clock() - frame[0]
+            if self.current_test is not None: # before the first test, e.g. during collection
+                self.tests[self.current_test][category] += elapsed - frame[1]
+            if self._stack:
+                self._stack[-1][1] += elapsed
+
+    def add_duration(self, test: str, seconds: float):
+        """ Wall time of a test phase (setup, call or teardown) """
+        self.tests[test]["total"] += seconds
+
+    def slowest(self, count: int) -> list:
+        """ (test, breakdown with "other") of the count slowest tests """
+        ranked = sorted(self.tests.items(), key = lambda item: item[1]["total"], reverse = True)[:count]
+        return [(test, {**times, "other": max(0.0, times["total"] - sum(times[name] for name in CATEGORIES))}) for test, times in ranked]
+
+    def as_dict(self) -> dict:
+        return {test: dict(times) for test, times in self.tests.items()}
+
+    def merge(self, tests: dict):
+        for test, times in tests.items():
+            self.tests[test].update(times)
+
+def render_breakdown(rows: list) -> list:
+    """ Table lines of slowest(): milliseconds per category """
+    columns = ("total", *CATEGORIES, "other")
+    width = max([len("test"), *(len(test) for test, _ in rows)])
+    lines = [f"{'test':<{width}}" + "".join(f"{name:>12}" for name in columns)]
+    for test, times in rows:
+        lines.append(f"{test:<{width}}" + "".join(f"{times[name] * 1000:>10.1f}ms" for name in columns))
+    return lines
+
+class ProfiledContext:
+    """ Request context whose requests count as network time and whose responses time their decoding """
+
+    def __init__(self, context, profiler: CallProfiler):
+        self._context = context
+        self._profiler = profiler
+
+    def __getattr__(self, name: str):
+        if name not in REQUEST_METHODS:
+            return getattr(self._context, name)
+
+        # Resolved under the timer: a LazyRequestContext launches Playwright on the first request
+        def request(*args, **kwargs):
+            with self._profiler.timer("network"):
+                return ProfiledResponse(getattr(self._context, name)(*args, **kwargs), self._profiler)
+        return request
+
+class ProfiledResponse:
+    """ APIResponse whose json() and text() count as JSON decoding; the body comes from the driver then """
+
+    def __init__(self, response, profiler: CallProfiler):
+        self._response = response
+        self._profiler = profiler
+
+    def json(self):
+        with self._profiler.timer("json"):
+            return self._response.json()
+
+    def text(self) -> str:
+        with self._profiler.timer("json"):
+            return self._response.text()
+
+    def __getattr__(self, name: str):
+        return getattr(self._response, name)
+
+class SlowestProfiles:
+    """ cProfile of every test, keeping the profiles of the `count` slowest for dump() """
+
+    def __init__(self, count: int):
+        self.count = count
+        self._heap = [] # (seconds, test, profile), fastest first
+
+    def start(self) -> cProfile.Profile:
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stop(self, test: str, profile: cProfile.Profile, seconds: float):
+        profile.disable()
+        if len(self._heap) < self.count:
+            heapq.heappush(self._heap, (seconds, test, profile))
+        elif self._heap and seconds > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (seconds, test, profile))
+
+    def dump(self, directory) -> list:
+        """ One pstats file per kept test, slowest first; snakeviz, flameprof or gprof2dot render them """
+        directory = Path(directory)
+        directory.mkdir(parents = True, exist_ok = True)
+
+        paths = []
+        for seconds, test, profile in sorted(self._heap, key = lambda entry: entry[0], reverse = True):
+            path = directory / f"{_file_name(test)}.prof"
+            profile.dump_stats(path)
+            paths.append(path)
+        return paths
+
+def prune_dumps(directory, keep: list) -> list:
+    """ Delete the pstats files of every test but those in keep, e.g. after xdist workers each dumped their slowest """
+    kept = {f"{_file_name(test)}.prof" for test in keep}
+    removed = [path for path in Path(directory).glob("*.prof") if path.name not in kept]
+    for path in removed:
+        path.unlink()
+    return removed
+
+def _file_name(test: str) -> str:
+    """ 'tests/test_carts.py::TestCarts::test_x[1]' -> 'tests_test_carts.py__TestCarts__test_x_1_' """
+    return re.sub(r"[^\w.-]", "_", test.replace("::", "__"))
@@ -0,0 +1,119 @@
+from collections import defaultdict
+from html import escape
+from typing import NamedTuple
+from utility.endpoints import endpoint_template
+from utility.metrics import bucket_labels, histogram, summarize
+
+class RequestRecord(NamedTuple):
+    test: str
+    method: str
+    endpoint: str
+    url: str
+    status: int
+    elapsed: float # seconds
+    size: int # bytes received, None when the response carried no Content-Length
+
+class RequestRecorder:
+    """ Collects one RequestRecord per API call, attributed to the test that is running. """
+
+    def __init__(self):
+        self.records = []
+        self.current_test = None # set by the pytest_runtest_setup hook
+
+    def record(self, method: str, url: str, response, elapsed: float):
+        self.records.append(RequestRecord(
+            self.current_test, method, endpoint_template(url), url, response.status, elapsed, body_size(response)
+        ))
+
+    def slowest(self, count: int) -> list:
+        return sorted(self.records, key = lambda record: record.elapsed, reverse = True)[:count]
+
+    def by_endpoint(self) -> dict:
+        """ (method, endpoint) -> latency summary, bytes and histogram """
+        groups = defaultdict(list)
+        for record in self.records:
+            groups[(record.method, record.endpoint)].append(record)
+
+        return {key: _aggregate(records) for key, records in sorted(groups.items())}
+
+    def by_test(self) -> dict:
+        """ test nodeid -> time spent waiting on each endpoint """
+        groups = defaultdict(list)
+        for record in self.records:
+            groups[record.test].append(record)
+
+        return {
+            test: {
+                "requests": len(records),
+                "elapsed": sum(record.elapsed for record in records),
+                "endpoints": _time_per_endpoint(records),
+            }
+            for test, records in groups.items()
+        }
+
+def body_size(response) -> int:
+    """
+    Content-Length of the response, or None (chunked): pulling the body just to measure it would
+    cost a driver round trip per request, inside the timing the recorder reports.
+    """
+    length = response.headers.get("content-length")
+    return int(length) if length is not None else None
+
+def _aggregate(records: list) -> dict:
+    stats = summarize([record.elapsed for record in records], sum(record.elapsed for record in records),
+                      [record.status for record in records])
+    stats["bytes"] = sum(record.size for record in records if record.size is not None)
+    stats["histogram"] = histogram(record.elapsed for record in records)
+    return stats
+
+def _time_per_endpoint(records: list) -> dict:
+    totals = defaultdict(float)
+    for record in records:
+        totals[f"{record.method} {record.endpoint}"] += record.elapsed
+    return dict(sorted(totals.items(), key = lambda item: item[1], reverse = True))
+
+# --- pytest-html ---
+
+def render_html_summary(recorder: RequestRecorder, slowest: int = 10) -> list:
+    """ HTML fragments for the pytest-html summary: slowest calls, per-endpoint histograms, per-test wait time """
+    if not recorder.records:
+        return []
+
+    slow_rows = [
+        [record.test or "-", record.method, record.endpoint, record.status, _ms(record.elapsed),
+         "-" if record.size is None else record.size]
+        for record in recorder.slowest(slowest)
+    ]
+
+    endpoint_rows = [
+        [method, endpoint, stats["requests"], _ms(stats["p50"]), _ms(stats["p95"]), _ms(stats["max"]),
+         stats["bytes"], _statuses(stats["statuses"]), *stats["histogram"]]
+        for (method, endpoint), stats in recorder.by_endpoint().items()
+    ]
+
+    test_rows = [
+        [test or "-", stats["requests"], _ms(stats["elapsed"]),
+         ", ".join(f"{endpoint} {_ms(elapsed)} ms" for endpoint, elapsed in stats["endpoints"].items())]
+        for test, stats in sorted(recorder.by_test().items(), key = lambda item: item[1]["elapsed"], reverse = True)
+    ]
+
+    return [
+        "<h2>Slowest API calls</h2>",
+        _table(["Test", "Method", "Endpoint", "Status", "ms", "Bytes"], slow_rows),
+        "<h2>API endpoints</h2>",
+        _table(["Method", "Endpoint", "Calls", "p50 ms", "p95 ms", "max ms", "Bytes", "Statuses", *bucket_labels()],
+               endpoint_rows),
+        "<h2>API wait time per test</h2>",
+        _table(["Test", "Calls", "Total ms", "Per endpoint"], test_rows),
+    ]
+
+def _table(headers: list, rows: list) -> str:
+    head = "".join(f"<th>{escape(str(header))}</th>" for header in headers)
+    body = "".join("<tr>" + "".join(f"<td>{escape(str(cell))}</td>" for cell in row) + "</tr>" for row in rows)
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}"
+
+def _statuses(counts: dict) -> str:
+    return ", ".join(f"{status}×{count}" for status, count in sorted(counts.items()))
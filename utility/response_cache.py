@@ -0,0 +1,51 @@
+import time
+from utility.endpoints import resource_of
+
+class ResponseCache:
+    """ Memoizes GET responses per URL for `ttl` seconds within a test session. """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = {}
+
+    def get(self, url: str):
+        """ Return the cached response for url, or None when missing or expired. """
+        entry = self._entries.get(url)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[url]
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return response
+
+    def put(self, url: str, response):
+        """ Only successful responses are worth replaying. """
+        if response.ok:
+            self._entries[url] = (time.monotonic(), response)
+
+    def invalidate(self, url: str):
+        """ Drop every cached entry that belongs to the same resource as url, e.g. /carts/5 -> /carts* """
+        resource = resource_of(url)
+        stale = [key for key in self._entries if resource_of(key) == resource]
+
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+        }
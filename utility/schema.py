@@ -0,0 +1,197 @@
+"""
+Declarative schemas of /products, /carts and /users entries, compiled once into plain Python validators.
+
+compile_schema() writes the checks of every field out as straight-line source, so validating an entry
+interprets nothing at run time: no loop over the fields, no dispatch on the kind of rule. validate_all()
+then reports every violation of a collection, with the id of its entry, in a single pass.
+"""
+import re
+from typing import NamedTuple
+from utility.columns import EMAIL_PATTERN
+from utility.profiler import profiled
+from utility.settings import PRODUCT_CATEGORIES
+
+NUMBER = (int, float)
+
+_MISSING = object()
+
+class Field(NamedTuple):
+    name: str
+    types: tuple # exact types, so a bool is never accepted as an int
+    required: bool = True
+    non_empty: bool = False
+    positive: bool = False # NaN is not positive either
+    pattern: re.Pattern = None
+    one_of: frozenset = None
+    items: "Schema" = None # schema of every element of a list
+    some_positive: str = None # a list needs an element whose field of this name is a positive number
+    unique: bool = False # no two entries of a collection share the value
+
+class Schema(NamedTuple):
+    name: str
+    fields: tuple
+    id_field: str = "id"
+
+    @property
+    def required(self) -> tuple:
+        return tuple(field.name for field in self.fields if field.required)
+
+class CompiledSchema:
+    """ Validator generated from a Schema; `source` is the generated code, for debugging """
+
+    def __init__(self, schema: Schema, check, source: str):
+        self.schema = schema
+        self.source = source
+        self._check = check
+        self._unique = [field.name for field in schema.fields if field.unique]
+
+    def validate(self, entry) -> list:
+        """ Violations of one entry, e.g. ['price: not positive: -1'] """
+        return self._check(entry, *(set() for _ in self._unique))
+
+    @profiled("validation")
+    def validate_all(self, entries) -> list:
+        """ (id, violations) of every entry that has any, in collection order; entries may be a stream """
+        check, id_field = self._check, self.schema.id_field
+        seen = [set() for _ in self._unique]
+
+        failures = []
+        for entry in entries:
+            problems = check(entry, *seen)
+            if problems:
+                failures.append((entry.get(id_field) if type(entry) is dict else None, problems))
+        return failures
+
+def compile_schema(schema: Schema) -> CompiledSchema:
+    namespace = {"_NUMBER": NUMBER, "_MISSING": _MISSING}
+    unique = [f"_seen_{index}" for index, field in enumerate(schema.fields) if field.unique]
+
+    lines = [
+        f"def check(entry, {', '.join(unique)}):" if unique else "def check(entry):",
+        "    if type(entry) is not dict:",
+        "        return ['expected an object']",
+        "    problems = []",
+    ]
+    for index, field in enumerate(schema.fields):
+        lines += _field_lines(field, str(index), namespace)
+    lines.append("    return problems")
+
+    source = "\n".join(lines)
+    exec(compile(source, f"<schema {schema.name}>", "exec"), namespace)
+    return CompiledSchema(schema, namespace["check"], source)
+
+def _field_lines(field: Field, key: str, namespace: dict, entry: str = "entry", prefix: str = "", depth: int = 1) -> list:
+    """
+    Checks of one field of `entry`, indented `depth` levels, with their constants bound in namespace under
+    names ending in key. prefix leads every message, e.g. '{_name_3}[{position_3}].' for a nested field.
+    Field names only reach the messages through those constants: as f-string text, a brace or quote
+    in a name would change the generated code.
+    """
+    pad = "    " * depth
+    name, label, value = field.name, f"{prefix}{{_name_{key}}}", f"value_{key}"
+    namespace[f"_name_{key}"] = name
+    types = field.types if isinstance(field.types, tuple) else (field.types,)
+    namespace[f"_types_{key}"] = types
+    expected = " or ".join(kind.__name__ for kind in types)
+
+    lines = [
+        f"{pad}{value} = {entry}.get({name!r}, _MISSING)",
+        f"{pad}if {value} is _MISSING:",
+        f"{pad}    problems.append(f'{label}: missing')" if field.required else f"{pad}    pass",
+        f"{pad}elif type({value}) not in _types_{key}:",
+        f"{pad}    problems.append(f'{label}: expected {expected}, got {{type({value}).__name__}}')",
+    ]
+
+    # Value checks, run only on a value of the right type
+    checks = []
+    if field.non_empty:
+        checks += [f"if not {value}:", f"    problems.append(f'{label}: empty')"]
+    if field.positive:
+        checks += [f"if not {value} > 0:", f"    problems.append(f'{label}: not positive: {{{value}!r}}')"]
+    if field.pattern is not None:
+        namespace[f"_match_{key}"] = field.pattern.match
+        checks += [f"if not _match_{key}({value}):", f"    problems.append(f'{label}: malformed: {{{value}!r}}')"]
+    if field.one_of is not None:
+        namespace[f"_choices_{key}"] = frozenset(field.one_of)
+        checks += [f"if {value} not in _choices_{key}:", f"    problems.append(f'{label}: unexpected: {{{value}!r}}')"]
+    if field.items is not None:
+        checks += _items_lines(field, key, namespace, label)
+    elif field.some_positive is not None:
+        wanted = namespace[f"_wanted_{key}"] = field.some_positive
+        checks += [
+            f"if not any(type(item) is dict and type(item.get({wanted!r})) in _NUMBER and item[{wanted!r}] > 0 for item in {value}):",
+            f"    problems.append(f'{label}: no element with a positive {{_wanted_{key}}}')",
+        ]
+    if field.unique:
+        checks += [
+            f"if {value} in _seen_{key}:",
+            f"    problems.append(f'{label}: duplicate: {{{value}!r}}')",
+            f"_seen_{key}.add({value})",
+        ]
+    if checks:
+        lines += [f"{pad}else:", *(f"{pad}    {line}" for line in checks)]
+    return lines
+
+def _items_lines(field: Field, key: str, namespace: dict, label: str) -> list:
+    """
+    The checks of field.items inlined into a loop over the list, unindented; a call per element would
+    cost more than the checks themselves. some_positive is tracked in the same loop.
+    """
+    if any(nested.unique for nested in field.items.fields):
+        raise ValueError(f"{field.name}: unique applies to the entries of a collection, not to list elements")
+
+    item, position, found = f"item_{key}", f"position_{key}", f"positive_{key}"
+    wanted = namespace[f"_wanted_{key}"] = field.some_positive
+
+    lines = [f"{found} = False"] if wanted is not None else []
+    lines += [
+        f"for {position}, {item} in enumerate(value_{key}):",
+        f"    if type({item}) is not dict:",
+        f"        problems.append(f'{label}[{{{position}}}]: expected an object')",
+        "        continue",
+    ]
+    for index, nested in enumerate(field.items.fields):
+        lines += [line[4:] for line in _field_lines(nested, f"{key}_{index}", namespace, item, f"{label}[{{{position}}}].", 2)]
+    if wanted is not None:
+        lines += [
+            f"    if not {found}:",
+            f"        {found} = type({item}.get({wanted!r})) in _NUMBER and {item}[{wanted!r}] > 0",
+        ]
+        lines += [f"if not {found}:", f"    problems.append(f'{label}: no element with a positive {{_wanted_{key}}}')"]
+    return lines
+
+# --- Fake Store resources ---
+
+PRODUCT_SCHEMA = Schema("product", (
+    Field("id", int, unique = True),
+    Field("title", str, non_empty = True),
+    Field("price", NUMBER, positive = True),
+    Field("description", str),
+    Field("category", str, one_of = frozenset(PRODUCT_CATEGORIES)),
+    Field("image", str, non_empty = True),
+    Field("rating", dict, required = False),
+))
+
+CART_LINE_SCHEMA = Schema("cart line", (
+    Field("productId", int),
+    Field("quantity", NUMBER),
+))
+
+CART_SCHEMA = Schema("cart", (
+    Field("id", int, unique = True),
+    Field("userId", int),
+    Field("date", str, non_empty = True),
+    Field("products", list, non_empty = True, items = CART_LINE_SCHEMA, some_positive = "quantity"),
+))
+
+USER_SCHEMA = Schema("user", (
+    Field("id", int, unique = True),
+    Field("username", str, non_empty = True),
+    Field("email", str, pattern = EMAIL_PATTERN),
+    Field("password", str, non_empty = True),
+))
+
+# Compiled once at import
+PRODUCT_VALIDATOR = compile_schema(PRODUCT_SCHEMA)
+CART_VALIDATOR = compile_schema(CART_SCHEMA)
+USER_VALIDATOR = compile_schema(USER_SCHEMA)
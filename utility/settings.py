@@ -1,5 +1,10 @@
 BASE_URL = "https://fakestoreapi.com"
 
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+}
+
 PRODUCT_ENDPOINT = "/products"
 CART_ENDPOINT = "/carts"
 USER_ENDPOINT = "/users"
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from utility.endpoints import resource_of
+from utility.profiler import profiled
+from utility.stored_response import StoredResponse
+
+class SharedResponseStore:
+    """
+    File-backed GET snapshots shared by every pytest-xdist worker of a run.
+    The first worker to ask for a url fetches it under a lock file; the others read its snapshot.
+    Snapshots are keyed by namespace (the server) and url, and a write by any worker drops those of its resource.
+    """
+
+    def __init__(self, directory: Path, namespace: str, lock_timeout: float = 60):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents = True, exist_ok = True)
+        self.namespace = namespace
+        self.lock_timeout = lock_timeout
+        self.fetched = 0
+        self.reused = 0
+        self.invalidated = 0
+
+    # Waiting for the worker that fetches url is network time as much as fetching it
+    @profiled("network")
+    def get_or_fetch(self, url: str, fetch):
+        """ Snapshot of url, calling fetch() only if no worker has stored it yet; failed responses are not shared """
+        path = self._path(url)
+
+        response = self._load(path, url)
+        if response is not None:
+            return response
+
+        with self._lock(path):
+            response = self._load(path, url)
+            if response is not None:
+                return response
+
+            response = fetch()
+            self.fetched += 1
+            if response.ok:
+                self._store(path, StoredResponse.from_response(response, url))
+            return response
+
+    def invalidate(self, url: str):
+        """ Drop the snapshots of the resource of url, e.g. /carts/5 -> /carts and /carts?limit=5 """
+        for path in self.directory.glob(f"{self._prefix(url)}-*.json"):
+            path.unlink(missing_ok = True)
+            self.invalidated += 1
+
+    def stats(self) -> dict:
+        return {"fetched": self.fetched, "reused": self.reused, "invalidated": self.invalidated}
+
+    def _prefix(self, url: str) -> str:
+        """ Namespace and resource, so invalidate() finds every url of a resource without an index """
+        key = f"{self.namespace} {resource_of(url)}"
+        return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{self._prefix(url)}-{hashlib.sha256(url.encode()).hexdigest()[:32]}.json"
+
+    def _load(self, path: Path, url: str):
+        try:
+            snapshot = json.loads(path.read_text())
+        except FileNotFoundError: # never stored, or dropped by a write
+            return None
+        self.reused += 1
+        return StoredResponse(url, snapshot["status"], snapshot["headers"], snapshot["body"].encode())
+
+    def _store(self, path: Path, response: StoredResponse):
+        # Write then rename, so readers never see a half-written snapshot
+        temp = path.with_suffix(f".{os.getpid()}.tmp")
+        temp.write_text(json.dumps({"status": response.status, "headers": response.headers, "body": response.text()}))
+        os.replace(temp, path)
+
+    def _lock(self, path: Path):
+        return _LockFile(path.with_suffix(".lock"), self.lock_timeout)
+
+class _LockFile:
+    """ Portable inter-process lock: whoever creates the file first owns it """
+
+    def __init__(self, path: Path, timeout: float):
+        self.path = path
+        self.timeout = timeout
+        self._owned = False
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                self._owned = True
+                return self
+            except FileExistsError:
+                time.sleep(0.05)
+        # A crashed worker may have left the lock behind; fetching twice is better than hanging
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._owned:
+            self.path.unlink(missing_ok = True)
@@ -0,0 +1,92 @@
+import asyncio
+import time
+from utility.endpoints import resource_of
+
+class SingleFlight:
+    """
+    Identical GETs share one request: while it is in flight (async clients) and for `window` seconds
+    after it was issued (both clients). Writes to a resource end the window of its urls.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self.issued = 0
+        self.coalesced = 0
+        self._recent = {} # url -> (issued_at, response)
+        self._in_flight = {} # url -> asyncio.Task, async clients only
+
+    def do(self, url: str, fetch):
+        """ Response of fetch() for url, or of the identical GET issued less than `window` seconds ago """
+        response = self._recent_response(url)
+        if response is not None:
+            return response
+
+        issued_at = time.monotonic()
+        self.issued += 1
+        response = fetch()
+        self._remember(url, issued_at, response)
+        return response
+
+    async def do_async(self, url: str, fetch):
+        """ Same as do(), and concurrent callers also await the request already in flight """
+        response = self._recent_response(url)
+        if response is not None:
+            return response
+
+        task = self._in_flight.get(url)
+        if task is not None:
+            self.coalesced += 1
+            # Shielded so a cancelled caller does not cancel the request others are waiting on
+            return await asyncio.shield(task)
+
+        issued_at = time.monotonic()
+        self.issued += 1
+        task = asyncio.ensure_future(fetch())
+        self._in_flight[url] = task
+        try:
+            response = await asyncio.shield(task)
+        finally:
+            # A write while the request was in flight already dropped it; its response may be stale
+            still_current = self._in_flight.get(url) is task
+            if still_current:
+                del self._in_flight[url]
+
+        if still_current:
+            self._remember(url, issued_at, response)
+        return response
+
+    def forget(self, url: str):
+        """ After a write, later GETs of the same resource go to the server again """
+        resource = resource_of(url)
+        for entries in (self._recent, self._in_flight):
+            for key in [key for key in entries if resource_of(key) == resource]:
+                del entries[key]
+
+    def stats(self) -> dict:
+        return {"issued": self.issued, "coalesced": self.coalesced}
+
+    def _remember(self, url: str, issued_at: float, response):
+        """ Keep an ok response for the window; with no window only requests in flight are shared """
+        if self.window <= 0 or not response.ok:
+            return
+
+        # Entries arrive in about the order they were issued, so the expired ones sit at the front
+        now = time.monotonic()
+        for key, (at, _) in list(self._recent.items()):
+            if now - at <= self.window:
+                break
+            del self._recent[key]
+        self._recent[url] = (issued_at, response)
+
+    def _recent_response(self, url: str):
+        entry = self._recent.get(url)
+        if entry is None:
+            return None
+
+        issued_at, response = entry
+        if time.monotonic() - issued_at > self.window:
+            del self._recent[url]
+            return None
+
+        self.coalesced += 1
+        return response
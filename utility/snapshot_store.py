@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from utility.shared_store import _LockFile
+
+class SnapshotStore:
+    """
+    Content hashes of collection entries that passed their per-id checks, persisted between runs.
+    Hashes are kept per base url and resource, so a run against the stand-in never masks one against the real API.
+    """
+
+    def __init__(self, path: Path, namespace: str):
+        self.path = Path(path)
+        self.namespace = namespace
+        self.checked = 0
+        self.skipped = 0
+        self._hashes = self._read().get(namespace, {})
+        self._updates = {} # resource -> {id: hash} verified during this run
+
+    def changed(self, resource: str, entries: list) -> list:
+        """ Entries that are new or whose content differs from the snapshot, in collection order """
+        known = self._hashes.get(resource, {})
+        changed = [entry for entry in entries if known.get(str(entry["id"])) != entry_hash(entry)]
+
+        self.checked += len(changed)
+        self.skipped += len(entries) - len(changed)
+        return changed
+
+    def mark_verified(self, resource: str, entries: list):
+        """ Remember entries whose checks passed; failing ones stay out so the next run checks them again """
+        self._updates.setdefault(resource, {}).update((str(entry["id"]), entry_hash(entry)) for entry in entries)
+
+    def save(self):
+        """ Merge this run's hashes into the file; safe while other xdist workers save theirs """
+        if not self._updates:
+            return
+
+        self.path.parent.mkdir(parents = True, exist_ok = True)
+        with _LockFile(self.path.with_suffix(".lock"), timeout = 10):
+            snapshot = self._read()
+            namespace = snapshot.setdefault(self.namespace, {})
+            for resource, hashes in self._updates.items():
+                namespace.setdefault(resource, {}).update(hashes)
+
+            # Write then rename, so a crashed run never leaves a truncated snapshot behind
+            temp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            temp.write_text(json.dumps(snapshot, indent = 1, sort_keys = True))
+            os.replace(temp, self.path)
+
+    def stats(self) -> dict:
+        return {"checked": self.checked, "skipped": self.skipped}
+
+    def _read(self) -> dict:
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text())
+        except ValueError:
+            # A corrupt snapshot only costs a full sweep
+            return {}
+
+def entry_hash(entry: dict) -> str:
+    """ Stable digest of an entry: key order and whitespace do not matter """
+    canonical = json.dumps(entry, sort_keys = True, separators = (",", ":"), ensure_ascii = False)
+    return hashlib.blake2b(canonical.encode(), digest_size = 16).hexdigest()
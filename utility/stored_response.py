@@ -0,0 +1,35 @@
+import json
+from utility.profiler import profiled
+
+class StoredResponse:
+    """ Stand-in for a Playwright APIResponse rebuilt from a stored status, headers and body. """
+
+    def __init__(self, url: str, status: int, headers: dict, body: bytes, status_text: str = ""):
+        self.url = url
+        self.status = status
+        self.status_text = status_text
+        self.headers = headers
+        self._body = body
+
+    @classmethod
+    def from_response(cls, response, url: str = None):
+        """ Copy a Playwright APIResponse, reading its body once """
+        return cls(url or response.url, response.status, dict(response.headers), response.body(), response.status_text)
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status <= 299
+
+    def body(self) -> bytes:
+        return self._body
+
+    def text(self) -> str:
+        # str() decodes bytes and memoryviews (replayed cassette bodies) alike
+        return str(self._body, "utf-8")
+
+    @profiled("json")
+    def json(self):
+        return json.loads(self.text())
+
+    def dispose(self):
+        pass
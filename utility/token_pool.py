@@ -0,0 +1,147 @@
+import asyncio
+import base64
+import json
+import time
+from utility.async_runner import gather_limited
+
+# Lifetime assumed for tokens that do not carry an `exp` claim (the stand-in's tokens, for one)
+DEFAULT_TOKEN_TTL = 300.0
+# Tokens are refreshed in the background once less than this share of their lifetime is left
+REFRESH_MARGIN = 0.2
+
+class TokenPoolError(RuntimeError):
+    """ No user of the pool could log in """
+
+class _Slot:
+    """ One logged-in user: its credential, current token and when that token expires (monotonic clock) """
+
+    def __init__(self, username: str, password: str):
+        self.username = username
+        self.password = password
+        self.token = None
+        self.issued_at = 0.0
+        self.expires_at = 0.0
+        self.refreshing = None # task of a login in flight for this slot
+
+    def due(self) -> float:
+        """ Monotonic time from which the token should be replaced """
+        return self.expires_at - (self.expires_at - self.issued_at) * REFRESH_MARGIN
+
+class TokenPool:
+    """
+    Tokens of a pool of users, logged in once through an AsyncAPIClient and handed out round-robin.
+    A background task logs users in again before their tokens expire, so callers never wait for
+    /auth/login unless a token already expired.
+    """
+
+    def __init__(self, client, ttl: float = DEFAULT_TOKEN_TTL):
+        self.client = client
+        self.ttl = ttl
+        self.logins = 0
+        self.failed_logins = 0
+        self.refreshes = 0
+        self.handed_out = 0
+
+        self._slots = []
+        self._next = 0
+        self._refresher = None
+
+    # --- Lifecycle ---
+
+    async def fill(self, credentials: dict, size: int, concurrency: int = 8) -> "TokenPool":
+        """ Log in up to `size` users of credentials (username -> password); users that fail are left out """
+        slots = [_Slot(username, password) for username, password in list(credentials.items())[:size]]
+        logged_in = await gather_limited((self._login(slot) for slot in slots), concurrency)
+
+        self._slots = [slot for slot, ok in zip(slots, logged_in) if ok]
+        if not self._slots:
+            raise TokenPoolError(f"None of {len(slots)} users could log in")
+        return self
+
+    def start(self) -> "TokenPool":
+        """ Start refreshing tokens in the background; needs a running event loop """
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_loop())
+        return self
+
+    async def close(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+    # --- Tokens ---
+
+    async def token(self) -> str:
+        """ Next token round-robin; a token that already expired is replaced before it is handed out """
+        slot = self._slots[self._next % len(self._slots)]
+        self._next += 1
+        self.handed_out += 1
+
+        if slot.expires_at <= time.monotonic():
+            await self._refresh(slot)
+        return slot.token
+
+    async def headers(self) -> dict:
+        return {"Authorization": f"Bearer {await self.token()}"}
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._slots), "logins": self.logins, "failed_logins": self.failed_logins,
+            "refreshes": self.refreshes, "handed_out": self.handed_out,
+        }
+
+    # --- Refresh ---
+
+    async def _refresh_loop(self):
+        while True:
+            now = time.monotonic()
+            due = [slot for slot in self._slots if slot.due() <= now]
+            # A login that raises leaves its slot due, like one that is refused
+            await asyncio.gather(*(self._refresh(slot) for slot in due), return_exceptions = True)
+
+            next_due = min(slot.due() for slot in self._slots)
+            # Failed logins leave their slot due; retry after a second instead of spinning
+            await asyncio.sleep(max(next_due - time.monotonic(), 1.0 if due else 0.0))
+
+    async def _refresh(self, slot: _Slot):
+        """ Log the slot in again; concurrent callers share the login in flight """
+        if slot.refreshing is None:
+            slot.refreshing = asyncio.ensure_future(self._login(slot))
+            slot.refreshing.add_done_callback(lambda _: setattr(slot, "refreshing", None))
+            self.refreshes += 1
+        await asyncio.shield(slot.refreshing)
+
+    async def _login(self, slot: _Slot) -> bool:
+        self.logins += 1
+        response = await self.client.auth_a_user({"username": slot.username, "password": slot.password})
+        if response.status not in (200, 201):
+            self.failed_logins += 1
+            return False
+
+        slot.token = (await response.json())["token"]
+        slot.issued_at = time.monotonic()
+        slot.expires_at = slot.issued_at + token_lifetime(slot.token, self.ttl)
+        return True
+
+def credentials_of(users: list) -> dict:
+    """ username -> password of every user entry that has both """
+    return {
+        entry["username"]: entry["password"]
+        for entry in users
+        if "username" in entry and "password" in entry
+    }
+
+def token_lifetime(token: str, default: float) -> float:
+    """ Seconds until the `exp` claim of a JWT; `default` for tokens without one """
+    parts = token.split(".")
+    if len(parts) != 3:
+        return default
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+        return float(claims["exp"]) - time.time()
+    except (ValueError, KeyError, TypeError):
+        return default